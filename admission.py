@@ -0,0 +1,169 @@
+"""
+Admission control and fair queuing for the expensive API endpoints.
+
+Parsing, hierarchy creation, reconcile and bulk update / delete each hold a
+worker thread and a share of the ADO budget for seconds at a time. At most
+global_limit of them run at once, and at most per_user_limit per user; the rest
+wait in a per-user queue, and freed slots go round-robin across users so one
+user's batch can't starve everyone else. A request that can't be queued, or
+waits longer than max_wait, is turned away at once with a 429 carrying its
+queue position and a Retry-After estimate. Limits come from config.ADMISSION.
+Reads are never gated, so they stay fast under batch load.
+
+Users are keyed by the connection profile a request names (each profile is its
+own ADO identity), else by client address. The `X-User` header is only believed
+from the addresses in `trusted_proxies` — a reverse proxy that has already
+authenticated the user; from anyone else it could be varied per request to
+dodge the per-user limits.
+
+Waiting happens on the event loop (no worker thread is held while queued).
+"""
+import asyncio
+import math
+import threading
+from collections import OrderedDict, deque
+
+import config as cfg_module
+
+# (method, path) of the gated endpoints
+ENDPOINTS = {
+    ("POST", "/api/parse"),
+    ("POST", "/api/create"),
+    ("POST", "/api/reconcile/apply"),
+    ("POST", "/api/workitems/bulk-update"),
+    ("POST", "/api/workitems/delete"),
+}
+SERVICE_EWMA = 0.2  # weight of the newest sample in the average service time
+
+
+class AdmissionRejected(Exception):
+    """Over capacity: the request was not run. Carries its queue position and a retry hint."""
+
+    def __init__(self, message: str, position: int, retry_after: int):
+        super().__init__(message)
+        self.position    = position
+        self.retry_after = retry_after
+
+
+def user_key(client: str, forwarded_user: str = "", profile: str = None, limits: dict = None) -> str:
+    """Who a gated request counts against: `X-User` from a trusted proxy, else a
+    configured profile, else the client address.
+    """
+    limits = limits or controller.limits()
+    if forwarded_user and client in limits["trusted_proxies"]:
+        return f"user:{forwarded_user}"
+    if profile:
+        try:
+            return f"profile:{cfg_module.get_profile(profile)['name']}"
+        except KeyError:
+            pass  # unknown profile: the request fails later, count it against the address
+    return f"addr:{client}"
+
+
+class AdmissionController:
+    def __init__(self, limits: dict = None):
+        self._limits  = limits  # fixed limits; None = config.ADMISSION (re-read per request)
+        self._lock    = threading.Lock()
+        self._running = {}             # user → requests running
+        self._waiting = OrderedDict()  # user → deque of futures; order = round-robin turn
+        self._service = 1.0            # average seconds an admitted request runs
+        self._stats   = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    def limits(self) -> dict:
+        return self._limits or cfg_module.admission()
+
+    def _position(self, user: str, index: int) -> int:
+        """Requests served before `user`'s index-th waiter, taking turns between users."""
+        return index + sum(min(len(q), index + 1) for u, q in self._waiting.items() if u != user)
+
+    def _retry_after(self, position: int, limits: dict) -> int:
+        return max(1, math.ceil((position + 1) * self._service / max(1, limits["global_limit"])))
+
+    def _reject(self, user: str, position: int, limits: dict, waited: bool) -> AdmissionRejected:
+        retry = self._retry_after(position, limits)
+        what  = f"still queued after {limits['max_wait']:g}s" if waited else "queue full"
+        return AdmissionRejected(f"Server busy ({what}): {position} request(s) ahead of yours — "
+                                 f"retry in about {retry}s", position, retry)
+
+    def _dispatch(self, limits: dict):
+        """Hand free slots to waiting users in turn (lock held)."""
+        while self._waiting and sum(self._running.values()) < limits["global_limit"]:
+            user = next((u for u in self._waiting if self._running.get(u, 0) < limits["per_user_limit"]), None)
+            if user is None:
+                return
+            queue  = self._waiting[user]
+            waiter = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(user)
+            else:
+                del self._waiting[user]
+            self._running[user] = self._running.get(user, 0) + 1
+            self._stats["admitted"] += 1
+            waiter.get_loop().call_soon_threadsafe(lambda w=waiter: w.done() or w.set_result(None))
+
+    async def acquire(self, user: str):
+        """Wait for a slot for `user`. Raises AdmissionRejected when over capacity."""
+        limits = self.limits()
+        with self._lock:
+            queue = self._waiting.get(user)
+            if (not queue and sum(self._running.values()) < limits["global_limit"]
+                    and self._running.get(user, 0) < limits["per_user_limit"]):
+                self._running[user] = self._running.get(user, 0) + 1
+                self._stats["admitted"] += 1
+                return
+            depth = len(queue) if queue else 0
+            if depth >= limits["per_user_queue"] or sum(map(len, self._waiting.values())) >= limits["queue_limit"]:
+                self._stats["rejected"] += 1
+                raise self._reject(user, self._position(user, depth), limits, waited=False)
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiting.setdefault(user, deque()).append(waiter)
+            self._stats["queued"] += 1
+        try:
+            await asyncio.wait_for(waiter, limits["max_wait"])
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                queue = self._waiting.get(user)
+                if queue is None or waiter not in queue:
+                    # Granted just as the wait ended: run after all, or give the slot back
+                    if isinstance(e, asyncio.CancelledError):
+                        self._release(user, None, limits)
+                        raise
+                    return
+                position = self._position(user, queue.index(waiter))
+                queue.remove(waiter)
+                if not queue:
+                    del self._waiting[user]
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self._stats["timed_out"] += 1
+                raise self._reject(user, position, limits, waited=True) from None
+
+    def _release(self, user: str, elapsed: float | None, limits: dict):
+        if self._running.get(user, 0) <= 1:
+            self._running.pop(user, None)
+        else:
+            self._running[user] -= 1
+        if elapsed is not None:
+            self._service += SERVICE_EWMA * (elapsed - self._service)
+        self._dispatch(limits)
+
+    def release(self, user: str, elapsed: float = None):
+        """Give back `user`'s slot; `elapsed` (seconds it ran) feeds the Retry-After estimate."""
+        limits = self.limits()
+        with self._lock:
+            self._release(user, elapsed, limits)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "running":     sum(self._running.values()),
+                "waiting":     sum(map(len, self._waiting.values())),
+                "users":       {u: {"running": self._running.get(u, 0), "waiting": len(self._waiting.get(u, ()))}
+                                for u in dict.fromkeys([*self._running, *self._waiting])},
+                "service_sec": round(self._service, 2),
+                "limits":      self.limits(),
+            }
+
+
+controller = AdmissionController()
@@ -2,26 +2,378 @@
 ADO REST API client — create, update, delete work items with parent linking.
 Supports Feature → Product Backlog Item → Task hierarchy.
 """
+import base64
+import hashlib
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote
 import requests
+from requests.adapters import HTTPAdapter
 from rich.console import Console
 
+import breaker as breaker_module
+import cache as cache_module
+import identities
+import metadata
+from ratelimit import RateLimiter
+from singleflight import SingleFlight
+from search_index import SearchIndex, doc_from_item
+from workitem import FIELD_REFS, WorkItem, normalize
+
 console = Console()
 
+# Shared by every ADOClient in the process, so concurrent API requests (each with
+# its own client) and CLI threads coalesce identical reads.
+_read_flight = SingleFlight()
+
+
+def read_coalescing_stats() -> dict:
+    """Counters for coalesced GET/WIQL reads — `shared` is the number of ADO calls saved."""
+    return _read_flight.stats()
+
+# Default projections per listing (what the UI showed before `fields=` existed)
+CHILD_FIELDS   = ["id", "rev", "type", "title", "state", "assigned_to", "area_path", "iteration_path", "tags", "parent_id"]
+FEATURE_FIELDS = ["id", "rev", "title", "state", "created_date", "assigned_to", "assigned_to_name",
+                  "area_path", "iteration_path", "tags", "ado_url"]
+ITEM_FIELDS    = CHILD_FIELDS
+TREE_FIELDS    = ["id", "url", "type", "title", "description", "effort", "state", "assigned_to",
+                  "area_path", "iteration_path", "parent_id", "rev"]
+
+BATCH_SIZE = 200  # ADO limit for workitems?ids=
+
+# (connect, read) timeouts in seconds per endpoint class. WIQL and writes can
+# legitimately take longer than item reads; nothing waits forever.
+TIMEOUTS = {
+    "read":  (3.05, 15),
+    "query": (3.05, 30),
+    "write": (3.05, 30),
+}
+
+
+def _endpoint_class(method: str, url: str) -> str:
+    if "/wiql" in url:
+        return "query"
+    return "read" if method.upper() == "GET" else "write"
+
+# Sort keys accepted by list_features → WIQL ORDER BY field
+FEATURE_SORTS = {
+    "created_date": "System.CreatedDate",
+    "changed_date": "System.ChangedDate",
+    "title":        "System.Title",
+    "state":        "System.State",
+    "id":           "System.Id",
+}
+QUERY_SORTS = {**FEATURE_SORTS, "type": "System.WorkItemType"}
+
+# Structured filters accepted by ADOClient.query → WIQL (see _query_clauses)
+QUERY_FILTERS = ("type", "state", "tags", "area_path", "iteration_path", "assigned_to",
+                 "parent_id", "changed_since", "title", "include_removed")
+QUERY_LIMIT_MAX = 20000  # ADO caps a WIQL result at 20k IDs
+QUERY_WORKERS   = 4      # concurrent 200-ID hydration requests per query
+
+
+def is_transient(status: int | None) -> bool:
+    """Whether a failed write is worth retrying: no answer, a timeout or throttle, or a 5xx.
+    Any other 4xx (validation, unknown field, missing item) fails the same way every time.
+    """
+    return status is None or status in (408, 429) or status >= 500
+
+
+class ADOError(Exception):
+    """ADO answered a request with an error status."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_fields(spec: str | None, default: list[str]) -> list[str]:
+    """Turn a comma-separated `fields=` value into response keys.
+    `id` and `rev` are always kept (rev feeds ETags). Raises ValueError on unknown keys.
+    """
+    if not spec:
+        keys = list(default)
+    else:
+        keys = [k.strip() for k in spec.split(",") if k.strip()]
+        unknown = [k for k in keys if k not in FIELD_REFS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(FIELD_REFS)}")
+    for k in ("rev", "id"):
+        if k not in keys:
+            keys.insert(0, k)
+    return keys
+
+
+def _id_from_url(url: str) -> int | None:
+    tail = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _same_value(ref: str, current, wanted) -> bool:
+    """Compare a current ADO field value with a requested one the way ADO treats them."""
+    if isinstance(current, dict):  # identity fields
+        current = current.get("uniqueName") or current.get("displayName") or ""
+    if current is None:
+        current = ""
+    if ref == "System.Tags":
+        norm = lambda v: sorted({t.strip().lower() for t in str(v).split(";") if t.strip()})
+        return norm(current) == norm(wanted)
+    if isinstance(wanted, str):
+        return str(current).strip().lower() == wanted.strip().lower()
+    return current == wanted
+
+
+def _wiql_str(value) -> str:
+    """Quote a value as a WIQL string literal (single quotes doubled)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _wiql_date(value: str) -> str:
+    try:
+        return _wiql_str(datetime.strptime(value.strip(), "%Y-%m-%d").strftime("%Y-%m-%d"))
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def _feature_filter_clauses(filters: dict) -> list[str]:
+    """Build WIQL clauses for list_features filters. Every value is quoted, never interpolated raw."""
+    clauses = []
+    states = filters.get("state")
+    if states:
+        states = [s.strip() for s in (states.split(",") if isinstance(states, str) else states) if s.strip()]
+        clauses.append(f"[System.State] IN ({', '.join(_wiql_str(s) for s in states)})")
+    if filters.get("assigned_to"):
+        clauses.append(f"[System.AssignedTo] = {_wiql_str(filters['assigned_to'])}")
+    if filters.get("area_path"):
+        clauses.append(f"[System.AreaPath] UNDER {_wiql_str(filters['area_path'])}")
+    if filters.get("iteration_path"):
+        clauses.append(f"[System.IterationPath] UNDER {_wiql_str(filters['iteration_path'])}")
+    if filters.get("created_from"):
+        clauses.append(f"[System.CreatedDate] >= {_wiql_date(filters['created_from'])}")
+    if filters.get("created_to"):
+        clauses.append(f"[System.CreatedDate] <= {_wiql_date(filters['created_to'])}")
+    if filters.get("title"):
+        clauses.append(f"[System.Title] CONTAINS {_wiql_str(filters['title'])}")
+    return clauses
+
+
+def _as_list(value) -> list:
+    """A filter value given as a list or a comma-separated string → list of non-empty values."""
+    if value is None:
+        return []
+    if isinstance(value, (str, int)):
+        value = str(value).split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def _wiql_in(field: str, values: list) -> str:
+    return f"[{field}] IN ({', '.join(_wiql_str(v) for v in values)})"
+
+
+def _wiql_since(value: str) -> tuple[str, bool]:
+    """YYYY-MM-DD (day precision) or an ISO datetime (UTC, needs timePrecision).
+    Returns (literal, needs_time_precision).
+    """
+    value = str(value).strip()
+    try:
+        return _wiql_str(datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")), False
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid changed_since '{value}', expected YYYY-MM-DD or an ISO datetime")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return _wiql_str(dt.strftime("%Y-%m-%dT%H:%M:%SZ")), True
+
+
+def _query_clauses(filters: dict) -> tuple[list[str], bool]:
+    """Build WIQL clauses for a structured query filter. Values are always quoted
+    (or validated as integers), never interpolated raw. Multiple values of one
+    filter are OR-ed (IN), except tags, which must all be present.
+    Returns (clauses, needs_time_precision). Raises ValueError on bad filters.
+    """
+    unknown = [k for k in filters if k not in QUERY_FILTERS]
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(unknown)}. Allowed: {', '.join(QUERY_FILTERS)}")
+    clauses, precise = [], False
+    if _as_list(filters.get("type")):
+        clauses.append(_wiql_in("System.WorkItemType", _as_list(filters["type"])))
+    if _as_list(filters.get("state")):
+        clauses.append(_wiql_in("System.State", _as_list(filters["state"])))
+    for tag in _as_list(filters.get("tags")):
+        clauses.append(f"[System.Tags] CONTAINS {_wiql_str(tag)}")
+    if filters.get("area_path"):
+        clauses.append(f"[System.AreaPath] UNDER {_wiql_str(filters['area_path'])}")
+    if filters.get("iteration_path"):
+        clauses.append(f"[System.IterationPath] UNDER {_wiql_str(filters['iteration_path'])}")
+    if filters.get("assigned_to"):
+        clauses.append(f"[System.AssignedTo] = {_wiql_str(filters['assigned_to'])}")
+    if filters.get("title"):
+        clauses.append(f"[System.Title] CONTAINS {_wiql_str(filters['title'])}")
+    parents = _as_list(filters.get("parent_id"))
+    if parents:
+        if not all(p.isdigit() for p in parents):
+            raise ValueError("parent_id must be work item IDs")
+        clauses.append(f"[System.Parent] IN ({', '.join(parents)})")
+    if filters.get("changed_since"):
+        literal, precise = _wiql_since(filters["changed_since"])
+        clauses.append(f"[System.ChangedDate] >= {literal}")
+    if not filters.get("include_removed"):
+        clauses.append("[System.State] <> 'Removed'")
+    return clauses, precise
+
+
+def _encode_cursor(last_id: int, offset: int, digest: str) -> str:
+    raw = json.dumps({"a": last_id, "o": offset, "q": digest}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, digest: str, ids: list[int]) -> int:
+    """Resolve a cursor to a start offset. Anchors on the last item seen, so items
+    added or removed before it don't cause skips or repeats; falls back to the offset.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id, offset, query = data["a"], int(data["o"]), data["q"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if query != digest:
+        raise ValueError("Cursor does not match the current filters or sort")
+    try:
+        return ids.index(last_id) + 1
+    except ValueError:
+        return min(offset, len(ids))
+
+
+def _refs(keys: list[str]) -> str:
+    # Work item type is always fetched (tiny) so the search index can classify every row
+    refs = ["System.WorkItemType"] + [FIELD_REFS[k] for k in keys if FIELD_REFS.get(k)]
+    return ",".join(dict.fromkeys(refs))
+
+
+class _BudgetedSession(requests.Session):
+    """Session that takes a token from the profile's rate limiter before every request,
+    applies the endpoint-class timeout, and reports each outcome to the org's circuit breaker.
+    """
+
+    def __init__(self, limiter: RateLimiter = None, pool_size: int = 10,
+                 breaker: breaker_module.CircuitBreaker = None):
+        super().__init__()
+        self.limiter = limiter
+        self.breaker = breaker
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.breaker is not None:
+            self.breaker.before()  # fail fast while ADO is down, before spending budget
+        if self.limiter is not None:
+            self.limiter.acquire()
+        kwargs.setdefault("timeout", TIMEOUTS[_endpoint_class(method, url)])
+        start = time.monotonic()
+        try:
+            r = super().request(method, url, *args, **kwargs)
+        except requests.RequestException as e:
+            if self.breaker is not None:
+                self.breaker.record(time.monotonic() - start, f"{type(e).__name__}: {e}")
+            raise
+        if self.breaker is not None:
+            self.breaker.record(time.monotonic() - start, f"HTTP {r.status_code}" if r.status_code >= 500 else None)
+        return r
+
 
 class ADOClient:
-    def __init__(self, org_url: str, project: str, token: str):
+    def __init__(
+        self,
+        org_url: str,
+        project: str,
+        token: str,
+        index: SearchIndex = None,
+        limiter: RateLimiter = None,
+        pool_size: int = 10,
+    ):
         self.org_url   = org_url.rstrip("/")
         self.project   = project
         self.token     = token
+        self.index     = index  # optional local search index, fed by reads and writes
+        self.scope     = f"{self.org_url}/{self.project}"
         self.base_url  = f"{self.org_url}/{self.project}/_apis/wit"
-        self.session   = requests.Session()
+        self.breaker   = breaker_module.get(self.org_url, probe=self._probe)
+        self.session   = _BudgetedSession(limiter, pool_size, self.breaker)
         self.session.headers.update({
             "Authorization": f"Bearer {token}",
             "Accept": "application/json",
         })
 
+    def _probe(self) -> requests.Response:
+        """Cheap health check for the breaker: project metadata, outside the budget and breaker."""
+        url = f"{self.org_url}/_apis/projects/{quote(self.project)}?api-version=7.0"
+        return requests.get(url, headers={"Authorization": f"Bearer {self.token}"},
+                            timeout=breaker_module.PROBE_TIMEOUT)
+
+    def health(self) -> dict:
+        """Ping ADO now and report latency plus the breaker state."""
+        probe = self.breaker.ping()
+        return {"org": self.org_url, "project": self.project, "probe": probe, "breaker": self.breaker.stats()}
+
+    def _index_items(self, items: list):
+        """Feed raw ADO items into the search index. Index errors never fail an ADO call."""
+        if self.index is None or not items:
+            return
+        try:
+            self.index.upsert(self.scope, [doc_from_item(i) for i in items])
+        except Exception as e:
+            console.print(f"  [dim]search index update skipped: {e}[/dim]")
+
+    # ─── Listing cache ─────────────────────────────────────────
+
+    def _cache_key(self, *parts) -> tuple | None:
+        """Listing-cache key, or None when caching is off (no hook secret configured)."""
+        if not cache_module.enabled():
+            return None
+        return (self.scope, hashlib.sha256(self.token.encode()).hexdigest()[:16], *parts)
+
+    def _cache_get(self, key):
+        if key is None:
+            return None
+        hit = cache_module.listing_cache.get(key)
+        return None if hit is None else json.loads(hit)
+
+    def _cache_put(self, key, value, ids: list[int], kind: str, parent_id: int = None):
+        if key is not None:
+            # Stored serialised so callers can't mutate cached rows
+            cache_module.listing_cache.put(key, json.dumps(value), ids, kind, parent_id)
+
+    def _changed(self, event: str, item_id: int, item: dict = None, parent_ids: list = (), wit_type: str = None):
+        """Our own write — publish it like a service-hook event, so listings are dropped
+        (here and in other workers) and derived state such as rollups is patched.
+        """
+        cache_module.publish({
+            "event":      event,
+            "id":         item_id,
+            "item":       item,
+            "type":       wit_type,
+            "parent_ids": [p for p in parent_ids if p],
+            "scope":      self.scope,
+        })
+
+    def _read(self, method: str, url: str, payload: dict = None) -> requests.Response:
+        """Issue an idempotent read (GET or WIQL POST), sharing it with identical in-flight reads.
+        The key includes a hash of the token so different identities never share results.
+        """
+        scope = hashlib.sha256(self.token.encode()).hexdigest()[:16]
+        body  = json.dumps(payload, sort_keys=True) if payload is not None else ""
+        key   = (method, url, body, scope)
+        if method == "GET":
+            return _read_flight.do(key, lambda: self.session.get(url))
+        return _read_flight.do(key, lambda: self.session.post(url, json=payload))
+
     def _patch_headers(self):
         return {"Content-Type": "application/json-patch+json"}
 
@@ -74,29 +426,42 @@ class ADOClient:
         r = self.session.post(url, headers=self._patch_headers(), data=json.dumps(body))
         if r.status_code in (200, 201):
             item = r.json()
+            self._index_items([item])
+            self._changed("created", item["id"], item, [_id_from_url(parent_url or "")], wit_type)
             return {"id": item["id"], "url": item["url"], "type": wit_type, "title": title}
         else:
             console.print(f"  [red]ERROR creating '{title}': {r.status_code} — {r.text[:200]}[/red]")
             return None
 
     def update_work_item(self, item_id: int, fields: dict) -> bool:
+        return self._update_fields(item_id, fields) in (200, 201)
+
+    def _update_fields(self, item_id: int, fields: dict) -> int:
+        """PATCH fields onto an item; returns the HTTP status."""
         body = [{"op": "add", "path": f"/fields/{k}", "value": v}
                 for k, v in fields.items()]
         url  = f"{self.base_url}/workitems/{item_id}?api-version=7.0"
         r    = self.session.patch(url, headers=self._patch_headers(), data=json.dumps(body))
-        return r.status_code in (200, 201)
+        if r.status_code in (200, 201):
+            item = r.json()
+            self._index_items([item])
+            f = item.get("fields", {})
+            self._changed("updated", item_id, item, [f.get("System.Parent")], f.get("System.WorkItemType"))
+        return r.status_code
 
-    def set_parent(self, item_id: int, parent_id: int) -> tuple[bool, str]:
-        """Set or replace the parent link of a work item.
+    def set_parent(self, item_id: int, parent_id: int, parent_url: str = None) -> tuple[bool, str]:
+        """Set or replace the parent link of a work item. No-op if it is already the parent.
+        Pass parent_url to skip looking the parent up again (e.g. in bulk updates).
         Returns (success, error_message).
         """
-        parent = self.get_work_item(parent_id)
-        if not parent:
-            return False, f"Parent work item {parent_id} not found"
-        parent_url = parent["url"]
+        ok, err, _ = self._set_parent(item_id, parent_id, parent_url)
+        return ok, err
+
+    def _set_parent(self, item_id: int, parent_id: int, parent_url: str = None) -> tuple[bool, str, int | None]:
+        """set_parent, also returning the HTTP status of a failed PATCH (None otherwise)."""
         item = self.get_work_item(item_id)
         if not item:
-            return False, f"Work item {item_id} not found"
+            return False, f"Work item {item_id} not found", 404
 
         relations = item.get("relations") or []
         console.print(f"  [dim]set_parent: {item_id} has {len(relations)} relation(s)[/dim]")
@@ -105,6 +470,14 @@ class ADOClient:
             (i for i, r in enumerate(relations) if r.get("rel") == "System.LinkTypes.Hierarchy-Reverse"),
             None,
         )
+        if parent_idx is not None and _id_from_url(relations[parent_idx].get("url", "")) == parent_id:
+            return True, "", None
+
+        if not parent_url:
+            parent = self.get_work_item(parent_id)
+            if not parent:
+                return False, f"Parent work item {parent_id} not found", 404
+            parent_url = parent["url"]
         base_url = f"{self.base_url}/workitems/{item_id}?api-version=7.0"
 
         # Step 1: remove existing parent relation if present (separate PATCH)
@@ -114,7 +487,7 @@ class ADOClient:
             if r.status_code not in (200, 201):
                 msg = f"Failed to remove existing parent (HTTP {r.status_code}): {r.text[:300]}"
                 console.print(f"  [red]{msg}[/red]")
-                return False, msg
+                return False, msg, r.status_code
 
         # Step 2: add new parent relation (separate PATCH)
         add_ops = [{"op": "add", "path": "/relations/-", "value": {
@@ -126,12 +499,95 @@ class ADOClient:
         if r.status_code not in (200, 201):
             msg = f"Failed to add new parent (HTTP {r.status_code}): {r.text[:300]}"
             console.print(f"  [red]{msg}[/red]")
-            return False, msg
+            return False, msg, r.status_code
 
-        return True, ""
+        old_parent = _id_from_url(relations[parent_idx].get("url", "")) if parent_idx is not None else None
+        self._changed("updated", item_id, r.json(), [old_parent, parent_id], item.get("fields", {}).get("System.WorkItemType"))
+        return True, "", None
 
-    def get_children(self, parent_id: int) -> list:
+    def bulk_update(self, ids: list[int], fields: dict, parent_id: int = None, validate: bool = True) -> dict:
+        """Diff-first bulk update: batch-fetch current values, PATCH only the fields that
+        differ per item, and skip items that are already in the requested state.
+        With `validate`, the assignee is resolved to its identity once and every item is
+        checked against the cached process metadata (states, transitions from its
+        current state, paths, fields) before any write.
+        Returns {"changed": [{"id", "fields", "reparented"}], "unchanged": [ids], "failed": {id: error},
+        "transient": [ids]}; `transient` lists the failed items worth retrying (see is_transient).
+        """
+        summary = {"changed": [], "unchanged": [], "failed": {}, "transient": []}
+        if validate and fields.get("System.AssignedTo"):
+            try:
+                fields = {**fields, "System.AssignedTo": self.normalize_assignee(fields["System.AssignedTo"])}
+            except identities.IdentityError as e:
+                summary["failed"] = {item_id: str(e) for item_id in ids}
+                return summary
+        meta    = self.meta if validate and fields else None
+        unknown = [r for r in fields if meta is not None and meta.fields and r not in meta.fields]
+        if unknown:
+            summary["failed"] = {item_id: f"Unknown field(s): {', '.join(unknown)}" for item_id in ids}
+            return summary
+        refs    = ",".join(dict.fromkeys([*fields, "System.Parent", "System.WorkItemType", "System.State"]))
+        items   = self._fetch_batch(ids, refs)
+        if items is None:
+            for item_id in ids:
+                summary["failed"][item_id] = "Failed to fetch current values"
+            summary["transient"] = list(ids)
+            return summary
+        current = {i["id"]: i["fields"] for i in items}
+
+        parent_url = None
+        if parent_id:
+            parent = self.get_work_item(parent_id)
+            if not parent:
+                for item_id in ids:
+                    summary["failed"][item_id] = f"Parent work item {parent_id} not found"
+                return summary
+            parent_url = parent["url"]
+
+        if meta is not None:
+            for item_id in ids:
+                f = current.get(item_id)
+                if f is None:
+                    continue
+                problems = meta.check(f.get("System.WorkItemType", ""), fields, current_state=f.get("System.State"))
+                if problems:
+                    summary["failed"][item_id] = "; ".join(problems)
+
+        for item_id in ids:
+            if item_id in summary["failed"]:
+                continue
+            f = current.get(item_id)
+            if f is None:
+                summary["failed"][item_id] = f"Work item {item_id} not found"
+                continue
+            delta    = {k: v for k, v in fields.items() if not _same_value(k, f.get(k), v)}
+            reparent = bool(parent_id) and f.get("System.Parent") != parent_id
+            if not delta and not reparent:
+                summary["unchanged"].append(item_id)
+                continue
+            status = self._update_fields(item_id, delta) if delta else 200
+            if status not in (200, 201):
+                summary["failed"][item_id] = f"Failed to update fields (HTTP {status})"
+                if is_transient(status):
+                    summary["transient"].append(item_id)
+                continue
+            if reparent:
+                ok, err, status = self._set_parent(item_id, parent_id, parent_url=parent_url)
+                if not ok:
+                    summary["failed"][item_id] = err
+                    if is_transient(status):
+                        summary["transient"].append(item_id)
+                    continue
+            summary["changed"].append({"id": item_id, "fields": list(delta), "reparented": reparent})
+        return summary
+
+    def get_children(self, parent_id: int, fields: list[str] = None) -> list:
         """Query direct children via WIQL [System.Parent] — more reliable than parsing relations."""
+        keys = fields or CHILD_FIELDS
+        key  = self._cache_key("children", parent_id, tuple(keys))
+        hit  = self._cache_get(key)
+        if hit is not None:
+            return hit
         wiql = {
             "query": (
                 f"SELECT [System.Id] FROM WorkItems "
@@ -141,105 +597,316 @@ class ADOClient:
             )
         }
         url = f"{self.org_url}/{self.project}/_apis/wit/wiql?api-version=7.0"
-        r = self.session.post(url, json=wiql)
+        r = self._read("POST", url, wiql)
         if r.status_code != 200:
             console.print(f"  [red]get_children WIQL failed: {r.status_code} — {r.text[:200]}[/red]")
             return []
 
         work_items = r.json().get("workItems", [])
         if not work_items:
+            self._cache_put(key, [], [], "children", parent_id)
             return []
 
-        ids    = ",".join(str(w["id"]) for w in work_items[:200])
-        fields = "System.Id,System.WorkItemType,System.Title,System.State,System.AssignedTo,System.AreaPath,System.IterationPath,System.Tags,System.Parent"
-        r2 = self.session.get(
-            f"{self.org_url}/{self.project}/_apis/wit/workitems"
-            f"?ids={ids}&fields={fields}&api-version=7.0"
-        )
-        if r2.status_code != 200:
-            console.print(f"  [red]get_children batch fetch failed: {r2.status_code}[/red]")
+        items = self._fetch_items([w["id"] for w in work_items], _refs(keys))
+        if items is None:
+            console.print(f"  [red]get_children batch fetch failed[/red]")
             return []
 
-        results = []
-        for item in r2.json().get("value", []):
-            f = item["fields"]
-            assignee = f.get("System.AssignedTo", "")
-            if isinstance(assignee, dict):
-                assignee = assignee.get("uniqueName", "")
-            results.append({
-                "id":             item["id"],
-                "type":           f.get("System.WorkItemType", ""),
-                "title":          f.get("System.Title", ""),
-                "state":          f.get("System.State", ""),
-                "assigned_to":    assignee,
-                "area_path":      f.get("System.AreaPath", ""),
-                "iteration_path": f.get("System.IterationPath", ""),
-                "tags":           f.get("System.Tags", ""),
-                "parent_id":      f.get("System.Parent"),
-            })
+        results = [w.to_dict(keys) for w in items]
+        self._cache_put(key, results, [w.id for w in items], "children", parent_id)
         return results
 
     def delete_work_item(self, item_id: int) -> bool:
+        return self._delete(item_id) in (200, 204)
+
+    def _delete(self, item_id: int) -> int:
+        """DELETE an item; returns the HTTP status."""
         url = f"{self.base_url}/workitems/{item_id}?api-version=7.0"
         r   = self.session.delete(url)
-        return r.status_code in (200, 204)
+        if r.status_code in (200, 204):
+            if self.index is not None:
+                self.index.remove([item_id], self.scope)
+            self._changed("deleted", item_id)
+        return r.status_code
 
     def get_work_item(self, item_id: int) -> dict | None:
         url = f"{self.base_url}/workitems/{item_id}?api-version=7.0&$expand=relations"
-        r   = self.session.get(url)
+        r   = self._read("GET", url)
         if r.status_code == 200:
-            return r.json()
+            item = r.json()
+            self._index_items([item])
+            return item
         return None
 
-    def get_features_by_tag(self, tag: str = "claudeADO") -> list:
+    def get_features_by_tag(self, tag: str = "claudeADO", fields: list[str] = None) -> list:
         """Query all Features tagged with the app tag via WIQL."""
-        wiql = {
-            "query": (
-                "SELECT [System.Id] FROM WorkItems "
-                "WHERE [System.WorkItemType] = 'Feature' "
-                f"AND [System.Tags] CONTAINS '{tag}' "
-                "AND [System.State] <> 'Removed' "
-                "ORDER BY [System.CreatedDate] DESC"
-            )
-        }
+        return self.list_features(tag, fields=fields)["features"]
+
+    def list_features(
+        self,
+        tag: str = "claudeADO",
+        fields: list[str] = None,
+        filters: dict = None,
+        sort: str = "created_date",
+        descending: bool = True,
+        limit: int = None,
+        cursor: str = None,
+    ) -> dict:
+        """Filtered, sorted, optionally paged listing of tagged Features.
+        Filters and sort order are pushed into WIQL; only the requested page is hydrated.
+        Returns {"features", "total", "next_cursor"}. Raises ValueError on bad filters/cursor.
+        """
+        if sort not in FEATURE_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Allowed: {', '.join(FEATURE_SORTS)}")
+        direction = "DESC" if descending else "ASC"
+        clauses = [
+            "[System.WorkItemType] = 'Feature'",
+            f"[System.Tags] CONTAINS {_wiql_str(tag)}",
+            "[System.State] <> 'Removed'",
+            *_feature_filter_clauses(filters or {}),
+        ]
+        query = (
+            "SELECT [System.Id] FROM WorkItems "
+            f"WHERE {' AND '.join(clauses)} "
+            f"ORDER BY [{FEATURE_SORTS[sort]}] {direction}, [System.Id] {direction}"
+        )
+        keys = fields or FEATURE_FIELDS
+        key  = self._cache_key("features", query, limit, cursor, tuple(keys))
+        hit  = self._cache_get(key)
+        if hit is not None:
+            return hit
+        empty = {"features": [], "total": 0, "next_cursor": None}
         url = f"{self.org_url}/{self.project}/_apis/wit/wiql?api-version=7.0"
-        r   = self.session.post(url, json=wiql)
+        r   = self._read("POST", url, {"query": query})
         if r.status_code != 200:
-            return []
+            return empty
 
-        work_items = r.json().get("workItems", [])
-        if not work_items:
-            return []
+        ids = [w["id"] for w in r.json().get("workItems", [])]
+        digest = hashlib.sha1(query.encode()).hexdigest()[:12]
+        start  = _decode_cursor(cursor, digest, ids) if cursor else 0
+        page   = ids[start:start + limit] if limit else ids[start:]
+        next_cursor = None
+        if limit and page and start + len(page) < len(ids):
+            next_cursor = _encode_cursor(page[-1], start + len(page), digest)
+        if not page:
+            result = {**empty, "total": len(ids)}
+            self._cache_put(key, result, [], "features")
+            return result
+
+        items = self._fetch_items(page, _refs(keys))
+        if items is None:
+            return empty
+
+        results = [w.to_dict(keys) for w in items]
+        result = {"features": results, "total": len(ids), "next_cursor": next_cursor}
+        self._cache_put(key, result, page, "features")
+        return result
 
-        # Batch-fetch field details (max 200 at a time)
-        ids    = ",".join(str(w["id"]) for w in work_items[:200])
-        fields = "System.Id,System.Title,System.State,System.CreatedDate,System.AssignedTo,System.AreaPath,System.IterationPath,System.Tags"
-        r2     = self.session.get(
+    def _fetch_chunks(self, ids: list[int], fields: str):
+        """Yield raw work items per chunk of 200 (order of `ids` kept, missing IDs omitted).
+        Yields None and stops if a chunk fails.
+        """
+        for i in range(0, len(ids), BATCH_SIZE):
+            items = self._fetch_chunk(ids[i:i + BATCH_SIZE], fields)
+            yield items
+            if items is None:
+                return
+
+    def _fetch_chunk(self, ids: list[int], fields: str) -> list | None:
+        """One workitems?ids= request (≤200 IDs). None if ADO fails."""
+        r = self._read(
+            "GET",
             f"{self.org_url}/{self.project}/_apis/wit/workitems"
-            f"?ids={ids}&fields={fields}&api-version=7.0"
+            f"?ids={','.join(str(x) for x in ids)}&fields={fields}&errorPolicy=omit&api-version=7.0",
         )
-        if r2.status_code != 200:
-            return []
+        if r.status_code != 200:
+            return None
+        items = [v for v in r.json().get("value", []) if v]
+        self._index_items(items)
+        return items
 
-        results = []
-        for item in r2.json().get("value", []):
-            f        = item["fields"]
-            assignee = f.get("System.AssignedTo", "")
-            if isinstance(assignee, dict):
-                assignee = assignee.get("displayName", "")
-            created  = f.get("System.CreatedDate", "")
-            results.append({
-                "id":             item["id"],
-                "title":          f.get("System.Title", ""),
-                "state":          f.get("System.State", ""),
-                "created_date":   created[:10] if created else "",
-                "assigned_to":    assignee,
-                "area_path":      f.get("System.AreaPath", ""),
-                "iteration_path": f.get("System.IterationPath", ""),
-                "tags":           f.get("System.Tags", ""),
-                "ado_url":        f"{self.org_url}/{self.project}/_workitems/edit/{item['id']}",
-            })
-        return results
+    def _fetch_batch(self, ids: list[int], fields: str) -> list | None:
+        """Batch-fetch raw work items in chunks of 200. Returns None if any chunk fails."""
+        items = []
+        for chunk in self._fetch_chunks(ids, fields):
+            if chunk is None:
+                return None
+            items.extend(chunk)
+        return items
+
+    def _fetch_items(self, ids: list[int], fields: str) -> list[WorkItem] | None:
+        """Like _fetch_batch, but normalises each chunk to WorkItems as it arrives so
+        raw payloads don't pile up for large listings. None if any chunk fails.
+        """
+        items = []
+        for chunk in self._fetch_chunks(ids, fields):
+            if chunk is None:
+                return None
+            items.extend(normalize(chunk, self.org_url, self.project))
+        return items
+
+    def get_work_items(self, ids: list[int], fields: list[str] = None) -> list:
+        """Batch-fetch work items as dicts (projected to `fields`), one request per 200 IDs.
+        Parent ID comes from System.Parent, so no per-item relations fetch is needed.
+        """
+        keys  = fields or ITEM_FIELDS
+        items = self._fetch_items(ids, _refs(keys))
+        return [] if items is None else [w.to_dict(keys) for w in items]
+
+    # ─── Process metadata ─────────────────────────────────────
+
+    def fetch_process_metadata(self) -> tuple[list, list, list] | None:
+        """Raw (work item types, field definitions, classification node roots). None on ADO errors."""
+        out = []
+        for path in ("workitemtypes?", "fields?", f"classificationnodes?$depth={metadata.CLASS_DEPTH}&"):
+            r = self._read("GET", f"{self.base_url}/{path}api-version=7.0")
+            if r.status_code != 200:
+                console.print(f"  [dim]process metadata unavailable: {path.split('?')[0]} {r.status_code}[/dim]")
+                return None
+            out.append(r.json().get("value", []))
+        return tuple(out)
+
+    @property
+    def meta(self) -> "metadata.ProcessMetadata | None":
+        """Cached process metadata for this project (None if it can't be loaded)."""
+        return metadata.cache.get(self)
+
+    # ─── Identities ───────────────────────────────────────────
+
+    def lookup_identities(self, query: str, max_results: int = 10) -> list[dict] | None:
+        """Users matching an email or (partial) display name, via the org's IdentityPicker.
+        Returns [{unique_name, display_name, descriptor, id}], or None if the lookup fails.
+        """
+        body = {
+            "query":           query,
+            "identityTypes":   ["user"],
+            "operationScopes": ["ims", "source"],
+            "options":         {"MinResults": 1, "MaxResults": max_results},
+            "properties":      ["DisplayName", "Mail", "SignInAddress", "SubjectDescriptor", "LocalId"],
+        }
+        url = f"{self.org_url}/_apis/IdentityPicker/Identities?api-version=7.1-preview.1"
+        r   = self._read("POST", url, body)
+        if r.status_code != 200:
+            console.print(f"  [dim]identity lookup unavailable: {r.status_code}[/dim]")
+            return None
+        return [identities.identity_from_picker(i)
+                for res in r.json().get("results", []) for i in res.get("identities") or []]
+
+    def normalize_assignee(self, value: str) -> str:
+        """Resolve an email or display name to the identity's unique name (cached).
+        Raises identities.IdentityError for unknown or ambiguous values.
+        """
+        return identities.cache.normalize(self, value)
+
+    # ─── Generic query ────────────────────────────────────────
+
+    def query_ids(self, filters: dict = None, sort: str = "id", descending: bool = False,
+                  limit: int = 1000) -> list[int]:
+        """Run a structured filter as one WIQL query; ADO does the filtering, sorting and limit.
+        Raises ValueError on bad filters, ADOError if the query fails.
+        """
+        if sort not in QUERY_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Allowed: {', '.join(QUERY_SORTS)}")
+        if not 1 <= limit <= QUERY_LIMIT_MAX:
+            raise ValueError(f"limit must be between 1 and {QUERY_LIMIT_MAX}")
+        clauses, precise = _query_clauses(filters or {})
+        direction = "DESC" if descending else "ASC"
+        query = (
+            "SELECT [System.Id] FROM WorkItems"
+            + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+            + f" ORDER BY [{QUERY_SORTS[sort]}] {direction}, [System.Id] {direction}"
+        )
+        url = f"{self.org_url}/{self.project}/_apis/wit/wiql?$top={limit}&api-version=7.0"
+        if precise:
+            url += "&timePrecision=true"
+        r = self._read("POST", url, {"query": query})
+        if r.status_code != 200:
+            raise ADOError(f"WIQL query failed: {r.status_code} — {r.text[:200]}", r.status_code)
+        return [w["id"] for w in r.json().get("workItems", [])][:limit]
+
+    def iter_items(self, ids: list[int], fields: list[str] = None, workers: int = QUERY_WORKERS):
+        """Hydrate IDs in 200-ID chunks, up to `workers` requests in flight, yielding one
+        list of projected dicts per chunk in ID order. Stopping early cancels the
+        remaining chunks. Raises ADOError if a chunk fails.
+        """
+        keys   = fields or ITEM_FIELDS
+        refs   = _refs(keys)
+        chunks = iter(range(0, len(ids), BATCH_SIZE))
+        window = []
+        pool   = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ado-hydrate")
+        try:
+            for i in chunks:
+                window.append(pool.submit(self._fetch_chunk, ids[i:i + BATCH_SIZE], refs))
+                if len(window) >= workers:
+                    break
+            while window:
+                items = window.pop(0).result()
+                nxt   = next(chunks, None)  # keep the window full while this chunk is consumed
+                if nxt is not None:
+                    window.append(pool.submit(self._fetch_chunk, ids[nxt:nxt + BATCH_SIZE], refs))
+                if items is None:
+                    raise ADOError("Work item batch fetch failed")
+                yield [w.to_dict(keys) for w in normalize(items, self.org_url, self.project)]
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def query(self, filters: dict = None, fields: list[str] = None, sort: str = "id",
+              descending: bool = False, limit: int = 1000) -> list[dict]:
+        """query_ids + iter_items, collected. Raises ValueError / ADOError."""
+        ids = self.query_ids(filters, sort, descending, limit)
+        return [item for chunk in self.iter_items(ids, fields) for item in chunk]
+
+    def get_feature_tree(self, feature_id: int) -> dict | None:
+        """Load a Feature with its PBIs and their Tasks in three calls (item, two WIQLs + batches).
+        Returns {"feature": node, "pbis": [node + "tasks": [node]]} where node carries
+        id, url, type, title, description, effort, state, parent_id and rev. None if not found.
+        """
+        trees = self.get_feature_trees([feature_id])
+        return None if trees is None else trees.get(feature_id)
+
+    def get_feature_trees(self, feature_ids: list[int]) -> dict | None:
+        """Load several Feature trees in the same three passes as one — the WIQL
+        `IN (...)` lists and batch fetches cover every Feature at once.
+        Returns {feature_id: tree} (missing Features omitted), or None on ADO errors.
+        """
+        refs = _refs(TREE_FIELDS)
+
+        def children_of(parent_ids: list[int]) -> list | None:
+            if not parent_ids:
+                return []
+            ids = []
+            url = f"{self.org_url}/{self.project}/_apis/wit/wiql?api-version=7.0"
+            for i in range(0, len(parent_ids), BATCH_SIZE):
+                in_list = ", ".join(str(p) for p in parent_ids[i:i + BATCH_SIZE])
+                r = self._read("POST", url, {"query": (
+                    f"SELECT [System.Id] FROM WorkItems "
+                    f"WHERE [System.Parent] IN ({in_list}) "
+                    f"AND [System.State] <> 'Removed' "
+                    f"ORDER BY [System.CreatedDate]"
+                )})
+                if r.status_code != 200:
+                    return None
+                ids.extend(w["id"] for w in r.json().get("workItems", []))
+            items = self._fetch_items(ids, refs)
+            return None if items is None else [w.to_dict(TREE_FIELDS) for w in items]
+
+        roots = self._fetch_items(list(feature_ids), refs)
+        if roots is None:
+            return None
+        if not roots:
+            return {}
+        pbis = children_of([r.id for r in roots])
+        if pbis is None:
+            return None
+        tasks = children_of([p["id"] for p in pbis])
+        if tasks is None:
+            return None
+        by_parent = {}
+        for node in pbis + tasks:
+            by_parent.setdefault(node["parent_id"], []).append(node)
+        for p in pbis:
+            p["tasks"] = by_parent.get(p["id"], [])
+        return {r.id: {"feature": r.to_dict(TREE_FIELDS), "pbis": by_parent.get(r.id, [])} for r in roots}
 
     def create_hierarchy(
         self,
@@ -249,68 +916,166 @@ class ADOClient:
         iteration_path: str = "",
         epic_url: str = None,
         delay: float = 0.2,
+        max_workers: int = 1,
+        on_progress=None,
+        cancel: threading.Event = None,
+        validate: bool = True,
     ) -> dict:
         """
         Creates a full Feature → PBIs → Tasks hierarchy from a parsed dict.
-        Returns a summary of all created IDs.
+        Returns a summary of all created IDs (in plan order).
+
+        PBIs are always created one after another in plan order, and so are the Tasks
+        under each PBI, since ADO orders a backlog by creation. With max_workers > 1
+        the Task runs of different PBIs overlap: each PBI's Tasks start on a worker as
+        soon as it exists while the next PBI is created (the rate limiter still bounds
+        ADO load). on_progress(kind, title, item_or_None, skipped) is called after every create
+        and replaces the per-item console lines; `skipped` counts the children that
+        will not be attempted because this create failed. A create that times out or
+        cannot reach ADO counts as failed; once the circuit breaker opens, the rest is
+        not attempted and results["error"] says why. Setting `cancel` — or Ctrl-C while
+        this runs — stops queued creates; in-flight ones finish and
+        results["cancelled"] is set. Either way the items created so far are returned.
+        With `validate`, the assignee is resolved to its
+        identity and the whole plan is checked against the cached process metadata
+        first; any problems are returned in results["invalid"] and nothing is created.
         """
-        results = {"feature": None, "pbis": []}
+        results  = {"feature": None, "pbis": [], "failed": [], "cancelled": False, "invalid": [], "error": None}
+        cancel   = cancel or threading.Event()
+        quiet    = on_progress is not None
+        sequential = max_workers <= 1
+        common   = {"assigned_to": assigned_to, "area_path": area_path, "iteration_path": iteration_path}
+
+        def report(kind: str, title: str, item: dict | None, skipped: int = 0):
+            if item is None:
+                results["failed"].append({"type": kind, "title": title})
+            if quiet:
+                on_progress(kind, title, item, skipped if item is None else 0)
+
+        def create(wit_type: str, title: str, **fields) -> dict | None:
+            """create_work_item, with a timeout or unreachable ADO counted as a failed item."""
+            try:
+                return self.create_work_item(wit_type=wit_type, title=title, **fields, **common)
+            except requests.RequestException as e:
+                console.print(f"  [red]ERROR creating '{title}': {e}[/red]")
+                if self.breaker is not None and self.breaker.state == "open":
+                    results["error"] = results["error"] or f"ADO unavailable, stopped: {e}"
+                    cancel.set()
+                return None
+
+        # --- Validate the whole plan before the first write ---
+        if validate and assigned_to:
+            try:
+                assigned_to = self.normalize_assignee(assigned_to)
+                common["assigned_to"] = assigned_to
+            except identities.IdentityError as e:
+                results["invalid"] = [str(e)]
+                console.print(f"[red]Plan rejected before any write: {e}[/red]")
+                return results
+        meta = self.meta if validate else None
+        if meta is not None:
+            shared = {"System.AssignedTo": assigned_to, "System.AreaPath": area_path,
+                      "System.IterationPath": iteration_path}
+            results["invalid"] = meta.check_hierarchy(hierarchy, shared)
+            if results["invalid"]:
+                console.print(f"[red]Plan rejected before any write — {len(results['invalid'])} problem(s):[/red]")
+                for p in results["invalid"]:
+                    console.print(f"  [red]✗ {p}[/red]")
+                return results
 
         # --- Feature ---
         feature_data = hierarchy.get("feature", {})
-        console.print(f"\n[bold]Creating Feature:[/bold] {feature_data['title']}")
-        feature = self.create_work_item(
-            wit_type="Feature",
-            title=feature_data["title"],
-            description=feature_data.get("description", ""),
-            assigned_to=assigned_to,
-            area_path=area_path,
-            iteration_path=iteration_path,
-            parent_url=epic_url,
-        )
+        if not quiet:
+            console.print(f"\n[bold]Creating Feature:[/bold] {feature_data['title']}")
+        try:
+            feature = create(
+                "Feature",
+                feature_data["title"],
+                description=feature_data.get("description", ""),
+                parent_url=epic_url,
+            )
+        except KeyboardInterrupt:
+            results["cancelled"] = True
+            return results
+        report("Feature", feature_data["title"], feature,
+               sum(1 + len(p.get("tasks", [])) for p in hierarchy.get("pbis", [])))
         if not feature:
             console.print("[red]Failed to create Feature. Aborting.[/red]")
             return results
-
-        console.print(f"  [green]OK Feature ID={feature['id']}[/green]")
+        if not quiet:
+            console.print(f"  [green]OK Feature ID={feature['id']}[/green]")
         results["feature"] = feature
 
-        # --- PBIs ---
-        for pbi_data in hierarchy.get("pbis", []):
-            console.print(f"\n[bold]  Creating PBI:[/bold] {pbi_data['title']}")
-            pbi = self.create_work_item(
-                wit_type="Product Backlog Item",
-                title=pbi_data["title"],
-                description=pbi_data.get("description", ""),
-                assigned_to=assigned_to,
-                area_path=area_path,
-                iteration_path=iteration_path,
-                parent_url=feature["url"],
-            )
-            if not pbi:
-                console.print(f"  [red]Skipping tasks for failed PBI.[/red]")
-                continue
+        pbis_data = hierarchy.get("pbis", [])
+        slots     = [None] * len(pbis_data)  # pbi_result per plan position
+        task_futs = []
+        # PBIs are created on this thread, so the pool only runs Task runs
+        pool      = None if sequential else ThreadPoolExecutor(max_workers=max(1, max_workers - 1),
+                                                               thread_name_prefix="ado-create")
 
-            console.print(f"    [green]OK PBI ID={pbi['id']}[/green]")
-            pbi_result = {"pbi": pbi, "tasks": []}
-
-            # --- Tasks ---
-            for task_data in pbi_data.get("tasks", []):
-                time.sleep(delay)
-                task = self.create_work_item(
-                    wit_type="Task",
-                    title=task_data["title"],
-                    assigned_to=assigned_to,
-                    area_path=area_path,
-                    iteration_path=iteration_path,
+        def create_tasks(pbi_result: dict, tasks: list):
+            for pos, task_data in enumerate(tasks):
+                if cancel.is_set():
+                    return
+                if sequential and delay:
+                    time.sleep(delay)
+                task = create(
+                    "Task",
+                    task_data["title"],
                     effort=task_data.get("effort"),
-                    parent_url=pbi["url"],
+                    parent_url=pbi_result["pbi"]["url"],
                 )
+                report("Task", task_data["title"], task)
                 if task:
-                    console.print(f"      [green]OK Task ID={task['id']}[/green] [{task_data.get('effort', '?')}d] {task_data['title']}")
-                    pbi_result["tasks"].append(task)
+                    if not quiet:
+                        console.print(f"      [green]OK Task ID={task['id']}[/green] [{task_data.get('effort', '?')}d] {task_data['title']}")
+                    pbi_result["tasks"][pos] = task
+
+        def create_pbi(i: int, pbi_data: dict):
+            if not quiet:
+                console.print(f"\n[bold]  Creating PBI:[/bold] {pbi_data['title']}")
+            pbi = create(
+                "Product Backlog Item",
+                pbi_data["title"],
+                description=pbi_data.get("description", ""),
+                parent_url=feature["url"],
+            )
+            report("Product Backlog Item", pbi_data["title"], pbi, len(pbi_data.get("tasks", [])))
+            if not pbi:
+                if not quiet:
+                    console.print(f"  [red]Skipping tasks for failed PBI.[/red]")
+                return
+            if not quiet:
+                console.print(f"    [green]OK PBI ID={pbi['id']}[/green]")
+            tasks = pbi_data.get("tasks", [])
+            slots[i] = {"pbi": pbi, "tasks": [None] * len(tasks)}
+            if sequential:
+                create_tasks(slots[i], tasks)
+                if delay:
+                    time.sleep(delay)
+            else:
+                task_futs.append(pool.submit(create_tasks, slots[i], tasks))
 
-            results["pbis"].append(pbi_result)
-            time.sleep(delay)
+        try:
+            for i, pbi_data in enumerate(pbis_data):
+                if cancel.is_set():
+                    break
+                create_pbi(i, pbi_data)
+            for f in task_futs:
+                f.result()
+        except KeyboardInterrupt:
+            cancel.set()
+        finally:
+            # Drop queued work, let in-flight requests finish (bounded by the ADO timeouts)
+            while pool is not None:
+                try:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    pool = None
+                except KeyboardInterrupt:
+                    cancel.set()  # a second Ctrl-C while waiting: keep waiting, keep the results
 
+        results["cancelled"] = cancel.is_set()
+        for slot in slots:
+            if slot is not None:
+                results["pbis"].append({"pbi": slot["pbi"], "tasks": [t for t in slot["tasks"] if t]})
         return results
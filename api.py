@@ -1,25 +1,171 @@
 """
 FastAPI backend — exposes ADO operations as REST endpoints for the React UI.
 """
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+import requests
 from typing import Optional, List, Dict, Any
 
+try:
+    from brotli_asgi import BrotliMiddleware as CompressionMiddleware  # br, falls back to gzip
+except ImportError:
+    from fastapi.middleware.gzip import GZipMiddleware as CompressionMiddleware
+
+try:
+    import orjson
+
+    class FastJSONResponse(JSONResponse):
+        """orjson-rendered JSON — several times faster on large listings."""
+        def render(self, content) -> bytes:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    FastJSONResponse = JSONResponse
+
+import admission
+import breaker as breaker_module
+import cache as cache_module
 import config as cfg_module
-import auth as auth_module
-from ado_client import ADOClient
+import export as export_module
+import hooks
+import identities
+import metadata
+import profiles as profiles_module
+import reconcile
+import write_queue
+from ado_client import ADOClient, ADOError, read_coalescing_stats, parse_fields, CHILD_FIELDS, FEATURE_FIELDS, ITEM_FIELDS
+from workitem import WorkItem
+from search_index import get_index
+from rollup import rollups
+import llm_parser
+import outline_parser
 from llm_parser import parse_text_to_hierarchy, get_api_key
 
-app = FastAPI(title="claudeADO API", version="1.0.0")
-
+@asynccontextmanager
+async def lifespan(app):
+    write_queue.resume()  # keep flushing writes queued before a restart
+    yield
+
+app = FastAPI(title="claudeADO API", version="1.0.0", default_response_class=FastJSONResponse, lifespan=lifespan)
+
+# Expensive endpoints (parse, create, bulk writes) wait for a slot or get a fast 429 — see admission.py.
+# Users are told apart by profile, else client address; `X-User` only counts from a trusted proxy.
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in admission.ENDPOINTS:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        user    = admission.user_key((scope.get("client") or ("",))[0],
+                                     headers.get(b"x-user", b"").decode().strip(), _profile.get())
+        try:
+            received = await self._admit(user, receive)
+        except admission.AdmissionRejected as e:
+            response = JSONResponse({"detail": str(e), "queue_position": e.position, "retry_after": e.retry_after},
+                                    status_code=429, headers={"Retry-After": str(e.retry_after)})
+            return await response(scope, receive, send)
+        if received is None:
+            return  # client went away while queued; its place has been given up
+
+        async def replay():
+            return received.pop(0) if received else await receive()
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            admission.controller.release(user, time.monotonic() - start)
+
+    @staticmethod
+    async def _admit(user: str, receive) -> list | None:
+        """Wait for a slot while watching the connection, so a client that disconnects
+        while queued frees its place at once instead of holding it until max_wait.
+        Returns the messages read meanwhile (replayed to the app), or None if the client left.
+        """
+        received, gone = [], False
+        acquire = asyncio.ensure_future(admission.controller.acquire(user))
+
+        async def watch():
+            nonlocal gone
+            while True:
+                message = await receive()
+                received.append(message)
+                if message["type"] == "http.disconnect":
+                    gone = True
+                    acquire.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await acquire
+        except asyncio.CancelledError:
+            if not gone:
+                raise
+            return None
+        finally:
+            watcher.cancel()
+        return received
+
+app.add_middleware(AdmissionMiddleware)  # added first = innermost, so its 429s still get CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "X-Parser"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# ADO unavailable → a clear 503/504 instead of a generic 500 (or a thread stuck on a dead socket)
+@app.exception_handler(breaker_module.CircuitOpenError)
+async def ado_circuit_open(request: Request, exc: breaker_module.CircuitOpenError):
+    return JSONResponse({"detail": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(int(exc.retry_after) + 1)})
+
+@app.exception_handler(requests.Timeout)
+async def ado_timeout(request: Request, exc: requests.Timeout):
+    return JSONResponse({"detail": f"ADO did not respond in time: {exc}"}, status_code=504)
+
+@app.exception_handler(requests.ConnectionError)
+async def ado_unreachable(request: Request, exc: requests.ConnectionError):
+    return JSONResponse({"detail": f"Could not reach ADO: {exc}"}, status_code=503)
+
+# Connection profile for the current request: `X-ADO-Profile` header or `?profile=`
+_profile: ContextVar[Optional[str]] = ContextVar("ado_profile", default=None)
+
+class ProfileMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = dict(scope["headers"]).get(b"x-ado-profile", b"").decode()
+        if not name:
+            name = parse_qs(scope.get("query_string", b"").decode()).get("profile", [""])[0]
+        token = _profile.set(name or None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profile.reset(token)
+
+app.add_middleware(ProfileMiddleware)
 
 # ─── Pydantic models ───────────────────────────────────────────
 
@@ -31,8 +177,19 @@ class ConfigIn(BaseModel):
     iteration_path: str = ""
     azureauth_path: str = ""
 
+class ProfileIn(ConfigIn):
+    rate_limit: Optional[float] = None
+    rate_burst: Optional[int] = None
+
 class ParseRequest(BaseModel):
     text: str
+    # Optional overrides of the size-based routing in config.PARSE_ROUTING
+    tier: Optional[str] = None
+    model: Optional[str] = None
+    max_tokens: Optional[int] = None
+    latency_target: Optional[float] = None
+    # "auto" tries the local outline parser first; "outline" / "claude" force one
+    parser: Optional[str] = None
 
 class CreateHierarchyRequest(BaseModel):
     hierarchy: Dict[str, Any]
@@ -58,6 +215,14 @@ class UpdateRequest(BaseModel):
     area_path: Optional[str] = None
     iteration_path: Optional[str] = None
 
+class ReconcileRequest(BaseModel):
+    feature_id: int
+    hierarchy: Dict[str, Any]
+    assigned_to: str = ""
+    area_path: str = ""
+    iteration_path: str = ""
+    delete_removed: bool = False  # removing items missing from the plan is opt-in
+
 class DeleteRequest(BaseModel):
     ids: List[int]
 
@@ -69,45 +234,258 @@ class BulkUpdateRequest(BaseModel):
     iteration_path: Optional[str] = None
     tags: Optional[str] = None
     parent_id: Optional[int] = None
+    diff: bool = True  # fetch current values first and skip no-op writes
+
+class QueryFilter(BaseModel):
+    type: Optional[List[str]] = None
+    state: Optional[List[str]] = None
+    tags: Optional[List[str]] = None  # all must be present
+    area_path: Optional[str] = None  # UNDER
+    iteration_path: Optional[str] = None  # UNDER
+    assigned_to: Optional[str] = None
+    title: Optional[str] = None  # CONTAINS
+    parent_id: Optional[List[int]] = None
+    changed_since: Optional[str] = None  # YYYY-MM-DD or ISO datetime
+    include_removed: bool = False
+
+class QueryRequest(BaseModel):
+    filter: QueryFilter = QueryFilter()
+    fields: Optional[str] = None  # comma-separated response keys, as in `fields=` elsewhere
+    sort: str = "id"
+    descending: bool = False
+    limit: int = 1000
 
 # ─── Helpers ───────────────────────────────────────────────────
 
+def _cfg() -> dict:
+    """Settings of the profile selected for this request."""
+    try:
+        return profiles_module.resolve(_profile.get())
+    except profiles_module.ProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 def _get_client() -> ADOClient:
-    cfg = cfg_module.load()
-    if not cfg.get("ado_org_url") or not cfg.get("ado_project"):
-        raise HTTPException(status_code=400, detail="ADO not configured. Please save settings first.")
-    token = auth_module.get_token(cfg.get("azureauth_path", ""))
-    return ADOClient(cfg["ado_org_url"], cfg["ado_project"], token)
+    try:
+        return profiles_module.get_client(_profile.get())
+    except profiles_module.ProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _fields(spec: Optional[str], default: list) -> list:
+    try:
+        return parse_fields(spec, default)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _etag_response(request: Request, payload: dict, revs: list, fields: list) -> Response:
+    """Return payload with a revision-based ETag, or an empty 304 if the client already has it.
+    The tag covers item IDs, revisions and the projection, so any edit, add or remove changes it.
+    """
+    digest = hashlib.sha1(json.dumps([revs, fields], separators=(",", ":")).encode()).hexdigest()[:20]
+    etag   = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(payload, headers=headers)
+
+def _write_behind(request: Request) -> bool:
+    """Queue this mutation instead of applying it inline: CLAUDEADO_WRITE_BEHIND=1, or `Prefer: respond-async`."""
+    return write_queue.enabled() or "respond-async" in request.headers.get("prefer", "").lower()
+
+def _enqueue(kind: str, ids: list[int], fields: dict = None, parent_id: int = None) -> dict:
+    """Record a mutation in the write-behind queue. Returns {item_id: op_id}."""
+    profile = _cfg()["name"]  # pin the profile now; the active one may change before the flush
+    return write_queue.get_queue().enqueue(profile, kind, ids, fields, parent_id)
+
+def _queued(op_ids: dict, **payload) -> Response:
+    return FastJSONResponse(
+        {"status": "queued", "op_ids": {str(i): op for i, op in op_ids.items()}, **payload},
+        status_code=202, headers={"Preference-Applied": "respond-async"},
+    )
 
 # ─── Config ────────────────────────────────────────────────────
 
 @app.get("/api/config")
 def get_config():
-    return cfg_module.load()
+    try:
+        return cfg_module.get_profile(_profile.get())
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown profile '{_profile.get()}'")
 
 @app.post("/api/config")
 def save_config(body: ConfigIn):
-    cfg_module.save(body.model_dump())
-    auth_module.clear_cache()
+    name = _profile.get() or cfg_module.load().get("active_profile") or cfg_module.DEFAULT_PROFILE
+    cfg_module.save_profile(name, body.model_dump())
+    profiles_module.reset(name)
     return {"status": "ok"}
 
+# ─── Profiles ──────────────────────────────────────────────────
+
+@app.get("/api/profiles")
+def list_profiles():
+    cfg = cfg_module.load()
+    out = []
+    for name in cfg_module.profile_names(cfg):
+        p = cfg_module.get_profile(name, cfg)
+        out.append({"name": name, "ado_org_url": p.get("ado_org_url", ""), "ado_project": p.get("ado_project", "")})
+    return {"active": cfg.get("active_profile") or cfg_module.DEFAULT_PROFILE, "profiles": out}
+
+@app.put("/api/profiles/{name}")
+def save_profile(name: str, body: ProfileIn):
+    cfg_module.save_profile(name, body.model_dump(exclude_none=True))
+    profiles_module.reset(name)
+    return {"status": "ok"}
+
+@app.delete("/api/profiles/{name}")
+def delete_profile(name: str):
+    if not cfg_module.delete_profile(name):
+        raise HTTPException(status_code=404, detail=f"Profile '{name}' not found (the default profile cannot be deleted)")
+    profiles_module.reset(name)
+    return {"status": "ok"}
+
+@app.post("/api/profiles/{name}/activate")
+def activate_profile(name: str):
+    cfg = cfg_module.load()
+    if name not in cfg_module.profile_names(cfg):
+        raise HTTPException(status_code=404, detail=f"Profile '{name}' not found")
+    cfg["active_profile"] = name
+    cfg_module.save(cfg)
+    return {"status": "ok"}
+
+# ─── Stats ─────────────────────────────────────────────────────
+
+@app.get("/api/stats")
+def get_stats():
+    return {
+        "read_coalescing": read_coalescing_stats(),
+        "search_index":    get_index().stats(),
+        "rate_limits":     profiles_module.stats(),
+        "listing_cache":   cache_module.listing_cache.stats(),
+        "rollups":         rollups.stats(),
+        "ado_breakers":    breaker_module.stats(),
+        "process_metadata": metadata.cache.stats(),
+        "identities":      identities.cache.stats(),
+        "admission":       admission.controller.stats(),
+        "write_queue":     write_queue.get_queue().status(limit=0)["counts"] if write_queue.QUEUE_FILE.exists() else None,
+    }
+
+# ─── Process metadata (autocomplete) ───────────────────────────
+
+@app.get("/api/meta")
+def get_meta(kind: Optional[str] = None, q: str = "", limit: int = Query(50, ge=1, le=1000), refresh: bool = False):
+    """Work item types, states, transitions, fields and area/iteration paths from the
+    process-metadata cache. With `kind`, just that list, filtered by `q` (substring).
+    """
+    if kind is not None and kind not in metadata.KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(metadata.KINDS)}")
+    meta = metadata.cache.get(_get_client(), refresh=refresh)
+    if meta is None:
+        raise HTTPException(status_code=502, detail="Process metadata could not be loaded from ADO")
+    if kind is None:
+        return meta.to_dict()
+    return {"kind": kind, "values": meta.values(kind, q, limit)}
+
+@app.get("/api/identities")
+def resolve_identity(q: str):
+    """Resolve an email or display name to an ADO identity (cached)."""
+    try:
+        identity = identities.cache.resolve(_get_client(), q)
+    except identities.IdentityError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if identity is None:
+        raise HTTPException(status_code=502, detail="Identity lookup is unavailable")
+    return identity
+
+# ─── Health ────────────────────────────────────────────────────
+
+@app.get("/api/health")
+def health():
+    """Live ADO probe (latency) and circuit-breaker state for the selected profile.
+    Always 200 while the API itself is up; see `status` for ADO.
+    """
+    ado = _get_client().health()
+    if ado["breaker"]["state"] == "open":
+        status = "down"
+    elif not ado["probe"]["ok"]:
+        status = "degraded"
+    else:
+        status = "ok"
+    return {"status": status, "ado": ado}
+
+# ─── Write-behind queue ────────────────────────────────────────
+
+@app.get("/api/writes")
+def list_writes(status: Optional[str] = None, limit: int = Query(50, ge=0, le=1000)):
+    """Write-behind operations: counts per status and the most recent ops."""
+    if status and status not in write_queue.STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of {', '.join(write_queue.STATUSES)}")
+    return {"enabled": write_queue.enabled(), **write_queue.get_queue().status(status, limit)}
+
+@app.get("/api/writes/{op_id}")
+def get_write(op_id: str):
+    op = write_queue.get_queue().get(op_id)
+    if op is None:
+        raise HTTPException(status_code=404, detail=f"Operation {op_id} not found")
+    return op
+
+# ─── ADO service hooks ─────────────────────────────────────────
+
+@app.post("/api/hooks/ado")
+async def ado_hook(request: Request):
+    """Receive workitem.* service-hook events and invalidate/patch local caches."""
+    if not hooks.secret():
+        raise HTTPException(status_code=503, detail="Service hooks are not configured (set CLAUDEADO_HOOK_SECRET)")
+    if not hooks.verify(request.headers.get("authorization", ""), request.headers.get("x-hook-secret", "")):
+        raise HTTPException(status_code=401, detail="Invalid hook secret")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    change = hooks.parse(payload) if isinstance(payload, dict) else None
+    if change is None:
+        # Acknowledge anyway so ADO doesn't retry or disable the subscription
+        return {"status": "ignored", "event": payload.get("eventType") if isinstance(payload, dict) else None}
+    # Listeners write SQLite (search index, shared epoch) and read config: keep that off the event loop
+    dropped = await run_in_threadpool(cache_module.publish, change)
+    return {"status": "ok", "event": change["event"], "id": change["id"], "invalidated": dropped}
+
 # ─── Parse ─────────────────────────────────────────────────────
 
 @app.post("/api/parse")
-def parse_plan(body: ParseRequest):
+def parse_plan(body: ParseRequest, response: Response):
     if not body.text.strip():
         raise HTTPException(status_code=400, detail="Text is required")
+    parser = body.parser or "auto"
+    if parser not in ("auto", "outline", "claude"):
+        raise HTTPException(status_code=400, detail=f"Unknown parser '{parser}'. Allowed: auto, outline, claude")
+    routing = body.model_dump(include={"tier", "model", "max_tokens", "latency_target"})
+    try:
+        llm_parser.route(body.text, routing)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if parser == "outline":
+        result = outline_parser.analyze(body.text)
+        if result["hierarchy"] is None:
+            raise HTTPException(status_code=422, detail="Not a usable outline: " + "; ".join(result["reasons"]))
+        response.headers["X-Parser"] = "outline"
+        return result["hierarchy"]
+    if parser == "auto":
+        hierarchy = outline_parser.parse(body.text)
+        if hierarchy:
+            response.headers["X-Parser"] = "outline"
+            return hierarchy
     api_key = get_api_key()
-    hierarchy = parse_text_to_hierarchy(body.text, api_key)
+    hierarchy = parse_text_to_hierarchy(body.text, api_key, routing)
     if not hierarchy:
         raise HTTPException(status_code=500, detail="Failed to parse plan. Check API key or try again.")
+    response.headers["X-Parser"] = "claude"
     return hierarchy
 
 # ─── Create hierarchy ──────────────────────────────────────────
 
 @app.post("/api/create")
 def create_hierarchy(body: CreateHierarchyRequest):
-    cfg = cfg_module.load()
+    cfg = _cfg()
     client = _get_client()
     epic_url = None
     if body.epic_id:
@@ -122,7 +500,11 @@ def create_hierarchy(body: CreateHierarchyRequest):
         iteration_path=body.iteration_path or cfg.get("iteration_path", ""),
         epic_url=epic_url,
     )
+    if results["invalid"]:
+        raise HTTPException(status_code=422, detail="Plan rejected before any write: " + "; ".join(results["invalid"]))
     if not results.get("feature"):
+        if results["error"]:
+            raise HTTPException(status_code=503, detail=results["error"])
         raise HTTPException(status_code=500, detail="Failed to create work items in ADO")
     feature_id = results["feature"]["id"]
     return {
@@ -133,12 +515,55 @@ def create_hierarchy(body: CreateHierarchyRequest):
         "details": results,
     }
 
+# ─── Reconcile an existing Feature with an edited plan ─────────
+
+def _reconcile_plan(client: ADOClient, body: ReconcileRequest) -> dict:
+    tree = client.get_feature_tree(body.feature_id)
+    if not tree:
+        raise HTTPException(status_code=404, detail=f"Feature {body.feature_id} not found in ADO")
+    if tree["feature"]["type"] != "Feature":
+        raise HTTPException(status_code=400, detail=f"Work item {body.feature_id} is a {tree['feature']['type']}, not a Feature")
+    return reconcile.plan(body.hierarchy, tree)
+
+@app.post("/api/reconcile/preview")
+def reconcile_preview(body: ReconcileRequest):
+    client = _get_client()
+    return _reconcile_plan(client, body)
+
+@app.post("/api/reconcile/apply")
+def reconcile_apply(body: ReconcileRequest):
+    cfg = _cfg()
+    client = _get_client()
+    plan = _reconcile_plan(client, body)  # re-planned against current ADO state
+    result = reconcile.apply(
+        client, plan,
+        assigned_to=body.assigned_to or cfg.get("assigned_to", ""),
+        area_path=body.area_path or cfg.get("area_path", ""),
+        iteration_path=body.iteration_path or cfg.get("iteration_path", ""),
+        delete_removed=body.delete_removed,
+    )
+    if result["invalid"]:
+        raise HTTPException(status_code=422, detail="Plan rejected before any write: " + "; ".join(result["invalid"]))
+    return {"summary": plan["summary"], **result}
+
 # ─── Create single ─────────────────────────────────────────────
 
 @app.post("/api/create-single")
 def create_single(body: CreateSingleRequest):
-    cfg = cfg_module.load()
+    cfg = _cfg()
     client = _get_client()
+    assigned_to    = body.assigned_to or cfg.get("assigned_to", "")
+    area_path      = body.area_path or cfg.get("area_path", "")
+    iteration_path = body.iteration_path or cfg.get("iteration_path", "")
+    meta = client.meta
+    if meta is not None:
+        problems = meta.check(body.wit_type, {
+            "System.Title": body.title, "System.Description": body.description,
+            "System.AssignedTo": assigned_to, "System.AreaPath": area_path,
+            "System.IterationPath": iteration_path, "Microsoft.VSTS.Scheduling.Effort": body.effort,
+        }, creating=True)
+        if problems:
+            raise HTTPException(status_code=422, detail="; ".join(problems))
     parent_url = None
     if body.parent_id:
         parent = client.get_work_item(body.parent_id)
@@ -148,9 +573,9 @@ def create_single(body: CreateSingleRequest):
         wit_type=body.wit_type,
         title=body.title,
         description=body.description,
-        assigned_to=body.assigned_to or cfg.get("assigned_to", ""),
-        area_path=body.area_path or cfg.get("area_path", ""),
-        iteration_path=body.iteration_path or cfg.get("iteration_path", ""),
+        assigned_to=assigned_to,
+        area_path=area_path,
+        iteration_path=iteration_path,
         effort=body.effort,
         parent_url=parent_url,
     )
@@ -167,25 +592,13 @@ def get_workitem(item_id: int):
     item = client.get_work_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail=f"Work item {item_id} not found")
-    f = item["fields"]
-    assignee = f.get("System.AssignedTo", "")
-    if isinstance(assignee, dict):
-        assignee = assignee.get("uniqueName", "")
-    return {
-        "id": item["id"],
-        "type": f.get("System.WorkItemType", ""),
-        "title": f.get("System.Title", ""),
-        "state": f.get("System.State", ""),
-        "assigned_to": assignee,
-        "area_path": f.get("System.AreaPath", ""),
-        "iteration_path": f.get("System.IterationPath", ""),
-    }
+    w = WorkItem.from_ado(item, client.org_url, client.project)
+    return w.to_dict(["id", "type", "title", "state", "assigned_to", "area_path", "iteration_path"])
 
 # ─── Update work item ──────────────────────────────────────────
 
 @app.patch("/api/workitem/{item_id}")
-def update_workitem(item_id: int, body: UpdateRequest):
-    client = _get_client()
+def update_workitem(item_id: int, body: UpdateRequest, request: Request):
     fields = {}
     if body.title:          fields["System.Title"] = body.title
     if body.state:          fields["System.State"] = body.state
@@ -194,7 +607,10 @@ def update_workitem(item_id: int, body: UpdateRequest):
     if body.iteration_path: fields["System.IterationPath"] = body.iteration_path
     if not fields:
         raise HTTPException(status_code=400, detail="No fields to update")
-    ok = client.update_work_item(item_id, fields)
+    if _write_behind(request):
+        op_ids = _enqueue("update", [item_id], fields)
+        return _queued(op_ids, op_id=op_ids[item_id])
+    ok = _get_client().update_work_item(item_id, fields)
     if not ok:
         raise HTTPException(status_code=500, detail="Failed to update work item")
     return {"status": "ok"}
@@ -202,7 +618,9 @@ def update_workitem(item_id: int, body: UpdateRequest):
 # ─── Delete ────────────────────────────────────────────────────
 
 @app.post("/api/workitems/delete")
-def delete_workitems(body: DeleteRequest):
+def delete_workitems(body: DeleteRequest, request: Request):
+    if _write_behind(request):
+        return _queued(_enqueue("delete", body.ids), results={str(i): True for i in body.ids})
     client = _get_client()
     results = {}
     for item_id in body.ids:
@@ -212,69 +630,147 @@ def delete_workitems(body: DeleteRequest):
 # ─── Get children of a work item ──────────────────────────────
 
 @app.get("/api/workitem/{item_id}/children")
-def get_children(item_id: int):
+def get_children(item_id: int, request: Request, fields: Optional[str] = None):
+    keys = _fields(fields, CHILD_FIELDS)
     client = _get_client()
     item = client.get_work_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail=f"Work item {item_id} not found")
-    f = item["fields"]
-    parent_info = {
-        "id": item["id"],
-        "type": f.get("System.WorkItemType", ""),
-        "title": f.get("System.Title", ""),
-        "state": f.get("System.State", ""),
-    }
-    children = client.get_children(item_id)
-    return {"parent": parent_info, "children": children}
+    parent_info = WorkItem.from_ado(item, client.org_url, client.project).to_dict(["id", "type", "title", "state"])
+    children = client.get_children(item_id, keys)
+    revs = [(item["id"], item.get("rev"))] + [(c["id"], c.get("rev")) for c in children]
+    return _etag_response(request, {"parent": parent_info, "children": children}, revs, keys)
 
 # ─── Bulk fetch work items ─────────────────────────────────────
 
 @app.get("/api/workitems/batch")
-def get_workitems_batch(ids: str):
+def get_workitems_batch(ids: str, request: Request, fields: Optional[str] = None):
+    keys = _fields(fields, ITEM_FIELDS)
     client = _get_client()
     id_list = [int(i.strip()) for i in ids.split(",") if i.strip().isdigit()]
     if not id_list:
         raise HTTPException(status_code=400, detail="No valid IDs provided")
-    results = []
-    for item_id in id_list:
-        item = client.get_work_item(item_id)
-        if item:
-            f = item["fields"]
-            assignee = f.get("System.AssignedTo", "")
-            if isinstance(assignee, dict):
-                assignee = assignee.get("uniqueName", "")
-            # Extract current parent ID from relations
-            parent_id = None
-            for rel in (item.get("relations") or []):
-                if rel.get("rel") == "System.LinkTypes.Hierarchy-Reverse":
-                    parts = rel.get("url", "").rstrip("/").split("/")
-                    if parts and parts[-1].isdigit():
-                        parent_id = int(parts[-1])
-                    break
-            results.append({
-                "id": item["id"],
-                "type": f.get("System.WorkItemType", ""),
-                "title": f.get("System.Title", ""),
-                "state": f.get("System.State", ""),
-                "assigned_to": assignee,
-                "area_path": f.get("System.AreaPath", ""),
-                "iteration_path": f.get("System.IterationPath", ""),
-                "tags": f.get("System.Tags", ""),
-                "parent_id": parent_id,
-            })
-    return {"items": results}
+    results = client.get_work_items(id_list, keys)
+    revs = [(r["id"], r.get("rev")) for r in results]
+    return _etag_response(request, {"items": results}, revs, keys)
+
+# ─── Effort rollup ─────────────────────────────────────────────
+
+@app.get("/api/rollup")
+def get_rollup(feature_id: Optional[int] = None, tag: str = "claudeADO", refresh: bool = False):
+    """Task effort totals per Feature, PBI, assignee and iteration — for one Feature,
+    or every Feature with the tag. With service hooks configured, trees are loaded once
+    and then kept current by item changes; without them, or with refresh=true, they
+    are reloaded from ADO.
+    """
+    client = _get_client()
+    if feature_id is not None:
+        ids = [feature_id]
+    else:
+        ids = [f["id"] for f in client.list_features(tag, fields=["id", "rev"])["features"]]
+    loaded = rollups.ensure(client, ids, refresh=refresh)
+    if loaded is None:
+        raise HTTPException(status_code=502, detail="Failed to load work item trees from ADO")
+    if feature_id is not None and not loaded:
+        raise HTTPException(status_code=404, detail=f"Feature {feature_id} not found")
+    return rollups.report(client, loaded)
+
+# ─── Export ────────────────────────────────────────────────────
+
+@app.get("/api/export")
+def export_features(
+    format: str = "csv",
+    feature_ids: Optional[str] = None,
+    tag: str = "claudeADO",
+):
+    """Feature → PBI → Task rows for the given Features (comma-separated IDs) or every
+    Feature with the tag. CSV/JSON stream while later trees are still being fetched;
+    XLSX is written to a temp file first (the format can't be streamed).
+    The ID list and first chunk of trees are fetched before answering, so an ADO
+    failure up front is an error status; a later one ends the stream with an error row.
+    """
+    if format not in export_module.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Allowed: {', '.join(export_module.FORMATS)}")
+    if format == "xlsx" and export_module.xlsxwriter is None:
+        raise HTTPException(status_code=501, detail="XLSX export needs the xlsxwriter package on the server")
+    ids = [int(i) for i in (feature_ids or "").split(",") if i.strip().isdigit()]
+    if feature_ids and not ids:
+        raise HTTPException(status_code=400, detail="No valid feature IDs provided")
+    client = _get_client()
+    try:
+        ids = export_module.feature_ids_for(client, ids, tag)
+    except export_module.ExportError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    rows     = export_module.iter_rows(client, ids)
+    filename = f"claudeado-export.{format}"
+    headers  = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "xlsx":
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            try:
+                export_module.write_xlsx(rows, path)
+            except export_module.ExportError as e:
+                raise HTTPException(status_code=502, detail=str(e))
+        except BaseException:
+            os.remove(path)
+            raise
+        return _TempFileResponse(path, media_type=export_module.FORMATS["xlsx"], filename=filename)
+
+    try:
+        head = list(itertools.islice(rows, 1))  # waits for the first chunk of trees
+    except export_module.ExportError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return StreamingResponse(export_module.stream_chunks(itertools.chain(head, rows), format),
+                             media_type=export_module.FORMATS[format], headers=headers)
+
+class _TempFileResponse(FileResponse):
+    """FileResponse that deletes its file once sent — also when the client disconnects
+    mid-download (a background task would not run then)."""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
 
 # ─── Bulk update work items ────────────────────────────────────
 
 @app.post("/api/workitems/bulk-update")
-def bulk_update_workitems(body: BulkUpdateRequest):
-    client = _get_client()
+def bulk_update_workitems(body: BulkUpdateRequest, request: Request):
     fields = {}
     if body.state:          fields["System.State"] = body.state
     if body.assigned_to:    fields["System.AssignedTo"] = body.assigned_to
     if body.area_path:      fields["System.AreaPath"] = body.area_path
     if body.iteration_path: fields["System.IterationPath"] = body.iteration_path
     if body.tags is not None and body.tags != "": fields["System.Tags"] = body.tags
+    if body.assigned_to:
+        # Resolve once up front: a typo is a 422 now, not a failure per item (or at flush time)
+        try:
+            fields["System.AssignedTo"] = _get_client().normalize_assignee(body.assigned_to)
+        except identities.IdentityError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    if _write_behind(request):
+        # Flushed through the diff-first bulk_update, so no-op writes are skipped either way
+        op_ids = _enqueue("update", body.ids, fields, body.parent_id)
+        return _queued(op_ids, results={str(i): True for i in body.ids}, errors={})
+    client = _get_client()
+    if body.diff:
+        summary = client.bulk_update(body.ids, fields, body.parent_id)
+        failed  = summary["failed"]
+        return {
+            "results": {str(i): i not in failed for i in body.ids},
+            "errors":  {str(i): err for i, err in failed.items()},
+            "summary": {
+                "changed":   [c["id"] for c in summary["changed"]],
+                "unchanged": summary["unchanged"],
+                "failed":    list(failed),
+            },
+        }
     results = {}
     errors  = {}
     for item_id in body.ids:
@@ -286,10 +782,104 @@ def bulk_update_workitems(body: BulkUpdateRequest):
         results[str(item_id)] = ok
     return {"results": results, "errors": errors}
 
+# ─── Generic query ─────────────────────────────────────────────
+
+@app.post("/api/query")
+def query_workitems(body: QueryRequest):
+    """Work items matching a structured filter, filtered and sorted by ADO (escaped WIQL),
+    hydrated in concurrent 200-ID chunks and streamed as {"count", "items": [...]}.
+    If ADO fails after streaming has started, the body ends with an "error" member.
+    """
+    client = _get_client()
+    keys   = _fields(body.fields, ITEM_FIELDS)
+    try:
+        ids = client.query_ids(body.filter.model_dump(exclude_none=True), body.sort, body.descending, body.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ADOError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    # Hydrate the first chunk before answering, so a failure up front is still a 502
+    chunks = client.iter_items(ids, keys)
+    try:
+        head = next(chunks, [])
+    except ADOError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    def stream():
+        yield f'{{"count": {len(ids)}, "items": ['.encode()
+        first, error = True, None
+        try:
+            for chunk in itertools.chain([head], chunks):
+                if chunk:
+                    yield (("" if first else ",") + ",".join(json.dumps(i) for i in chunk)).encode()
+                    first = False
+        except (ADOError, requests.RequestException) as e:
+            # Too late for an error status: close the array and say the list is incomplete
+            error = f"Hydration stopped early: {e}"
+        yield b"]}" if error is None else f'], "error": {json.dumps(error)}}}'.encode()
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+# ─── Search (local index) ──────────────────────────────────────
+
+@app.get("/api/search")
+def search(
+    q: str,
+    type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    cfg = _cfg()
+    scope = f"{cfg['ado_org_url'].rstrip('/')}/{cfg['ado_project']}"
+    page  = get_index().search(scope, q, wit_type=type, limit=limit, offset=offset)
+    base  = f"{cfg['ado_org_url'].rstrip('/')}/{cfg['ado_project']}/_workitems/edit"
+    for r in page["results"]:
+        r["ado_url"] = f"{base}/{r['id']}"
+    next_offset = offset + limit if offset + limit < page["total"] else None
+    return {**page, "next_offset": next_offset}
+
 # ─── My Features ───────────────────────────────────────────────
 
 @app.get("/api/features")
-def get_features():
+def get_features(
+    request: Request,
+    fields: Optional[str] = None,
+    state: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    area_path: Optional[str] = None,
+    iteration_path: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    title: Optional[str] = None,
+    sort: str = "created_date",
+    order: str = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    keys = _fields(fields, FEATURE_FIELDS)
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    filters = {
+        "state": state, "assigned_to": assigned_to, "area_path": area_path,
+        "iteration_path": iteration_path, "created_from": created_from,
+        "created_to": created_to, "title": title,
+    }
     client = _get_client()
-    features = client.get_features_by_tag()
-    return {"features": features}
+    try:
+        page = client.list_features(
+            fields=keys, filters=filters, sort=sort, descending=order == "desc",
+            limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    revs = [(f["id"], f.get("rev")) for f in page["features"]] + [page["next_cursor"], page["total"]]
+    return _etag_response(request, page, revs, keys)
+
+@app.get("/api/features/all-profiles")
+def get_features_all_profiles(fields: Optional[str] = None, profiles: Optional[str] = None):
+    """My Features across every configured profile, queried concurrently."""
+    keys  = _fields(fields, FEATURE_FIELDS)
+    names = [n.strip() for n in profiles.split(",") if n.strip()] if profiles else None
+    results = profiles_module.fan_out(lambda client, _: client.get_features_by_tag(fields=keys), names)
+    return {"profiles": results}
@@ -4,24 +4,56 @@ Falls back to prompting for a PAT if AzureAuth is not available.
 """
 import subprocess
 import os
+import threading
 from pathlib import Path
 from rich.console import Console
 from rich.prompt import Prompt
 
+import shared_state
+
 console = Console()
 
 DEFAULT_AZUREAUTH = r"C:\Users\shragrawal\AppData\Local\Programs\AzureAuth\0.9.5\azureauth.exe"
 
-_token_cache: str | None = None
+# One cached token per connection profile
+_token_cache: dict[str, str] = {}
+_token_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def get_token(azureauth_path: str = DEFAULT_AZUREAUTH, profile: str = "default") -> str:
+    store = shared_state.get_store()
 
+    # Return cached token within the same session. With shared state on, the shared
+    # store is authoritative so a token cleared or refreshed by another worker is seen.
+    if store is None and _token_cache.get(profile):
+        return _token_cache[profile]
+    if store is not None:
+        token = store.get_token(profile)
+        if token:
+            _token_cache[profile] = token
+            return token
 
-def get_token(azureauth_path: str = DEFAULT_AZUREAUTH) -> str:
-    global _token_cache
+    # Serialise acquisition per profile so concurrent requests don't each spawn AzureAuth
+    with _locks_guard:
+        lock = _token_locks.setdefault(profile, threading.Lock())
+    with lock:
+        if store is None:
+            if _token_cache.get(profile):
+                return _token_cache[profile]
+            token = _acquire(azureauth_path, profile)
+        else:
+            # ...and across worker processes: the first one in acquires, the rest reuse it
+            with store.token_lock(profile):
+                token = store.get_token(profile)
+                if not token:
+                    token = _acquire(azureauth_path, profile)
+                    store.put_token(profile, token)
+        _token_cache[profile] = token
+        return token
 
-    # Return cached token within the same session
-    if _token_cache:
-        return _token_cache
 
+def _acquire(azureauth_path: str, profile: str) -> str:
     # Try AzureAuth broker mode (silent, uses Windows identity)
     path = azureauth_path or DEFAULT_AZUREAUTH
     if Path(path).exists():
@@ -33,7 +65,6 @@ def get_token(azureauth_path: str = DEFAULT_AZUREAUTH) -> str:
             )
             token = result.stdout.strip()
             if token:
-                _token_cache = token
                 return token
         except Exception as e:
             console.print(f"[yellow]AzureAuth broker failed: {e}[/yellow]")
@@ -48,18 +79,22 @@ def get_token(azureauth_path: str = DEFAULT_AZUREAUTH) -> str:
             )
             token = result.stdout.strip()
             if token:
-                _token_cache = token
                 return token
         except Exception:
             pass
 
     # Fallback — ask for PAT
     console.print("[yellow]AzureAuth not available or failed. Falling back to PAT.[/yellow]")
-    token = Prompt.ask("  Enter your ADO Personal Access Token", password=True)
-    _token_cache = token
-    return token
+    label = "" if profile == "default" else f" for profile '{profile}'"
+    return Prompt.ask(f"  Enter your ADO Personal Access Token{label}", password=True)
 
 
-def clear_cache():
-    global _token_cache
-    _token_cache = None
+def clear_cache(profile: str = None):
+    """Forget the cached token for one profile, or for all profiles."""
+    if profile is None:
+        _token_cache.clear()
+    else:
+        _token_cache.pop(profile, None)
+    store = shared_state.get_store()
+    if store is not None:
+        store.clear_tokens(profile)
@@ -0,0 +1,145 @@
+"""
+Circuit breaker for ADO calls.
+
+One breaker per ADO organisation, shared by every client in the process. It
+opens after FAILURE_THRESHOLD consecutive failures — connection errors,
+timeouts, 5xx answers, or responses slower than SLOW_SECONDS — and while open
+every call fails at once with CircuitOpenError instead of tying up a thread
+until a timeout. A background probe then pings ADO every PROBE_INTERVAL
+seconds and closes the breaker on the first healthy answer.
+"""
+import threading
+import time
+from collections import deque
+
+import requests
+from rich.console import Console
+
+console = Console()
+
+FAILURE_THRESHOLD = 5
+SLOW_SECONDS      = 8.0
+PROBE_INTERVAL    = 5.0
+PROBE_TIMEOUT     = (3.05, 5)
+LATENCY_SAMPLES   = 50
+UNHEALTHY_STATUS  = {401, 403, 429}  # answered, but not usable: don't close the breaker on these
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """ADO is considered down; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"ADO ({name}) is unavailable — circuit open after repeated failures; "
+                         f"retry in about {int(retry_after) + 1}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, probe=None):
+        self.name        = name
+        self.probe       = probe  # () → requests.Response; resolves the current client/token per call
+        self.state       = "closed"
+        self.failures    = 0
+        self.opened_at   = None
+        self.last_error  = None
+        self.last_probe  = None  # {"ok", "latency_ms", "status", "at"}
+        self._latencies  = deque(maxlen=LATENCY_SAMPLES)
+        self._lock       = threading.Lock()
+        self._prober     = None
+        self._stats      = {"calls": 0, "failed_calls": 0, "rejected": 0, "opened": 0}
+
+    def before(self):
+        """Raise CircuitOpenError if calls should not be attempted right now."""
+        with self._lock:
+            if self.state == "open":
+                self._stats["rejected"] += 1
+                since = time.monotonic() - self.opened_at
+                raise CircuitOpenError(self.name, max(0.0, PROBE_INTERVAL - since % PROBE_INTERVAL))
+
+    def record(self, elapsed: float, error: str = None):
+        """Record one finished call. `error` set (or a slow call) counts as a failure."""
+        if error is None and elapsed > SLOW_SECONDS:
+            error = f"slow response ({elapsed:.1f}s)"
+        with self._lock:
+            self._stats["calls"] += 1
+            if error is None:
+                self.failures = 0
+                self._latencies.append(elapsed)
+                return
+            self._stats["failed_calls"] += 1
+            self.failures  += 1
+            self.last_error = error
+            if self.state == "closed" and self.failures >= FAILURE_THRESHOLD:
+                self._open()
+
+    def _open(self):
+        self.state     = "open"
+        self.opened_at = time.monotonic()
+        self._stats["opened"] += 1
+        console.print(f"  [red]ADO circuit open for {self.name}: {self.last_error}[/red]")
+        if self.probe is not None and (self._prober is None or not self._prober.is_alive()):
+            self._prober = threading.Thread(target=self._probe_loop, name="ado-health-probe", daemon=True)
+            self._prober.start()
+
+    def _close(self):
+        self.state     = "closed"
+        self.failures  = 0
+        self.opened_at = None
+        console.print(f"  [green]ADO circuit closed for {self.name}[/green]")
+
+    def ping(self) -> dict:
+        """One health check against ADO, bypassing the breaker. Returns the probe result."""
+        start = time.monotonic()
+        try:
+            r = self.probe()
+            ok, status = r.status_code < 500 and r.status_code not in UNHEALTHY_STATUS, r.status_code
+        except Exception as e:  # network errors, but also a token that can't be refreshed
+            ok, status = False, type(e).__name__
+        elapsed = time.monotonic() - start
+        ok = ok and elapsed <= SLOW_SECONDS
+        self.last_probe = {"ok": ok, "latency_ms": round(elapsed * 1000, 1), "status": status, "at": time.time()}
+        return self.last_probe
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(PROBE_INTERVAL)
+            if self.ping()["ok"]:
+                with self._lock:
+                    self._close()
+                return
+
+    def stats(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            return {
+                "state":          self.state,
+                "failures":       self.failures,
+                "open_for_sec":   round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+                "last_error":     self.last_error,
+                "last_probe":     self.last_probe,
+                "latency_ms_p50": round(lat[len(lat) // 2] * 1000, 1) if lat else None,
+                "latency_ms_max": round(lat[-1] * 1000, 1) if lat else None,
+                **self._stats,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get(name: str, probe=None) -> CircuitBreaker:
+    """The process-wide breaker for an ADO organisation URL. A given `probe` replaces
+    the previous one, so pings never go out with a retired client's token.
+    """
+    with _lock:
+        b = _breakers.get(name)
+        if b is None:
+            b = _breakers[name] = CircuitBreaker(name, probe)
+        elif probe is not None:
+            b.probe = probe
+        return b
+
+
+def stats() -> dict:
+    with _lock:
+        return {name: b.stats() for name, b in _breakers.items()}
@@ -0,0 +1,127 @@
+"""
+Listing cache with push invalidation.
+
+Caches the results of listing reads (tagged Features, children of an item) so
+reloads don't hit ADO. Entries stay valid until something changes them: our
+own writes through ADOClient, or an ADO service hook (see api /api/hooks/ado).
+Because correctness depends on those hooks, the cache is only enabled when a
+hook secret is configured (CLAUDEADO_HOOK_SECRET).
+
+Other local state that derives from work items (e.g. the search index) can
+subscribe() to receive the same change events.
+"""
+import os
+import threading
+
+from rich.console import Console
+
+import shared_state
+
+console = Console()
+
+FEATURE_TYPE = "Feature"
+
+
+def enabled() -> bool:
+    return bool(os.getenv("CLAUDEADO_HOOK_SECRET"))
+
+
+class ListingCache:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._lock    = threading.Lock()
+        self._entries = {}  # key → (value, ids, parent_id, kind)
+        self._epoch   = 0
+        self._stats   = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    def _check_epoch(self):
+        """With shared state on, a hook handled by any worker bumps a shared epoch,
+        and every worker drops its entries the next time it looks.
+        """
+        epoch = shared_epoch()
+        if epoch is None:
+            return
+        if epoch != self._epoch:
+            self._entries.clear()
+            self._epoch = epoch
+
+    def get(self, key):
+        with self._lock:
+            self._check_epoch()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value, ids: list[int], kind: str, parent_id: int = None):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, set(ids), parent_id, kind)
+
+    def invalidate(self, ids: list[int], parent_ids: list[int] = (), wit_type: str = None):
+        """Drop every entry that lists one of `ids`, lists the children of one of
+        `parent_ids`, or is a Feature listing when a Feature (or unknown type) changed.
+        """
+        ids, parents = set(ids), {p for p in parent_ids if p is not None}
+        features_changed = wit_type in (None, "", FEATURE_TYPE)
+        with self._lock:
+            stale = [
+                k for k, (_, entry_ids, parent_id, kind) in self._entries.items()
+                if entry_ids & ids
+                or (kind == "children" and (parent_id in parents or parent_id in ids))
+                or (kind == "features" and features_changed)
+            ]
+            for k in stale:
+                del self._entries[k]
+            self._stats["invalidated"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": enabled(), "entries": len(self._entries), **self._stats}
+
+
+listing_cache = ListingCache()
+
+_listeners = []
+
+
+def invalidate(ids: list[int], parent_ids: list[int] = (), wit_type: str = None) -> int:
+    """Drop affected listings in this process and, with shared state on, in every worker."""
+    dropped = listing_cache.invalidate(ids, parent_ids, wit_type)
+    store   = shared_state.get_store()
+    if store is not None and enabled():
+        store.bump_counter("cache_epoch")
+    return dropped
+
+
+def shared_epoch() -> int | None:
+    """Change counter shared by all workers (bumped on every change any of them sees),
+    or None without shared state."""
+    store = shared_state.get_store()
+    return None if store is None else store.get_counter("cache_epoch")
+
+
+def subscribe(fn):
+    """Register fn(change) for pushed change events — see hooks.parse for the dict shape."""
+    _listeners.append(fn)
+
+
+def publish(change: dict) -> int:
+    """Apply an external change: drop affected listings and notify subscribers.
+    Returns the number of listing entries dropped in this process.
+    """
+    dropped = invalidate([change["id"]], change.get("parent_ids", ()), change.get("type"))
+    for fn in list(_listeners):
+        try:
+            fn(change)
+        except Exception as e:
+            console.print(f"  [dim]cache listener failed for {change['event']} #{change['id']}: {e}[/dim]")
+    return dropped
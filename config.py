@@ -1,8 +1,13 @@
 """
 Configuration management — saves/loads ADO and app settings to config.json
+
+Settings live in named connection profiles. The top-level keys are the
+"default" profile (the original flat layout, so existing config.json files keep
+working); additional profiles live under "profiles": {name: {...}}.
 """
 import json
 import os
+import threading
 from pathlib import Path
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
@@ -19,17 +24,127 @@ DEFAULTS = {
     "azureauth_path": r"C:\Users\shragrawal\AppData\Local\Programs\AzureAuth\0.9.5\azureauth.exe",
 }
 
+DEFAULT_PROFILE = "default"
+
+# Keys that belong to a connection profile (everything else in config.json is app-level)
+PROFILE_KEYS = list(DEFAULTS) + ["rate_limit", "rate_burst"]
+
+DEFAULT_RATE_LIMIT = 20.0  # ADO requests/second per profile
+
+# Plan parsing: model and output budget by input size. The first tier whose
+# max_chars fits the text wins. Override any part in config.json under
+# "parse_routing". tokens_per_sec / overhead_sec and the expected reply size
+# estimate latency, so a latency target can pick a faster tier; the output
+# budget itself is never cut to meet a target.
+PARSE_ROUTING = {
+    "tiers": [
+        {"name": "small",  "max_chars": 2500,  "model": "claude-haiku-4-5",  "max_tokens": 4096,
+         "tokens_per_sec": 150, "overhead_sec": 0.6},
+        {"name": "medium", "max_chars": 15000, "model": "claude-sonnet-4-6", "max_tokens": 8192,
+         "tokens_per_sec": 70,  "overhead_sec": 1.2},
+        {"name": "large",  "max_chars": None,  "model": "claude-sonnet-4-6", "max_tokens": 16000,
+         "tokens_per_sec": 70,  "overhead_sec": 1.5},
+    ],
+    "min_tokens":       1024,  # floor for the output budget
+    "tokens_per_char":  0.5,   # output budget grows with input size: min_tokens + chars × this
+    "expected_min_tokens":      256,   # typical reply: expected_min_tokens + chars × this,
+    "expected_tokens_per_char": 0.35,  # used only for latency estimates
+    "latency_target":   None,  # seconds; None = no target
+}
+
+# Admission control for the expensive API endpoints (parse, create, bulk update /
+# delete, reconcile apply). Override any part in config.json under "admission".
+ADMISSION = {
+    "global_limit":     8,    # expensive requests running at once, all users
+    "per_user_limit":   2,    # ... per user (profile, else client address — see admission.user_key)
+    "queue_limit":      32,   # requests waiting for a slot, all users
+    "per_user_queue":   4,    # ... per user
+    "max_wait":         5.0,  # seconds a queued request waits before it gets a 429
+    "trusted_proxies":  [],   # client addresses whose X-User header names the user
+}
+
+
+# Parsed config.json, reused while the file is unchanged (keyed by path + mtime + size).
+# Every request reads config, and other worker processes may rewrite it at any time.
+_snapshot: tuple | None = None
+_snapshot_lock = threading.Lock()
+
 
 def load() -> dict:
-    if CONFIG_FILE.exists():
-        with open(CONFIG_FILE) as f:
-            return json.load(f)
-    return {}
+    global _snapshot
+    try:
+        st = CONFIG_FILE.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(CONFIG_FILE), st.st_mtime_ns, st.st_size)
+    with _snapshot_lock:
+        if _snapshot and _snapshot[0] == key:
+            return json.loads(_snapshot[1])
+    with open(CONFIG_FILE) as f:
+        raw = f.read()
+    with _snapshot_lock:
+        _snapshot = (key, raw)
+    return json.loads(raw)
 
 
 def save(cfg: dict):
-    with open(CONFIG_FILE, "w") as f:
+    # Write-then-rename so concurrent readers (other threads or workers) never see a partial file
+    tmp = CONFIG_FILE.with_name(f"{CONFIG_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
         json.dump(cfg, f, indent=2)
+    os.replace(tmp, CONFIG_FILE)
+
+
+def profile_names(cfg: dict = None) -> list[str]:
+    cfg = load() if cfg is None else cfg
+    return [DEFAULT_PROFILE] + sorted(n for n in cfg.get("profiles", {}) if n != DEFAULT_PROFILE)
+
+
+def get_profile(name: str = None, cfg: dict = None) -> dict:
+    """Settings for one profile (default: the active one). Raises KeyError if unknown."""
+    cfg  = load() if cfg is None else cfg
+    name = name or cfg.get("active_profile") or DEFAULT_PROFILE
+    if name == DEFAULT_PROFILE:
+        profile = {k: v for k, v in cfg.items() if k in PROFILE_KEYS}
+    elif name in cfg.get("profiles", {}):
+        profile = dict(cfg["profiles"][name])
+    else:
+        raise KeyError(name)
+    profile["name"] = name
+    return profile
+
+
+def save_profile(name: str, values: dict):
+    cfg  = load()
+    data = {k: v for k, v in values.items() if k in PROFILE_KEYS}
+    if name == DEFAULT_PROFILE:
+        cfg.update(data)
+    else:
+        cfg.setdefault("profiles", {})[name] = data
+    save(cfg)
+
+
+def delete_profile(name: str) -> bool:
+    cfg = load()
+    if name == DEFAULT_PROFILE or name not in cfg.get("profiles", {}):
+        return False
+    del cfg["profiles"][name]
+    if cfg.get("active_profile") == name:
+        cfg.pop("active_profile")
+    save(cfg)
+    return True
+
+
+def parse_routing(cfg: dict = None) -> dict:
+    """PARSE_ROUTING with any overrides from config.json applied."""
+    cfg = load() if cfg is None else cfg
+    return {**PARSE_ROUTING, **(cfg.get("parse_routing") or {})}
+
+
+def admission(cfg: dict = None) -> dict:
+    """ADMISSION with any overrides from config.json applied."""
+    cfg = load() if cfg is None else cfg
+    return {**ADMISSION, **(cfg.get("admission") or {})}
 
 
 def get_or_prompt(key: str, prompt_text: str, default: str = "", password: bool = False) -> str:
@@ -44,11 +159,16 @@ def get_or_prompt(key: str, prompt_text: str, default: str = "", password: bool
     return value
 
 
-def setup(force: bool = False):
-    """Interactive first-time or re-configuration."""
-    cfg = load()
+def setup(force: bool = False, profile: str = None):
+    """Interactive first-time or re-configuration of one profile."""
+    name = profile or DEFAULT_PROFILE
+    try:
+        cfg = get_profile(name)
+    except KeyError:
+        cfg = {}
 
-    console.print("\n[bold cyan]ADO Configuration[/bold cyan]")
+    title = "ADO Configuration" if name == DEFAULT_PROFILE else f"ADO Configuration — profile '{name}'"
+    console.print(f"\n[bold cyan]{title}[/bold cyan]")
 
     fields = [
         ("ado_org_url",    "ADO Organisation URL",          DEFAULTS["ado_org_url"]),
@@ -66,14 +186,17 @@ def setup(force: bool = False):
         else:
             console.print(f"  [dim]{label}:[/dim] {current}")
 
-    save(cfg)
+    save_profile(name, cfg)
     console.print("[green]Configuration saved.[/green]\n")
-    return cfg
+    return get_profile(name)
 
 
-def require() -> dict:
-    """Load config, prompt for missing required fields."""
-    cfg = load()
+def require(profile: str = None) -> dict:
+    """Load a profile's config, prompt for missing required fields."""
+    try:
+        cfg = get_profile(profile)
+    except KeyError:
+        return setup(force=True, profile=profile)
     changed = False
 
     required = [
@@ -88,6 +211,6 @@ def require() -> dict:
             changed = True
 
     if changed:
-        save(cfg)
+        save_profile(cfg["name"], cfg)
 
     return cfg
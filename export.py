@@ -0,0 +1,189 @@
+"""
+Streaming export of Feature → PBI → Task trees to CSV, JSON or XLSX.
+
+Trees are fetched a chunk of Features at a time (get_feature_trees: two WIQL
+passes + 200-ID batches per chunk) on a background thread, one chunk ahead of
+the writer, through a bounded queue. Memory stays flat however many Features
+are exported, and the first rows are written as soon as the first chunk lands.
+"""
+import csv
+import io
+import json
+import queue
+import threading
+
+import requests
+
+from ado_client import ADOClient, ADOError, QUERY_LIMIT_MAX
+
+try:
+    import xlsxwriter  # optional: only needed for XLSX
+except ImportError:
+    xlsxwriter = None
+
+FORMATS     = {"csv": "text/csv", "json": "application/json",
+               "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+COLUMNS     = ["feature_id", "pbi_id", "id", "type", "title", "state", "assigned_to", "area_path",
+               "iteration_path", "effort", "parent_id", "rev", "ado_url"]
+CHUNK_SIZE  = 25  # Features per background fetch
+_DONE       = object()
+
+
+class ExportError(Exception):
+    """The export could not be produced (ADO failed mid-way, or XLSX support is missing)."""
+
+
+def feature_ids_for(client: ADOClient, feature_ids: list[int] = None, tag: str = "claudeADO") -> list[int]:
+    """Explicit IDs, or every Feature carrying `tag`, newest first (one WIQL query —
+    trees are fetched later). Raises ExportError if the query fails, so an ADO outage
+    is never mistaken for "no Features".
+    """
+    if feature_ids:
+        return list(feature_ids)
+    try:
+        return client.query_ids({"type": "Feature", "tags": tag}, sort="created_date", descending=True,
+                                limit=QUERY_LIMIT_MAX)
+    except ADOError as e:
+        raise ExportError(f"Could not list Features tagged '{tag}': {e}")
+
+
+def _tree_rows(client: ADOClient, tree: dict):
+    web = f"{client.org_url}/{client.project}/_workitems/edit/"
+
+    def row(node, feature_id, pbi_id):
+        return {**{k: node.get(k) for k in COLUMNS}, "feature_id": feature_id, "pbi_id": pbi_id,
+                "ado_url": f"{web}{node['id']}"}
+
+    fid = tree["feature"]["id"]
+    yield row(tree["feature"], fid, None)
+    for pbi in tree["pbis"]:
+        yield row(pbi, fid, None)
+        for task in pbi.get("tasks", []):
+            yield row(task, fid, pbi["id"])
+
+
+def iter_rows(client: ADOClient, feature_ids: list[int], chunk_size: int = CHUNK_SIZE):
+    """Yield one flat row per Feature, PBI and Task, in tree order.
+    The next chunk of trees is fetched in the background while this one is consumed.
+    Raises ExportError if ADO fails mid-way.
+    """
+    chunks = queue.Queue(maxsize=1)  # bounded: at most one finished chunk waits for the writer
+    stop   = threading.Event()
+
+    def produce():
+        try:
+            for i in range(0, len(feature_ids), chunk_size):
+                if stop.is_set():
+                    return
+                ids   = feature_ids[i:i + chunk_size]
+                trees = client.get_feature_trees(ids)
+                if trees is None:
+                    chunks.put(ExportError(f"ADO request failed while exporting Features {ids[0]}–{ids[-1]}"))
+                    return
+                chunks.put([trees[f] for f in ids if f in trees])
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    worker = threading.Thread(target=produce, name="export-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            for tree in item:
+                yield from _tree_rows(client, tree)
+    finally:
+        stop.set()
+        while worker.is_alive():  # unblock the producer if the consumer stopped early
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                worker.join(0.05)
+
+
+# ─── Writers ──────────────────────────────────────────────────
+
+def csv_chunks(rows, rows_per_chunk: int = 200):
+    """CSV text in chunks of encoded bytes (header first)."""
+    buf    = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % rows_per_chunk == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+def json_chunks(rows, rows_per_chunk: int = 200):
+    """A JSON array of row objects, streamed in chunks of encoded bytes."""
+    parts, first = ["["], True
+    for n, row in enumerate(rows, 1):
+        parts.append(("\n" if first else ",\n") + json.dumps(row, ensure_ascii=False))
+        first = False
+        if n % rows_per_chunk == 0:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+    parts.append("\n]\n")
+    yield "".join(parts).encode("utf-8")
+
+
+def stream_chunks(rows, fmt: str):
+    """CSV or JSON chunks for an HTTP body that is already under way. If ADO fails
+    part-way, the export ends with an error row ({"error": ...} in JSON, a row with
+    feature_id "ERROR" in CSV) instead of being cut off mid-document.
+    """
+    def guarded():
+        try:
+            yield from rows
+        except (ExportError, requests.RequestException) as e:
+            message = f"Export stopped early: {e}"
+            yield {"error": message} if fmt == "json" else {"feature_id": "ERROR", "title": message}
+
+    chunker = csv_chunks if fmt == "csv" else json_chunks
+    return chunker(guarded())
+
+
+def write_xlsx(rows, path) -> int:
+    """Write rows to an .xlsx file in constant memory. Needs xlsxwriter. Returns the row count."""
+    if xlsxwriter is None:
+        raise ExportError("XLSX export needs the xlsxwriter package (pip install xlsxwriter)")
+    wb = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+    try:
+        ws   = wb.add_worksheet("Work items")
+        bold = wb.add_format({"bold": True})
+        ws.write_row(0, 0, COLUMNS, bold)
+        ws.freeze_panes(1, 0)
+        n = 0
+        for n, row in enumerate(rows, 1):
+            ws.write_row(n, 0, ["" if row[c] is None else row[c] for c in COLUMNS])
+        ws.autofilter(0, 0, n, len(COLUMNS) - 1)
+    finally:
+        wb.close()
+    return n
+
+
+def write_file(rows, path, fmt: str) -> int:
+    """Stream rows to a file in the given format. Returns the number of rows written."""
+    if fmt == "xlsx":
+        return write_xlsx(rows, path)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    chunker = csv_chunks if fmt == "csv" else json_chunks
+    with open(path, "wb") as fh:
+        for chunk in chunker(counted()):
+            fh.write(chunk)
+    return count
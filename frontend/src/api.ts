@@ -1,16 +1,28 @@
 import axios from "axios";
-import type { Config, Hierarchy, CreateResult, WorkItem, Feature } from "./types";
+import type { Config, Hierarchy, CreateResult, WorkItem, Feature, FeatureQuery, FeaturePage, ParseRouting } from "./types";
 
 const BASE = "http://localhost:8000";
 const api = axios.create({ baseURL: BASE });
 
+// Connection profile (ADO org/project) sent with every request; empty = server's active profile
+const PROFILE_KEY = "claudeado.profile";
+export const getSelectedProfile = () => localStorage.getItem(PROFILE_KEY) || "";
+export const setSelectedProfile = (name: string) =>
+  name ? localStorage.setItem(PROFILE_KEY, name) : localStorage.removeItem(PROFILE_KEY);
+
+api.interceptors.request.use(cfg => {
+  const profile = getSelectedProfile();
+  if (profile) cfg.headers.set("X-ADO-Profile", profile);
+  return cfg;
+});
+
 export const getConfig = () => api.get<Config>("/api/config").then(r => r.data);
 
 export const saveConfig = (config: Config) =>
   api.post("/api/config", config).then(r => r.data);
 
-export const parseText = (text: string) =>
-  api.post<Hierarchy>("/api/parse", { text }).then(r => r.data);
+export const parseText = (text: string, routing: ParseRouting = {}) =>
+  api.post<Hierarchy>("/api/parse", { text, ...routing }).then(r => r.data);
 
 export const createHierarchy = (
   hierarchy: Hierarchy,
@@ -40,11 +52,18 @@ export const updateWorkItem = (id: number, fields: Partial<{
 export const deleteWorkItems = (ids: number[]) =>
   api.post("/api/workitems/delete", { ids }).then(r => r.data);
 
-export const getChildren = (parentId: number) =>
-  api.get<{ parent: WorkItem; children: WorkItem[] }>(`/api/workitem/${parentId}/children`).then(r => r.data);
+// `fields` projects the response to the listed keys (id is always included)
+const fieldsParam = (fields?: string[]) => (fields?.length ? { fields: fields.join(",") } : {});
 
-export const getWorkItemsBatch = (ids: number[]) =>
-  api.get<{ items: WorkItem[] }>(`/api/workitems/batch?ids=${ids.join(",")}`).then(r => r.data.items);
+export const getChildren = (parentId: number, fields?: string[]) =>
+  api.get<{ parent: WorkItem; children: WorkItem[] }>(`/api/workitem/${parentId}/children`, {
+    params: fieldsParam(fields),
+  }).then(r => r.data);
+
+export const getWorkItemsBatch = (ids: number[], fields?: string[]) =>
+  api.get<{ items: WorkItem[] }>("/api/workitems/batch", {
+    params: { ids: ids.join(","), ...fieldsParam(fields) },
+  }).then(r => r.data.items);
 
 export const bulkUpdateWorkItems = (payload: {
   ids: number[];
@@ -54,7 +73,32 @@ export const bulkUpdateWorkItems = (payload: {
   iteration_path?: string;
   tags?: string;
   parent_id?: number;
-}) => api.post<{ results: Record<string, boolean>; errors: Record<string, string> }>("/api/workitems/bulk-update", payload).then(r => r.data);
+}) => api.post<{
+  results: Record<string, boolean>;
+  errors: Record<string, string>;
+  summary?: { changed: number[]; unchanged: number[]; failed: number[] };
+}>("/api/workitems/bulk-update", payload).then(r => r.data);
+
+export const getFeatures = (fields?: string[]) =>
+  api.get<{ features: Feature[] }>("/api/features", { params: fieldsParam(fields) }).then(r => r.data.features);
+
+// Filtered, sorted, cursor-paged listing — pass next_cursor back to get the following page
+export const queryFeatures = ({ fields, ...query }: FeatureQuery = {}) =>
+  api.get<FeaturePage>("/api/features", {
+    params: { ...Object.fromEntries(Object.entries(query).filter(([, v]) => v !== "" && v != null)), ...fieldsParam(fields) },
+  }).then(r => r.data);
+
+export const listProfiles = () =>
+  api.get<{ active: string; profiles: { name: string; ado_org_url: string; ado_project: string }[] }>("/api/profiles")
+    .then(r => r.data);
+
+export const saveProfile = (name: string, config: Config) =>
+  api.put(`/api/profiles/${encodeURIComponent(name)}`, config).then(r => r.data);
+
+export const deleteProfile = (name: string) =>
+  api.delete(`/api/profiles/${encodeURIComponent(name)}`).then(r => r.data);
 
-export const getFeatures = () =>
-  api.get<{ features: Feature[] }>("/api/features").then(r => r.data.features);
+export const getFeaturesAllProfiles = (fields?: string[]) =>
+  api.get<{ profiles: Record<string, { result?: Feature[]; error?: string }> }>("/api/features/all-profiles", {
+    params: fieldsParam(fields),
+  }).then(r => r.data.profiles);
@@ -32,6 +32,7 @@ export default function BulkUpdateItems({ onToast }: Props) {
   const [applying, setApplying]     = useState(false);
   const [results, setResults]       = useState<Record<string, boolean> | null>(null);
   const [errors, setErrors]         = useState<Record<string, string>>({});
+  const [unchanged, setUnchanged]   = useState<Set<number>>(new Set());
 
   // Fields to apply
   const [state, setState]           = useState("");
@@ -135,12 +136,16 @@ export default function BulkUpdateItems({ onToast }: Props) {
       });
       setResults(r.results);
       setErrors(r.errors || {});
+      setUnchanged(new Set(r.summary?.unchanged ?? []));
       const success = Object.values(r.results).filter(Boolean).length;
       const failed  = items.length - success;
+      const skipped = r.summary?.unchanged.length ?? 0;
+      const updated = success - skipped;
+      const note    = skipped ? `, ${skipped} already up to date` : "";
       onToast(
         failed === 0
-          ? `Updated ${success} item${success !== 1 ? "s" : ""}`
-          : `Updated ${success}, failed ${failed}`,
+          ? `Updated ${updated} item${updated !== 1 ? "s" : ""}${note}`
+          : `Updated ${updated}, failed ${failed}${note}`,
         failed === 0 ? "success" : "error",
       );
     } catch (e: any) {
@@ -334,7 +339,9 @@ export default function BulkUpdateItems({ onToast }: Props) {
                       {results && (
                         <td className="px-3 py-2 text-xs">
                           {ok
-                            ? <span className="text-green-600 font-medium">✓ updated</span>
+                            ? unchanged.has(item.id)
+                              ? <span className="text-gray-500 font-medium">= unchanged</span>
+                              : <span className="text-green-600 font-medium">✓ updated</span>
                             : <span className="text-red-600 font-medium">
                                 ✕ failed
                                 {errors[String(item.id)] && (
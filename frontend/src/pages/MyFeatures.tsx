@@ -1,9 +1,11 @@
 import { useState, useEffect } from "react";
-import { getFeatures, deleteWorkItems } from "../api";
+import { queryFeatures, deleteWorkItems } from "../api";
 import type { Feature } from "../types";
 
 interface Props { onToast: (msg: string, type: "success" | "error") => void }
 
+const PAGE_SIZE = 25;
+
 const STATE_COLORS: Record<string, string> = {
   "Active":      "bg-blue-100 text-blue-700",
   "New":         "bg-gray-100 text-gray-700",
@@ -22,12 +24,24 @@ export default function MyFeatures({ onToast }: Props) {
   const [loading, setLoading]     = useState(false);
   const [deleting, setDeleting]   = useState<number | null>(null);
   const [confirmId, setConfirmId] = useState<number | null>(null);
+  const [titleFilter, setTitleFilter] = useState("");
+  const [stateFilter, setStateFilter] = useState("");
+  const [nextCursor, setNextCursor]   = useState<string | null>(null);
+  const [total, setTotal]             = useState(0);
 
-  const load = async () => {
+  // Filters run server-side; `more` appends the next cursor page instead of reloading
+  const load = async (more = false) => {
     setLoading(true);
     try {
-      const data = await getFeatures();
-      setFeatures(data);
+      const page = await queryFeatures({
+        title: titleFilter.trim(),
+        state: stateFilter,
+        limit: PAGE_SIZE,
+        cursor: more ? nextCursor ?? undefined : undefined,
+      });
+      setFeatures(fs => more ? [...fs, ...page.features] : page.features);
+      setNextCursor(page.next_cursor);
+      setTotal(page.total);
     } catch (e: any) {
       onToast(e.response?.data?.detail || "Failed to load features", "error");
     } finally {
@@ -35,7 +49,7 @@ export default function MyFeatures({ onToast }: Props) {
     }
   };
 
-  useEffect(() => { load(); }, []);
+  useEffect(() => { load(); }, [stateFilter]);
 
   const handleDelete = async (id: number) => {
     setDeleting(id);
@@ -43,6 +57,7 @@ export default function MyFeatures({ onToast }: Props) {
     try {
       await deleteWorkItems([id]);
       setFeatures(fs => fs.filter(f => f.id !== id));
+      setTotal(t => t - 1);
       onToast(`Feature #${id} moved to recycle bin`, "success");
     } catch (e: any) {
       onToast(e.response?.data?.detail || `Failed to delete #${id}`, "error");
@@ -60,11 +75,25 @@ export default function MyFeatures({ onToast }: Props) {
             All Features created by claudeADO (tagged <code className="bg-gray-100 px-1 rounded text-xs">claudeADO</code>).
           </p>
         </div>
-        <button className="btn-secondary text-sm" onClick={load} disabled={loading}>
+        <button className="btn-secondary text-sm" onClick={() => load()} disabled={loading}>
           {loading ? "Refreshing..." : "Refresh"}
         </button>
       </div>
 
+      <form className="flex gap-2" onSubmit={e => { e.preventDefault(); load(); }}>
+        <input
+          className="form-input flex-1"
+          placeholder="Search titles..."
+          value={titleFilter}
+          onChange={e => setTitleFilter(e.target.value)}
+        />
+        <select className="form-input w-40" value={stateFilter} onChange={e => setStateFilter(e.target.value)}>
+          <option value="">All states</option>
+          {Object.keys(STATE_COLORS).filter(s => s !== "Removed").map(s => <option key={s} value={s}>{s}</option>)}
+        </select>
+        <button type="submit" className="btn-secondary text-sm" disabled={loading}>Search</button>
+      </form>
+
       {loading && features.length === 0 && (
         <div className="card text-center text-gray-500 py-12">Loading features...</div>
       )}
@@ -88,7 +117,7 @@ export default function MyFeatures({ onToast }: Props) {
                   </div>
                   <div className="font-semibold text-gray-900 mt-1 truncate">{f.title}</div>
                   <div className="flex gap-4 mt-1 text-xs text-gray-500 flex-wrap">
-                    {f.assigned_to    && <span>Assigned: {f.assigned_to}</span>}
+                    {f.assigned_to    && <span>Assigned: {f.assigned_to_name || f.assigned_to}</span>}
                     {f.area_path      && <span>Area: {f.area_path}</span>}
                     {f.iteration_path && <span>Sprint: {f.iteration_path.split("\\").pop()}</span>}
                   </div>
@@ -142,7 +171,16 @@ export default function MyFeatures({ onToast }: Props) {
               </div>
             </div>
           ))}
-          <p className="text-xs text-gray-400 text-right">{features.length} feature{features.length !== 1 ? "s" : ""} found</p>
+          {nextCursor && (
+            <div className="text-center">
+              <button className="btn-secondary text-sm" onClick={() => load(true)} disabled={loading}>
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
+          <p className="text-xs text-gray-400 text-right">
+            Showing {features.length} of {total} feature{total !== 1 ? "s" : ""}
+          </p>
         </div>
       )}
     </div>
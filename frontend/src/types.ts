@@ -18,6 +18,13 @@ export interface PBI {
   tasks: Task[];
 }
 
+export interface ParseRouting {
+  tier?: "small" | "medium" | "large";
+  model?: string;
+  max_tokens?: number;
+  latency_target?: number;  // seconds
+}
+
 export interface Hierarchy {
   feature: { title: string; description: string };
   pbis: PBI[];
@@ -48,10 +55,32 @@ export interface Feature {
   state: string;
   created_date: string;
   assigned_to: string;
+  assigned_to_name?: string;
   area_path: string;
   iteration_path: string;
   tags: string;
   ado_url: string;
 }
 
+export interface FeatureQuery {
+  state?: string;
+  assigned_to?: string;
+  area_path?: string;
+  iteration_path?: string;
+  created_from?: string;
+  created_to?: string;
+  title?: string;
+  sort?: "created_date" | "changed_date" | "title" | "state" | "id";
+  order?: "asc" | "desc";
+  limit?: number;
+  cursor?: string;
+  fields?: string[];
+}
+
+export interface FeaturePage {
+  features: Feature[];
+  total: number;
+  next_cursor: string | null;
+}
+
 export type Page = "create-text" | "create-single" | "update" | "bulk-update" | "delete" | "settings" | "features";
@@ -0,0 +1,140 @@
+"""
+ADO service hooks — turn workitem.created / updated / deleted / restored
+notifications into local cache invalidation.
+
+Configure a "Web Hooks" subscription in ADO (Project settings → Service hooks)
+pointing at POST /api/hooks/ado, and set the same shared secret in
+CLAUDEADO_HOOK_SECRET on the API host. ADO can send the secret either as the
+basic-auth password or as a custom `X-Hook-Secret: <secret>` header.
+"""
+import base64
+import hmac
+import os
+
+import config as cfg_module
+
+EVENTS = {
+    "workitem.created":  "created",
+    "workitem.restored": "created",
+    "workitem.updated":  "updated",
+    "workitem.deleted":  "deleted",
+}
+
+PARENT_REL = "System.LinkTypes.Hierarchy-Reverse"
+
+
+def secret() -> str:
+    return os.getenv("CLAUDEADO_HOOK_SECRET", "")
+
+
+def verify(authorization: str = "", header_secret: str = "") -> bool:
+    """Check the shared secret from a basic-auth header or X-Hook-Secret (constant-time)."""
+    expected = secret()
+    if not expected:
+        return False
+    candidates = [header_secret or ""]
+    if authorization.lower().startswith("basic "):
+        try:
+            decoded = base64.b64decode(authorization[6:]).decode()
+            candidates.append(decoded.partition(":")[2])
+        except (ValueError, UnicodeDecodeError):
+            pass
+    return any(hmac.compare_digest(c.encode(), expected.encode()) for c in candidates if c)
+
+
+def _id_from_url(url: str) -> int | None:
+    try:
+        return int(url.rstrip("/").rsplit("/", 1)[-1])
+    except (ValueError, AttributeError):
+        return None
+
+
+def _scope(base_url: str, project: str) -> str | None:
+    """Map the hook's org + project onto a configured profile's index scope.
+    Falls back to a unique project-name match, since ADO may report the org
+    as dev.azure.com/org while the profile uses org.visualstudio.com.
+    """
+    if not project:
+        return None
+    cfg     = cfg_module.load()
+    matches = []
+    for name in cfg_module.profile_names(cfg):
+        p = cfg_module.get_profile(name, cfg)
+        if (p.get("ado_project") or "").lower() != project.lower():
+            continue
+        org = (p.get("ado_org_url") or "").rstrip("/")
+        if base_url and org.lower() == base_url.rstrip("/").lower():
+            return f"{org}/{p['ado_project']}"
+        matches.append(f"{org}/{p['ado_project']}")
+    return matches[0] if len(set(matches)) == 1 else None
+
+
+def parse(payload: dict) -> dict | None:
+    """Normalise a service-hook payload. Returns None for events we don't handle, else
+    {"event": created|updated|deleted, "id", "item": raw work item (id, rev, fields) or None,
+     "type", "parent_ids": [old and new parents], "scope"}.
+    """
+    event = EVENTS.get(payload.get("eventType", ""))
+    res   = payload.get("resource") or {}
+    if event is None or not res:
+        return None
+
+    parents = set()
+    if event == "updated":
+        # resource is the update record; the full item is under "revision"
+        revision = res.get("revision") or {}
+        item_id  = res.get("workItemId") or revision.get("id")
+        fields   = revision.get("fields") or {}
+        rev      = revision.get("rev") or res.get("rev")
+        change   = (res.get("fields") or {}).get("System.Parent") or {}
+        parents.update([change.get("oldValue"), change.get("newValue")])
+        for kind in ("added", "removed"):
+            for rel in (res.get("relations") or {}).get(kind, []):
+                if rel.get("rel") == PARENT_REL:
+                    parents.add(_id_from_url(rel.get("url", "")))
+    else:
+        item_id = res.get("id")
+        fields  = res.get("fields") or {}
+        rev     = res.get("rev")
+        for rel in res.get("relations") or []:
+            if rel.get("rel") == PARENT_REL:
+                parents.add(_id_from_url(rel.get("url", "")))
+    if not item_id:
+        return None
+    parents.add(fields.get("System.Parent"))
+
+    containers = payload.get("resourceContainers") or {}
+    base_url   = (containers.get("account") or containers.get("collection") or {}).get("baseUrl", "")
+    item = None
+    if event != "deleted" and fields:
+        item = {"id": int(item_id), "fields": fields}
+        if rev is not None:
+            item["rev"] = rev
+    return {
+        "event":      event,
+        "id":         int(item_id),
+        "item":       item,
+        "type":       fields.get("System.WorkItemType"),
+        "parent_ids": sorted(int(p) for p in parents if p),
+        "scope":      _scope(base_url, fields.get("System.TeamProject", "")),
+    }
+
+
+def sample(event: str, item_id: int, rev: int = 1, title: str = "", wit_type: str = "Task",
+           project: str = "", base_url: str = "", parent_id: int = None) -> dict:
+    """Build a minimal payload in ADO's shape — for the replay tool and local testing."""
+    fields = {"System.Id": item_id, "System.Rev": rev, "System.WorkItemType": wit_type,
+              "System.Title": title or f"Work item {item_id}", "System.TeamProject": project}
+    if parent_id:
+        fields["System.Parent"] = parent_id
+    item = {"id": item_id, "rev": rev, "fields": fields}
+    if event == "workitem.updated":
+        resource = {"id": rev, "workItemId": item_id, "rev": rev,
+                    "fields": {"System.Rev": {"oldValue": rev - 1, "newValue": rev}}, "revision": item}
+    else:
+        resource = item
+    return {
+        "eventType":          event,
+        "resource":           resource,
+        "resourceContainers": {"account": {"baseUrl": base_url}} if base_url else {},
+    }
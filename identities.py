@@ -0,0 +1,162 @@
+"""
+Identity resolution cache for AssignedTo values.
+
+Emails and display names are resolved once to ADO identities (through the
+organisation's IdentityPicker endpoint — mock_ado.py serves a stand-in for
+local runs) and cached in memory and in a local SQLite file for IDENTITY_TTL;
+names that don't resolve are remembered for NEGATIVE_TTL. Writes then send the
+identity's unique name, so every item agrees on one form, ADO doesn't have to
+resolve the same string again, and a typo is reported once — before the first
+write — instead of failing item by item.
+
+Resolution fails open: if the lookup endpoint itself is unavailable the value
+is passed through unchanged and ADO remains the judge.
+"""
+import difflib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+IDENTITY_FILE = Path(__file__).parent / "identities.db"
+IDENTITY_TTL  = 7 * 86400
+NEGATIVE_TTL  = 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS identities (
+    org     TEXT NOT NULL,
+    query   TEXT NOT NULL,
+    data    TEXT NOT NULL,   -- {"identity": {...}} or {"error": "..."}
+    expires REAL NOT NULL,
+    PRIMARY KEY (org, query)
+);
+"""
+
+
+class IdentityError(ValueError):
+    """An AssignedTo value matched no identity, or more than one."""
+
+
+def identity_from_picker(raw: dict) -> dict:
+    """IdentityPicker result → {unique_name, display_name, descriptor, id}."""
+    return {
+        "unique_name":  raw.get("signInAddress") or raw.get("mail") or "",
+        "display_name": raw.get("displayName") or "",
+        "descriptor":   raw.get("subjectDescriptor") or "",
+        "id":           raw.get("localId") or raw.get("originId") or "",
+    }
+
+
+def match(query: str, candidates: list[dict]) -> dict:
+    """Pick the identity `query` names: an exact (case-insensitive) email or display
+    name — never a fuzzy guess. Raises IdentityError with suggestions otherwise.
+    """
+    q = query.strip().casefold()
+    if "@" in q:
+        exact = [c for c in candidates if c["unique_name"].casefold() == q]
+    else:
+        exact = [c for c in candidates if c["display_name"].casefold() == q]
+    unique = {c["unique_name"].casefold(): c for c in exact}
+    if len(unique) == 1:
+        return next(iter(unique.values()))
+    if len(unique) > 1:
+        raise IdentityError(f"Assignee '{query}' is ambiguous: "
+                            f"{', '.join(sorted(c['unique_name'] for c in unique.values()))} — use the email")
+    names = [c["unique_name"] for c in candidates] + [c["display_name"] for c in candidates]
+    close = difflib.get_close_matches(query, names, n=1, cutoff=0.6)
+    hint  = f" (did you mean '{close[0]}'?)" if close else ""
+    raise IdentityError(f"Unknown assignee '{query}'{hint}")
+
+
+class IdentityCache:
+    def __init__(self, path: str | Path = None):
+        self.path   = Path(path) if path else None  # None = IDENTITY_FILE, looked up on first use
+        self._lock  = threading.Lock()
+        self._mem   = {}  # (org, query) → (data, expires)
+        self._conn  = None
+        self._stats = {"hits": 0, "lookups": 0, "lookup_failures": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path or IDENTITY_FILE, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _get(self, org: str, query: str) -> dict | None:
+        key = (org, query)
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is None:
+                row = self._db().execute(
+                    "SELECT data, expires FROM identities WHERE org = ? AND query = ?", key
+                ).fetchone()
+                if row is not None:
+                    hit = self._mem[key] = (json.loads(row[0]), row[1])
+            if hit is None or hit[1] < time.time():
+                return None
+            self._stats["hits"] += 1
+            return hit[0]
+
+    def _put(self, org: str, queries: list[str], data: dict, ttl: float):
+        expires = time.time() + ttl
+        with self._lock:
+            for q in dict.fromkeys(q for q in queries if q):
+                self._mem[(org, q)] = (data, expires)
+                self._db().execute(
+                    "INSERT OR REPLACE INTO identities (org, query, data, expires) VALUES (?, ?, ?, ?)",
+                    (org, q, json.dumps(data), expires),
+                )
+
+    def resolve(self, client, value: str) -> dict | None:
+        """The identity `value` names, or None when the lookup endpoint is unavailable.
+        Raises IdentityError for unknown or ambiguous values.
+        """
+        query = value.strip().casefold()
+        org   = client.org_url
+        data  = self._get(org, query)
+        if data is None:
+            with self._lock:
+                self._stats["lookups"] += 1
+            candidates = client.lookup_identities(value.strip())
+            if candidates is None:
+                with self._lock:
+                    self._stats["lookup_failures"] += 1
+                return None
+            if not candidates:
+                # Nothing matched verbatim: look up the first name / mailbox part, for hints
+                broad = value.strip().split("@")[0].split()[:1]
+                if broad and broad[0].casefold() != query:
+                    candidates = client.lookup_identities(broad[0]) or []
+            try:
+                identity = match(value, candidates)
+            except IdentityError as e:
+                data = {"error": str(e)}
+                self._put(org, [query], data, NEGATIVE_TTL)
+            else:
+                data = {"identity": identity}
+                # Also under its unique name, never its display name: several people can share one
+                self._put(org, [query, identity["unique_name"].casefold()], data, IDENTITY_TTL)
+        if "error" in data:
+            raise IdentityError(data["error"])
+        return data["identity"]
+
+    def normalize(self, client, value: str) -> str:
+        """The unique name to write for `value` ("" stays ""). Raises IdentityError."""
+        if not value or not value.strip():
+            return value
+        identity = self.resolve(client, value)
+        return value.strip() if identity is None else identity["unique_name"]
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._db().execute("DELETE FROM identities")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "cached": len(self._mem)}
+
+
+cache = IdentityCache()
@@ -3,9 +3,12 @@ LLM Parser — uses Claude to convert free-form text into a
 structured Feature → PBI → Task hierarchy (JSON).
 """
 import os
+import re
 import sys
 import json
 import anthropic
+
+import config as cfg_module
 from rich.console import Console
 from rich.prompt import Prompt
 
@@ -50,43 +53,266 @@ Return ONLY a valid JSON object with this exact structure — no commentary, no
 }"""
 
 
-def parse_text_to_hierarchy(text: str, api_key: str) -> dict | None:
-    """Send text to Claude and get back a structured hierarchy dict."""
-    client = anthropic.Anthropic(api_key=api_key)
+MAX_CONTINUATIONS  = 2     # extra calls allowed when the reply is cut off at max_tokens
+CONTINUE_PROMPT    = ("Your previous reply was cut off. Continue the JSON exactly where it stopped — "
+                      "output only the remaining characters, no repetition, no commentary.")
+EFFORT_RANGE       = (1, 10)
+
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_LEADING_FENCE_RE = re.compile(r"^\s*```(?:json)?[ \t]*\r?\n", re.IGNORECASE)
 
-    console.print("\n[cyan]Sending to Claude for analysis...[/cyan]")
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=8096,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Convert the following project plan into ADO work items:\n\n{text}"
-                }
-            ]
-        )
 
-        raw = message.content[0].text.strip()
+def _extract_json(raw: str) -> str:
+    """Drop markdown fences and any prose around the outermost JSON object."""
+    text  = _FENCE_RE.sub("", raw)
+    start = text.find("{")
+    if start < 0:
+        return ""
+    body = text[start:text.rfind("}") + 1]
+    # An unterminated object (truncated reply) keeps everything after the first brace
+    return body if body and _balanced(body) else text[start:]
 
-        # Strip markdown fences if Claude wraps it anyway
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-        raw = raw.strip()
 
-        hierarchy = json.loads(raw)
-        return hierarchy
+def _scan(text: str) -> tuple[list[str], bool, list[int]]:
+    """Walk JSON text outside strings. Returns (open bracket stack, inside-string flag,
+    positions of structural characters where a truncated document can be cut).
+    """
+    stack, cuts, in_str, esc = [], [], False, False
+    for i, ch in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            if ch == "[":
+                cuts.append(i + 1)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cuts.append(i + 1)
+        elif ch == ",":
+            cuts.append(i)
+    return stack, in_str, cuts
 
-    except json.JSONDecodeError as e:
-        console.print(f"[red]Failed to parse Claude response as JSON: {e}[/red]")
-        console.print(f"[dim]Raw response: {raw[:500]}[/dim]")
+
+def _balanced(text: str) -> bool:
+    stack, in_str, _ = _scan(text)
+    return not stack and not in_str
+
+
+def _close(text: str) -> str | None:
+    """Close the open brackets of a prefix that ends on a value boundary."""
+    text = re.sub(r",\s*$", "", text.rstrip())
+    stack, in_str, _ = _scan(text)
+    if in_str:
         return None
+    return text + "".join(reversed(stack))
+
+
+def repair_json(raw: str) -> dict | None:
+    """Best-effort local repair of near-valid JSON: strips fences/prose and trailing
+    commas, and for truncated output cuts back to the last complete value and closes
+    the open brackets. Returns the parsed object, or None if nothing usable remains.
+    """
+    text = _extract_json(raw)
+    if not text:
+        return None
+    text = re.sub(r",(\s*[}\]])", r"\1", text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    _, _, cuts = _scan(text)
+    for cut in reversed(cuts[-200:]):
+        candidate = _close(text[:cut])
+        if candidate is None:
+            continue
+        try:
+            value = json.loads(re.sub(r",(\s*[}\]])", r"\1", candidate))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def validate_hierarchy(data) -> tuple[dict | None, list[str]]:
+    """Check and normalise a parsed hierarchy against the schema in SYSTEM_PROMPT.
+    Fixable problems (string efforts, out-of-range efforts, blank items) are corrected
+    and reported; returns (None, problems) if there is no usable Feature or PBI.
+    """
+    problems = []
+    if not isinstance(data, dict):
+        return None, ["response is not a JSON object"]
+    feature = data.get("feature")
+    if not isinstance(feature, dict) or not str(feature.get("title") or "").strip():
+        return None, ["missing feature title"]
+    out = {"feature": {"title": str(feature["title"]).strip(),
+                       "description": str(feature.get("description") or "").strip()},
+           "pbis": []}
+    lo, hi = EFFORT_RANGE
+    for i, pbi in enumerate(data.get("pbis") or []):
+        if not isinstance(pbi, dict) or not str(pbi.get("title") or "").strip():
+            problems.append(f"PBI {i + 1} dropped: no title")
+            continue
+        tasks = []
+        for task in pbi.get("tasks") or []:
+            if not isinstance(task, dict) or not str(task.get("title") or "").strip():
+                problems.append(f"untitled task dropped under '{pbi['title']}'")
+                continue
+            try:
+                effort = int(round(float(task.get("effort"))))
+            except (TypeError, ValueError):
+                problems.append(f"task '{task['title']}' had no valid effort; set to {lo}")
+                effort = lo
+            if not lo <= effort <= hi:
+                problems.append(f"task '{task['title']}' effort {effort} clamped to {lo}–{hi}")
+                effort = min(max(effort, lo), hi)
+            tasks.append({"title": str(task["title"]).strip(), "effort": effort})
+        if not tasks:
+            problems.append(f"PBI '{pbi['title']}' has no tasks")
+        out["pbis"].append({"title": str(pbi["title"]).strip(),
+                            "description": str(pbi.get("description") or "").strip(),
+                            "tasks": tasks})
+    if not out["pbis"]:
+        return None, problems + ["no PBIs"]
+    return out, problems
+
+
+def _merge_continuation(head: str, tail: str) -> str:
+    """Join a continuation onto the cut-off text, dropping any overlap the model repeated."""
+    # A fence opening the continuation takes its line break with it: the cut may be mid-string
+    tail = _FENCE_RE.sub("", _LEADING_FENCE_RE.sub("", tail))
+    for size in range(min(len(head), len(tail), 200), 7, -1):
+        if head.endswith(tail[:size]):
+            return head + tail[size:]
+    return head + tail
+
+
+def _estimate(tier: dict, tokens: float) -> float:
+    """Seconds for a reply of `tokens` output tokens from this tier."""
+    return tier.get("overhead_sec", 1.0) + tokens / max(tier.get("tokens_per_sec", 50), 1)
+
+
+def route(text: str, override: dict = None) -> dict:
+    """Pick model and output budget for a plan from config.PARSE_ROUTING.
+
+    The tier comes from the input size (or override["tier"]). The budget scales
+    with the input, capped by the tier, and is never cut to chase a latency
+    target — a truncated plan costs more (continuations, repair) than it saves.
+    With a latency target, the expected reply time (expected_tokens_per_char of
+    output per input character) is checked; if the tier misses it, the fastest
+    tier that meets it is used instead, and if none does the size-based tier is
+    kept and target_missed is set. override may also pin "model" and "max_tokens"
+    (1 up to the largest tier cap). Raises ValueError on a bad override.
+    Returns {"tier", "model", "max_tokens", "estimated_sec", "target_missed", "timeout"}.
+    """
+    override = {k: v for k, v in (override or {}).items() if v is not None}
+    policy   = cfg_module.parse_routing()
+    tiers    = policy["tiers"]
+    chars    = len(text)
+    if "tier" in override:
+        tier = next((t for t in tiers if t["name"] == override["tier"]), None)
+        if tier is None:
+            raise ValueError(f"Unknown parse tier '{override['tier']}'. Allowed: {', '.join(t['name'] for t in tiers)}")
+    else:
+        tier = next((t for t in tiers if t.get("max_chars") is None or chars <= t["max_chars"]), tiers[-1])
+    ceiling = max(t["max_tokens"] for t in tiers)
+    if "max_tokens" in override and not 1 <= override["max_tokens"] <= ceiling:
+        raise ValueError(f"max_tokens must be between 1 and {ceiling}")
+
+    floor    = policy.get("min_tokens", 1024)
+    wanted   = int(floor + chars * policy.get("tokens_per_char", 0.5))
+    expected = policy.get("expected_min_tokens", 256) + chars * policy.get("expected_tokens_per_char", 0.35)
+    target   = override.get("latency_target", policy.get("latency_target"))
+    missed   = False
+    if target and "model" not in override and _estimate(tier, min(expected, tier["max_tokens"])) > target:
+        # Only a tier whose output cap still holds the whole plan may replace the size-based one
+        faster = [t for t in tiers
+                  if t["max_tokens"] >= min(wanted, tier["max_tokens"])
+                  and _estimate(t, min(expected, t["max_tokens"])) <= target]
+        if faster and "tier" not in override:
+            tier = max(faster, key=lambda t: t.get("tokens_per_sec", 0))
+        else:
+            missed = True
+    model  = override.get("model", tier["model"])
+    budget = int(override.get("max_tokens", min(tier["max_tokens"], wanted)))
+    return {
+        "tier":          tier["name"],
+        "model":         model,
+        "max_tokens":    budget,
+        "estimated_sec": round(_estimate(tier, min(expected, budget)), 1),
+        "target_missed": missed,
+        # Hard stop per call, well clear of a reply that uses the whole budget
+        "timeout":       round(max(10.0, _estimate(tier, budget) * 2), 1),
+    }
+
+
+def parse_text_to_hierarchy(text: str, api_key: str, routing: dict = None) -> dict | None:
+    """Send text to Claude and get back a structured hierarchy dict.
+    Model and budget come from route(text, routing) — see config.PARSE_ROUTING.
+
+    A reply cut off at max_tokens is continued (up to MAX_CONTINUATIONS short calls)
+    rather than re-run; what still fails to parse is repaired locally. The result is
+    validated against the hierarchy schema before it is returned.
+    """
+    plan   = route(text, routing)
+    client = anthropic.Anthropic(api_key=api_key, timeout=plan["timeout"], max_retries=1)
+    prompt = {"role": "user", "content": f"Convert the following project plan into ADO work items:\n\n{text}"}
+
+    console.print(f"\n[cyan]Sending to Claude for analysis...[/cyan] "
+                  f"[dim]({plan['tier']}: {plan['model']}, {plan['max_tokens']} tokens, ~{plan['estimated_sec']}s)[/dim]")
+    if plan["target_missed"]:
+        console.print("  [yellow]Latency target can't be met for a plan this size — keeping the full output budget[/yellow]")
+    raw, continuations = "", 0
+    try:
+        message = client.messages.create(
+            model=plan["model"], max_tokens=plan["max_tokens"], system=SYSTEM_PROMPT, messages=[prompt],
+        )
+        raw = "".join(b.text for b in message.content if getattr(b, "type", "text") == "text")
+        while message.stop_reason == "max_tokens" and continuations < MAX_CONTINUATIONS:
+            continuations += 1
+            console.print(f"  [dim]Reply hit max_tokens — asking for a continuation ({continuations}/{MAX_CONTINUATIONS})[/dim]")
+            message = client.messages.create(
+                model=plan["model"], max_tokens=plan["max_tokens"], system=SYSTEM_PROMPT,
+                messages=[prompt, {"role": "assistant", "content": raw.rstrip()},
+                          {"role": "user", "content": CONTINUE_PROMPT}],
+            )
+            raw = _merge_continuation(raw.rstrip(), "".join(
+                b.text for b in message.content if getattr(b, "type", "text") == "text"))
     except Exception as e:
         console.print(f"[red]Claude API error: {e}[/red]")
-        return None
+        if not raw:
+            return None
+
+    # A ```json fence or a line of prose around the object is unwrapping, not repair
+    try:
+        data = json.loads(_extract_json(raw))
+    except json.JSONDecodeError:
+        data = repair_json(raw)
+        if data is None:
+            console.print("[red]Failed to parse Claude response as JSON, even after repair[/red]")
+            console.print(f"[dim]Raw response: {raw[:500]}[/dim]")
+            return None
+        console.print("  [yellow]Claude's JSON was incomplete or malformed — repaired locally[/yellow]")
+    else:
+        if continuations:
+            console.print(f"  [yellow]Claude's reply was cut off and continued over {continuations} extra "
+                          f"call(s) — check the end of the plan[/yellow]")
+
+    hierarchy, problems = validate_hierarchy(data)
+    for p in problems:
+        console.print(f"  [yellow]⚠ {p}[/yellow]")
+    if hierarchy is None:
+        console.print("[red]Claude response does not describe a usable hierarchy[/red]")
+    return hierarchy
 
 
 def get_api_key() -> str:
@@ -0,0 +1,256 @@
+"""
+Concurrent load test for the FastAPI backend.
+
+Runs api.py in-process against the local ADO/Claude mock (mock_ado.py) and
+drives a weighted mix of endpoints from N simulated users, then reports
+latency percentiles, throughput and error rates per endpoint.
+
+Usage:
+    python loadtest.py                              # 20 users for 30s
+    python loadtest.py --users 50 --duration 60
+    python loadtest.py --mix features=5,batch=3,bulk-update=2 --ado-latency 80
+    python loadtest.py --json results.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+import mock_ado
+
+console = Console()
+
+DEFAULT_MIX = {
+    "features":    30,
+    "batch":       30,
+    "parse":       10,
+    "create":       5,
+    "bulk-update": 25,
+}
+
+PLAN_TEXT = "Phase 1: build the importer, add validation and write docs.\nPhase 2: ship the dashboard."
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def seed(store: mock_ado.MockStore, base_url: str, features: int) -> dict:
+    """Create tagged Features with PBIs and Tasks so read endpoints have data."""
+    feature_ids, child_ids = [], []
+    for f in range(features):
+        feature = store.create("Feature", [
+            {"op": "add", "path": "/fields/System.Title", "value": f"Seed feature {f}"},
+            {"op": "add", "path": "/fields/System.Tags", "value": "claudeADO"},
+            {"op": "add", "path": "/fields/System.AssignedTo", "value": "loadtest@example.com"},
+        ], base_url)
+        feature_ids.append(feature["id"])
+        for p in range(3):
+            pbi = store.create("Product Backlog Item", [
+                {"op": "add", "path": "/fields/System.Title", "value": f"Seed PBI {f}.{p}"},
+                {"op": "add", "path": "/relations/-", "value": {
+                    "rel": "System.LinkTypes.Hierarchy-Reverse", "url": feature["url"]}},
+            ], base_url)
+            child_ids.append(pbi["id"])
+            for t in range(3):
+                task = store.create("Task", [
+                    {"op": "add", "path": "/fields/System.Title", "value": f"Seed task {f}.{p}.{t}"},
+                    {"op": "add", "path": "/fields/Microsoft.VSTS.Scheduling.Effort", "value": t + 1},
+                    {"op": "add", "path": "/relations/-", "value": {
+                        "rel": "System.LinkTypes.Hierarchy-Reverse", "url": pbi["url"]}},
+                ], base_url)
+                child_ids.append(task["id"])
+    return {"features": feature_ids, "children": child_ids}
+
+
+def _request(session: requests.Session, base: str, name: str, seeded: dict) -> requests.Response:
+    if name == "features":
+        return session.get(f"{base}/api/features")
+    if name == "batch":
+        ids = random.sample(seeded["children"], min(10, len(seeded["children"])))
+        return session.get(f"{base}/api/workitems/batch", params={"ids": ",".join(map(str, ids))})
+    if name == "parse":
+        return session.post(f"{base}/api/parse", json={"text": PLAN_TEXT})
+    if name == "create":
+        return session.post(f"{base}/api/create", json={"hierarchy": mock_ado.SAMPLE_HIERARCHY})
+    if name == "bulk-update":
+        ids = random.sample(seeded["children"], min(5, len(seeded["children"])))
+        return session.post(f"{base}/api/workitems/bulk-update", json={
+            "ids": ids,
+            "state": random.choice(["New", "Active", "Resolved"]),
+            "parent_id": random.choice(seeded["features"]),
+        })
+    raise ValueError(name)
+
+
+def run(base: str, seeded: dict, mix: dict, users: int, duration: float, timeout: float) -> dict:
+    """Drive the endpoint mix from `users` threads for `duration` seconds."""
+    names, weights = list(mix), list(mix.values())
+    samples = {n: [] for n in names}
+    errors  = {n: 0 for n in names}
+    limited = {n: 0 for n in names}  # 429s from admission control — expected under load, not errors
+    lock    = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def user_loop(n: int):
+        session = requests.Session()
+        session.headers["X-User"] = f"loadtest-{n}"
+        while time.perf_counter() < stop_at:
+            name  = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                r      = _request(session, base, name, seeded)
+                status = r.status_code
+            except requests.RequestException:
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples[name].append(elapsed)
+                if status == 429:
+                    limited[name] += 1
+                elif status is None or status >= 400:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=user_loop, args=(n,), daemon=True) for n in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=duration + timeout)
+    wall = time.perf_counter() - started
+
+    report = {"users": users, "duration_s": round(wall, 2), "endpoints": {}}
+    for name in names:
+        lat = sorted(samples[name])
+        report["endpoints"][name] = {
+            "requests":   len(lat),
+            "errors":     errors[name],
+            "error_rate": round(errors[name] / len(lat), 4) if lat else 0.0,
+            "throttled":  limited[name],
+            "rps":        round(len(lat) / wall, 2),
+            "p50_ms":     round(_percentile(lat, 50) * 1000, 1),
+            "p95_ms":     round(_percentile(lat, 95) * 1000, 1),
+            "p99_ms":     round(_percentile(lat, 99) * 1000, 1),
+            "max_ms":     round(lat[-1] * 1000, 1) if lat else 0.0,
+        }
+    total = sum(len(v) for v in samples.values())
+    report["total_requests"] = total
+    report["total_rps"]      = round(total / wall, 2)
+    return report
+
+
+def print_report(report: dict):
+    t = Table(title=f"{report['users']} users · {report['duration_s']}s · {report['total_rps']} req/s",
+              box=box.ROUNDED)
+    for col in ("Endpoint", "Reqs", "Req/s", "Errors", "429s", "p50 ms", "p95 ms", "p99 ms", "Max ms"):
+        t.add_column(col, justify="left" if col == "Endpoint" else "right")
+    for name, s in report["endpoints"].items():
+        err_style = "red" if s["errors"] else "dim"
+        t.add_row(name, str(s["requests"]), f"{s['rps']:.1f}",
+                  f"[{err_style}]{s['errors']} ({s['error_rate']:.1%})[/{err_style}]",
+                  f"[{'yellow' if s['throttled'] else 'dim'}]{s['throttled']}[/]",
+                  f"{s['p50_ms']:.1f}", f"{s['p95_ms']:.1f}", f"{s['p99_ms']:.1f}", f"{s['max_ms']:.1f}")
+    console.print(t)
+
+
+def start_app(org_url: str, port: int, rate_limit: float):
+    """Point the app at the mock and run uvicorn on a background thread."""
+    import uvicorn
+    import config as cfg_module
+    import auth as auth_module
+    import search_index
+    import identities
+    import shared_state
+    import write_queue
+
+    # Every on-disk store goes to a throwaway directory: a load test must never flush a
+    # real write queue, share real tokens, or leave files in the checkout
+    workdir = Path(tempfile.mkdtemp(prefix="claudeado-loadtest-"))
+    cfg_module.CONFIG_FILE     = workdir / "config.json"
+    search_index.INDEX_FILE    = workdir / "search_index.db"
+    identities.IDENTITY_FILE   = workdir / "identities.db"
+    write_queue.QUEUE_FILE     = workdir / "write_queue.db"
+    shared_state.STATE_FILE    = workdir / "shared_state.db"
+    if shared_state.enabled():
+        os.environ["CLAUDEADO_SHARED_STATE"] = "1"  # → STATE_FILE, not a configured path
+    cfg_module.save({
+        "ado_org_url":    org_url,
+        "ado_project":    mock_ado.MOCK_PROJECT,
+        "assigned_to":    "loadtest@example.com",
+        "area_path":      "",
+        "iteration_path": "",
+        "azureauth_path": "",
+        "rate_limit":     rate_limit,
+        "admission":      {"trusted_proxies": ["127.0.0.1"]},  # the load test speaks for many users via X-User
+    })
+    auth_module._token_cache["default"] = "loadtest-token"
+
+    from api import app
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="claudeADO — concurrent API load test")
+    parser.add_argument("--users",          type=int,   default=20,   help="Concurrent simulated users")
+    parser.add_argument("--duration",       type=float, default=30.0, help="Test length in seconds")
+    parser.add_argument("--mix",            type=str,   default="",   help="Endpoint weights, e.g. features=3,batch=1")
+    parser.add_argument("--seed-features",  type=int,   default=25,   help="Features to pre-populate in the mock")
+    parser.add_argument("--ado-latency",    type=float, default=50.0, help="Mock ADO latency per call (ms)")
+    parser.add_argument("--claude-latency", type=float, default=1500.0, help="Mock Claude latency per call (ms)")
+    parser.add_argument("--rate-limit",     type=float, default=1000.0, help="ADO request budget (req/s) for the app")
+    parser.add_argument("--port",           type=int,   default=8765, help="Port for the API under test")
+    parser.add_argument("--timeout",        type=float, default=60.0, help="Grace period for in-flight requests")
+    parser.add_argument("--json",           type=str,   default="",   help="Also write the report to this file")
+    args = parser.parse_args()
+
+    mock = mock_ado.serve(ado_latency=args.ado_latency / 1000, claude_latency=args.claude_latency / 1000)
+    org_url = mock_ado.mock_org_url(mock)
+    os.environ["ANTHROPIC_BASE_URL"] = org_url
+    os.environ["ANTHROPIC_API_KEY"]  = "loadtest"
+
+    seeded = seed(mock.RequestHandlerClass.store, f"{org_url}/{mock_ado.MOCK_PROJECT}", args.seed_features)
+    start_app(org_url, args.port, args.rate_limit)
+
+    mix = _parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    console.print(f"[cyan]Running {args.users} users for {args.duration:.0f}s against mock ADO at {org_url}...[/cyan]")
+    base   = f"http://127.0.0.1:{args.port}"
+    report = run(base, seeded, mix, args.users, args.duration, args.timeout)
+    report["server_stats"] = requests.get(f"{base}/api/stats").json()
+    print_report(report)
+    console.print(f"[dim]Server stats: {json.dumps(report['server_stats'])}[/dim]")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        console.print(f"[dim]Report written to {args.json}[/dim]")
+
+
+if __name__ == "__main__":
+    main()
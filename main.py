@@ -3,26 +3,43 @@ claudeADO — Convert text to ADO work items using Claude AI.
 
 Usage:
     python main.py                  # Interactive menu
+    python main.py --concurrency 8  # Up to 8 ADO calls in flight for bulk operations
     python main.py --configure      # Re-run configuration
+    python main.py --profile contoso              # Use a named connection profile
+    python main.py --profile contoso --configure  # Create/edit that profile
 """
 import os
 import sys
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.prompt import Prompt, Confirm, IntPrompt
+from rich.progress import (
+    BarColumn, MofNCompleteColumn, Progress, ProgressColumn, SpinnerColumn, TextColumn,
+    TimeElapsedColumn, TimeRemainingColumn,
+)
+from rich.text import Text
 from rich import box
 
 import config as cfg_module
 import auth
+import profiles
 from ado_client import ADOClient
+from workitem import WorkItem
 from llm_parser import parse_text_to_hierarchy, get_api_key
+import outline_parser
+import reconcile
+import export as export_module
 
 load_dotenv()
 console = Console()
 
+DEFAULT_CONCURRENCY = 4
+
 BANNER = """
  ██████╗██╗      █████╗ ██╗   ██╗██████╗ ███████╗ █████╗ ██████╗  ██████╗
 ██╔════╝██║     ██╔══██╗██║   ██║██╔══██╗██╔════╝██╔══██╗██╔══██╗██╔═══██╗
@@ -34,38 +51,25 @@ BANNER = """
 
 
 def get_client(cfg: dict) -> ADOClient:
-    token = auth.get_token(cfg.get("azureauth_path", ""))
-    return ADOClient(
-        org_url=cfg["ado_org_url"],
-        project=cfg["ado_project"],
-        token=token,
-    )
+    return profiles.get_client(cfg.get("name"))
 
 
 # ─────────────────────────────────────────────
 # 1. CREATE FROM TEXT
 # ─────────────────────────────────────────────
-def create_from_text(cfg: dict):
+def create_from_text(cfg: dict, concurrency: int = DEFAULT_CONCURRENCY):
     console.print(Panel(
         "Paste or type your project plan below.\n"
         "Enter a blank line followed by [bold]END[/bold] on its own line when done.",
         title="Create from Text", style="cyan"
     ))
 
-    lines = []
-    while True:
-        line = input()
-        if line.strip().upper() == "END":
-            break
-        lines.append(line)
-    text = "\n".join(lines).strip()
-
+    text = _read_text()
     if not text:
         console.print("[yellow]No text provided.[/yellow]")
         return
 
-    api_key = get_api_key()
-    hierarchy = parse_text_to_hierarchy(text, api_key)
+    hierarchy = outline_parser.parse(text) or parse_text_to_hierarchy(text, get_api_key())
     if not hierarchy:
         return
 
@@ -81,14 +85,30 @@ def create_from_text(cfg: dict):
     iteration_path = Prompt.ask("  Iteration Path", default=cfg.get("iteration_path", ""))
     assigned_to    = Prompt.ask("  Assigned To",    default=cfg.get("assigned_to", ""))
 
-    client  = get_client(cfg)
-    results = client.create_hierarchy(
-        hierarchy=hierarchy,
-        assigned_to=assigned_to,
-        area_path=area_path,
-        iteration_path=iteration_path,
-    )
-
+    client = get_client(cfg)
+    total  = 1 + sum(1 + len(p.get("tasks", [])) for p in hierarchy.get("pbis", []))
+    with _progress() as progress:
+        task = progress.add_task("Creating work items", total=total)
+
+        def advance(kind, title, item, skipped):
+            if item is None:
+                note = f" — skipping {skipped} child item(s)" if skipped else ""
+                progress.console.print(f"  [red]✗ Failed to create {kind}: {title}{note}[/red]")
+            progress.advance(task, 1 + skipped)
+
+        results = client.create_hierarchy(
+            hierarchy=hierarchy,
+            assigned_to=assigned_to,
+            area_path=area_path,
+            iteration_path=iteration_path,
+            max_workers=concurrency,
+            on_progress=advance,
+        )
+
+    if results["cancelled"]:
+        created = bool(results["feature"]) + sum(1 + len(p["tasks"]) for p in results["pbis"])
+        why     = results["error"] or "Cancelled"
+        console.print(f"\n[yellow]{why} — {created} of {total} item(s) were created before stopping.[/yellow]")
     _print_summary(results, cfg)
 
 
@@ -159,16 +179,16 @@ def update_item(cfg: dict):
         console.print(f"[red]Work item {item_id} not found.[/red]")
         return
 
-    f = item["fields"]
-    console.print(f"\n  [bold]{f['System.WorkItemType']} #{item_id}:[/bold] {f['System.Title']}")
-    console.print(f"  State:     {f.get('System.State', '')}")
-    console.print(f"  Assigned:  {f.get('System.AssignedTo', {}).get('uniqueName', '') if isinstance(f.get('System.AssignedTo'), dict) else f.get('System.AssignedTo', '')}")
+    w = WorkItem.from_ado(item, client.org_url, client.project)
+    console.print(f"\n  [bold]{w.type} #{item_id}:[/bold] {w.title}")
+    console.print(f"  State:     {w.state}")
+    console.print(f"  Assigned:  {w.assigned_to}")
 
     console.print("\n  [dim]Which fields to update? Leave blank to skip.[/dim]")
     updates = {}
 
-    new_title = Prompt.ask("  New title", default=f.get("System.Title", ""))
-    if new_title != f.get("System.Title", ""):
+    new_title = Prompt.ask("  New title", default=w.title)
+    if new_title != w.title:
         updates["System.Title"] = new_title
 
     new_state = Prompt.ask("  New state (New/Active/Resolved/Closed or blank)", default="")
@@ -201,7 +221,7 @@ def update_item(cfg: dict):
 # ─────────────────────────────────────────────
 # 4. DELETE WORK ITEMS
 # ─────────────────────────────────────────────
-def delete_items(cfg: dict):
+def delete_items(cfg: dict, concurrency: int = DEFAULT_CONCURRENCY):
     console.print(Panel("Delete Work Items", style="cyan"))
     ids_input = Prompt.ask("  Work item IDs to delete (comma-separated, e.g. 123,456,789)")
     ids = [int(x.strip()) for x in ids_input.split(",") if x.strip().isdigit()]
@@ -216,17 +236,167 @@ def delete_items(cfg: dict):
         return
 
     client = get_client(cfg)
-    for item_id in ids:
-        ok = client.delete_work_item(item_id)
-        if ok:
-            console.print(f"  [green]OK Deleted ID={item_id}[/green]")
-        else:
-            console.print(f"  [red]✗ Failed to delete ID={item_id}[/red]")
+    done, cancelled = _run_concurrently("Deleting", client.delete_work_item, ids, concurrency)
+    deleted = [i for i in ids if done.get(i) is True]
+    failed  = [i for i in ids if i in done and done[i] is not True]
+    console.print(f"  [green]OK Deleted {len(deleted)} item(s).[/green]")
+    for item_id in failed:
+        reason = done[item_id] if isinstance(done[item_id], Exception) else "ADO refused the delete"
+        console.print(f"  [red]✗ Failed to delete ID={item_id}: {reason}[/red]")
+    if cancelled:
+        console.print(f"  [yellow]Cancelled — not attempted: {cancelled}[/yellow]")
+
+
+# ─────────────────────────────────────────────
+# 5. RE-PLAN AN EXISTING FEATURE
+# ─────────────────────────────────────────────
+def replan_feature(cfg: dict):
+    console.print(Panel(
+        "Paste the updated plan for an existing Feature.\n"
+        "Only the differences (new, changed, moved and removed items) are written to ADO.\n"
+        "Enter [bold]END[/bold] on its own line when done.",
+        title="Re-plan Feature", style="cyan"
+    ))
+    feature_id = IntPrompt.ask("  Existing Feature ID")
+
+    client = get_client(cfg)
+    tree   = client.get_feature_tree(feature_id)
+    if not tree or tree["feature"]["type"] != "Feature":
+        console.print(f"[red]Feature {feature_id} not found.[/red]")
+        return
+    n_tasks = sum(len(p["tasks"]) for p in tree["pbis"])
+    console.print(f"  [dim]{tree['feature']['title']} — {len(tree['pbis'])} PBIs, {n_tasks} tasks[/dim]\n")
+
+    text = _read_text()
+    if not text:
+        console.print("[yellow]No text provided.[/yellow]")
+        return
+
+    hierarchy = outline_parser.parse(text) or parse_text_to_hierarchy(text, get_api_key())
+    if not hierarchy:
+        return
+
+    plan = reconcile.plan(hierarchy, tree)
+    if not plan["ops"]:
+        console.print("[green]ADO already matches this plan — nothing to do.[/green]")
+        return
+    _preview_plan(plan)
+
+    if not Confirm.ask(f"\n[bold]Apply {len(plan['ops'])} change(s) to ADO?[/bold]"):
+        console.print("[yellow]Cancelled.[/yellow]")
+        return
+    delete_removed = Confirm.ask("  Delete items no longer in the plan?", default=False)
+
+    result = reconcile.apply(
+        client, plan,
+        assigned_to=cfg.get("assigned_to", ""),
+        area_path=cfg.get("area_path", ""),
+        iteration_path=cfg.get("iteration_path", ""),
+        delete_removed=delete_removed,
+    )
+    if result["invalid"]:
+        console.print("[red]Plan rejected before any write:[/red]")
+        for p in result["invalid"]:
+            console.print(f"  [red]✗ {p}[/red]")
+        return
+    console.print(f"\n[green]OK Applied {len(result['applied'])} change(s).[/green]")
+    for op in result["failed"]:
+        console.print(f"  [red]✗ {op['op']} {op.get('id', '')} {op['title']}: {op['error']}[/red]")
 
 
 # ─────────────────────────────────────────────
 # HELPERS
 # ─────────────────────────────────────────────
+class _RateColumn(ProgressColumn):
+    """Items per second."""
+
+    def render(self, task) -> Text:
+        return Text(f"{task.speed:.1f}/s" if task.speed else "–/s", style="cyan")
+
+
+def _progress() -> Progress:
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        _RateColumn(),
+        TimeElapsedColumn(),
+        TextColumn("ETA"),
+        TimeRemainingColumn(),
+        console=console,
+    )
+
+
+def _run_concurrently(label: str, fn, items: list, concurrency: int) -> tuple[dict, list]:
+    """Run fn(item) for every item on a bounded pool with a live progress bar.
+    Returns ({item: result or exception}, items not attempted). Ctrl-C cancels queued
+    items; calls already in flight finish first.
+    """
+    done   = {}
+    pool   = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="cli")
+    stop   = threading.Event()
+
+    def call(item):
+        return None if stop.is_set() else fn(item)
+
+    with _progress() as progress:
+        task = progress.add_task(label, total=len(items))
+        futures = {pool.submit(call, item): item for item in items}
+        try:
+            for f in as_completed(futures):
+                item = futures[f]
+                try:
+                    done[item] = f.result()
+                except Exception as e:
+                    done[item] = e
+                progress.advance(task)
+        except KeyboardInterrupt:
+            stop.set()
+            progress.console.print("[yellow]Stopping — waiting for requests already sent...[/yellow]")
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    for f, item in futures.items():  # in-flight calls that finished after Ctrl-C
+        if item not in done and f.done() and not f.cancelled():
+            result = f.exception() or f.result()
+            if result is not None:
+                done[item] = result
+    return done, [i for i in items if i not in done]
+
+
+def _read_text() -> str:
+    lines = []
+    while True:
+        line = input()
+        if line.strip().upper() == "END":
+            break
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def _preview_plan(plan: dict):
+    t = Table(box=box.ROUNDED)
+    t.add_column("Op",     style="bold")
+    t.add_column("Type",   style="dim")
+    t.add_column("ID",     style="cyan")
+    t.add_column("Title")
+    t.add_column("Change", style="dim")
+    styles = {"create": "green", "update": "yellow", "reparent": "blue", "remove": "red"}
+    for op in plan["ops"]:
+        if op["op"] == "update":
+            change = ", ".join(k.rsplit(".", 1)[-1] for k in op["fields"])
+        elif op["op"] == "reparent":
+            change = f"#{op['from']} → {op['parent']}"
+        elif op["op"] == "create":
+            change = f"under {op['parent']}"
+        else:
+            change = ""
+        style = styles[op["op"]]
+        t.add_row(f"[{style}]{op['op']}[/{style}]", op["type"], str(op.get("id", op.get("ref", ""))), op["title"], change)
+    console.print(t)
+    console.print("  " + "  ".join(f"{k}: {v}" for k, v in plan["summary"].items()))
+
+
 def _preview_hierarchy(hierarchy: dict):
     console.print()
     feature = hierarchy.get("feature", {})
@@ -263,27 +433,65 @@ def _show_config(cfg: dict):
     t.add_column("Value", style="white")
     for k, v in cfg.items():
         if k != "azureauth_path":
-            t.add_row(k, v)
+            t.add_row(k, str(v))
     console.print(t)
 
 
+# ─────────────────────────────────────────────
+# EXPORT (non-interactive subcommand)
+# ─────────────────────────────────────────────
+def export_trees(cfg: dict, out: str, fmt: str = None, feature_ids: list[int] = None, tag: str = "claudeADO"):
+    fmt = fmt or os.path.splitext(out)[1].lstrip(".").lower() or "csv"
+    if fmt not in export_module.FORMATS:
+        console.print(f"[red]Unknown format '{fmt}' (choose from {', '.join(export_module.FORMATS)}).[/red]")
+        sys.exit(1)
+    client = get_client(cfg)
+    try:
+        ids = export_module.feature_ids_for(client, feature_ids, tag)
+        if not ids:
+            console.print("[yellow]No Features to export.[/yellow]")
+            return
+        console.print(f"[cyan]Exporting {len(ids)} Feature tree(s) to {out}...[/cyan]")
+        count = export_module.write_file(export_module.iter_rows(client, ids), out, fmt)
+    except export_module.ExportError as e:
+        console.print(f"[red]Export failed: {e}[/red]")
+        sys.exit(1)
+    console.print(f"[green]Wrote {count} row(s) to {out}[/green]")
+
+
 # ─────────────────────────────────────────────
 # MAIN MENU
 # ─────────────────────────────────────────────
 def main():
     parser = argparse.ArgumentParser(description="claudeADO — Text to ADO work items")
     parser.add_argument("--configure", action="store_true", help="Re-run configuration")
+    parser.add_argument("--profile", type=str, default=None, help="Connection profile to use (default: active profile)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"ADO calls in flight for bulk create/delete (default: {DEFAULT_CONCURRENCY}; 1 = sequential)")
+    sub = parser.add_subparsers(dest="command")
+    exp = sub.add_parser("export", help="Export Feature → PBI → Task trees to CSV, JSON or XLSX")
+    exp.add_argument("out", help="output file (format from extension unless --format is given)")
+    exp.add_argument("--format", choices=list(export_module.FORMATS), default=None)
+    exp.add_argument("--feature", type=int, action="append", dest="features", help="Feature ID (repeatable); default: all tagged")
+    exp.add_argument("--tag", default="claudeADO", help="tag selecting Features when no --feature is given")
     args = parser.parse_args()
 
+    if args.command == "export":
+        cfg = cfg_module.require(args.profile)
+        export_trees(cfg, args.out, args.format, args.features, args.tag)
+        return
+
     console.print(f"[bold cyan]{BANNER}[/bold cyan]", highlight=False)
     console.print("[bold]ADO Work Item Manager powered by Claude AI[/bold]\n")
 
     if args.configure:
-        cfg_module.setup(force=True)
+        cfg_module.setup(force=True, profile=args.profile)
         return
 
     # Load or prompt for config on first run
-    cfg = cfg_module.require()
+    cfg = cfg_module.require(args.profile)
+    if cfg["name"] != cfg_module.DEFAULT_PROFILE:
+        console.print(f"[dim]Profile: {cfg['name']} ({cfg['ado_org_url']}/{cfg['ado_project']})[/dim]")
 
     while True:
         console.print("\n[bold]What would you like to do?[/bold]")
@@ -291,29 +499,32 @@ def main():
         console.print("  [cyan]2[/cyan]  Create a single work item manually")
         console.print("  [cyan]3[/cyan]  Update a work item")
         console.print("  [cyan]4[/cyan]  Delete work items")
-        console.print("  [cyan]5[/cyan]  Show current configuration")
-        console.print("  [cyan]6[/cyan]  Reconfigure")
+        console.print("  [cyan]5[/cyan]  Re-plan an existing Feature from text")
+        console.print("  [cyan]6[/cyan]  Show current configuration")
+        console.print("  [cyan]7[/cyan]  Reconfigure")
         console.print("  [cyan]q[/cyan]  Quit")
 
-        choice = Prompt.ask("\nChoice", choices=["1", "2", "3", "4", "5", "6", "q"])
+        choice = Prompt.ask("\nChoice", choices=["1", "2", "3", "4", "5", "6", "7", "q"])
 
         if choice == "1":
-            create_from_text(cfg)
+            create_from_text(cfg, args.concurrency)
         elif choice == "2":
             create_manual(cfg)
         elif choice == "3":
             update_item(cfg)
         elif choice == "4":
-            delete_items(cfg)
+            delete_items(cfg, args.concurrency)
         elif choice == "5":
-            _show_config(cfg)
+            replan_feature(cfg)
         elif choice == "6":
-            cfg = cfg_module.setup(force=True)
+            _show_config(cfg)
+        elif choice == "7":
+            cfg = cfg_module.setup(force=True, profile=cfg["name"])
         elif choice == "q":
             console.print("[dim]Goodbye.[/dim]")
             break
 
-        auth.clear_cache()  # refresh token between operations
+        auth.clear_cache(cfg["name"])  # refresh token between operations
 
 
 if __name__ == "__main__":
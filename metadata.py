@@ -0,0 +1,230 @@
+"""
+Process metadata cache — work item types, states and transitions, field
+definitions, and the area / iteration classification trees, per org/project.
+
+Loaded with three ADO calls (workitemtypes, fields, classificationnodes),
+kept for META_TTL seconds, then reloaded on next use (a failed reload keeps
+the old copy). Used to validate payloads locally before any write is sent —
+hierarchies, bulk updates, single creates — and to serve /api/meta
+autocomplete. Validation fails open: if metadata can't be loaded, writes go
+ahead unchecked and ADO remains the judge.
+"""
+import difflib
+import threading
+import time
+
+from rich.console import Console
+
+console = Console()
+
+META_TTL      = 15 * 60
+CLASS_DEPTH   = 10  # classificationnodes $depth
+KINDS         = ("types", "states", "fields", "area_paths", "iteration_paths")
+
+# Request field → what it is validated against
+STATE_REF     = "System.State"
+AREA_REF      = "System.AreaPath"
+ITERATION_REF = "System.IterationPath"
+# Required fields ADO fills in itself on create
+DEFAULTED     = {"System.State", "System.Reason", "System.AreaPath", "System.IterationPath",
+                 "System.TeamProject", "System.WorkItemType"}
+
+
+def _node_paths(node: dict, out: list, with_dates: bool = False):
+    """Flatten a classification node tree into work-item paths.
+    ADO node paths look like '\\Project\\Area\\Team'; work items use 'Project\\Team'.
+    """
+    parts = [p for p in node.get("path", "").split("\\") if p]
+    path  = "\\".join(parts[:1] + parts[2:]) if parts else node.get("name", "")
+    if with_dates:
+        attrs = node.get("attributes") or {}
+        out.append({"path": path, "start": (attrs.get("startDate") or "")[:10] or None,
+                    "finish": (attrs.get("finishDate") or "")[:10] or None})
+    else:
+        out.append(path)
+    for child in node.get("children") or ():
+        _node_paths(child, out, with_dates)
+
+
+def _suggest(value: str, choices) -> str:
+    close = difflib.get_close_matches(value, list(choices), n=1, cutoff=0.6)
+    return f" (did you mean '{close[0]}'?)" if close else ""
+
+
+class ProcessMetadata:
+    """One loaded snapshot of a project's process metadata."""
+
+    def __init__(self, types: list, fields: list, nodes: list):
+        self.loaded_at = time.time()
+        self.types     = {}  # name → {"states", "transitions", "required", "fields"}
+        for t in types:
+            if t.get("isDisabled"):
+                continue
+            transitions = {frm: [x["to"] for x in tos] for frm, tos in (t.get("transitions") or {}).items()}
+            self.types[t["name"]] = {
+                "states":      [s["name"] for s in t.get("states") or ()],
+                "transitions": transitions,
+                "required":    [f["referenceName"] for f in t.get("fields") or () if f.get("alwaysRequired")],
+                "fields":      {f["referenceName"] for f in t.get("fields") or ()},
+            }
+        self.fields = {f["referenceName"]: {"name": f.get("name"), "type": f.get("type"),
+                                            "read_only": bool(f.get("readOnly"))} for f in fields}
+        self.area_paths, self.iteration_paths = [], []
+        for root in nodes:
+            if root.get("structureType") == "iteration":
+                _node_paths(root, self.iteration_paths, with_dates=True)
+            else:
+                _node_paths(root, self.area_paths)
+        self._areas      = {p.casefold() for p in self.area_paths}
+        self._iterations = {i["path"].casefold() for i in self.iteration_paths}
+
+    # ─── Validation ───────────────────────────────────────────
+
+    def check(self, wit_type: str, fields: dict, creating: bool = False, current_state: str = None) -> list[str]:
+        """Problems with writing `fields` to an item of `wit_type` (empty list = fine).
+        On create, always-required fields must be present; on update, a state change
+        must be an allowed transition from `current_state` when that is known.
+        """
+        problems = []
+        wit = self.types.get(wit_type)
+        if wit is None:
+            return [f"Unknown work item type '{wit_type}'{_suggest(wit_type, self.types)}"]
+        for ref, value in fields.items():
+            if value is None or value == "":
+                continue
+            spec = self.fields.get(ref)
+            if self.fields and spec is None:
+                problems.append(f"Unknown field '{ref}'{_suggest(ref, self.fields)}")
+            elif spec and spec["read_only"]:
+                problems.append(f"Field '{ref}' is read-only")
+            elif wit["fields"] and ref not in wit["fields"]:
+                problems.append(f"{wit_type} has no field '{ref}'")
+        state = fields.get(STATE_REF)
+        if state:
+            by_fold = {s.casefold(): s for s in wit["states"]}
+            if wit["states"] and state.casefold() not in by_fold:
+                problems.append(f"'{state}' is not a {wit_type} state{_suggest(state, wit['states'])}; "
+                                f"allowed: {', '.join(wit['states'])}")
+            elif current_state and wit["transitions"] and state.casefold() != current_state.casefold():
+                allowed = wit["transitions"].get(current_state)
+                if allowed is not None and state.casefold() not in {a.casefold() for a in allowed}:
+                    problems.append(f"{wit_type} cannot move from '{current_state}' to '{state}'; "
+                                    f"allowed: {', '.join(allowed) or 'none'}")
+        area = fields.get(AREA_REF)
+        if area and self.area_paths and area.casefold() not in self._areas:
+            problems.append(f"Unknown area path '{area}'{_suggest(area, self.area_paths)}")
+        iteration = fields.get(ITERATION_REF)
+        if iteration and self.iteration_paths and iteration.casefold() not in self._iterations:
+            paths = [i["path"] for i in self.iteration_paths]
+            problems.append(f"Unknown iteration path '{iteration}'{_suggest(iteration, paths)}")
+        if creating:
+            missing = [r for r in wit["required"]
+                       if r not in DEFAULTED and (r not in fields or fields[r] in (None, ""))]
+            if missing:
+                problems.append(f"{wit_type} requires {', '.join(missing)}")
+        return problems
+
+    def check_hierarchy(self, hierarchy: dict, fields: dict) -> list[str]:
+        """Validate a whole parsed Feature → PBI → Task plan plus the shared fields
+        (assignee, paths) before anything is created. Shared-field problems are reported once.
+        """
+        shared   = self.check("Feature", fields)
+        problems = list(shared)
+        feature  = hierarchy.get("feature", {})
+        nodes    = [("Feature", "Feature", feature, {})]
+        for pbi in hierarchy.get("pbis", []):
+            nodes.append(("PBI", "Product Backlog Item", pbi, {}))
+            for task in pbi.get("tasks", []):
+                effort = task.get("effort")
+                if effort is not None and not isinstance(effort, (int, float)):
+                    problems.append(f"Task '{task.get('title', '')}': effort must be a number, got {effort!r}")
+                    effort = None
+                nodes.append(("Task", "Task", task, {"Microsoft.VSTS.Scheduling.Effort": effort}))
+        for label, wit_type, node, extra in nodes:
+            own = {"System.Title": (node.get("title") or "").strip(),
+                   "System.Description": node.get("description") or "", **extra}
+            for p in self.check(wit_type, {**fields, **own}, creating=True):
+                if p not in shared:
+                    problems.append(f"{label} '{node.get('title', '')}': {p}")
+        return problems
+
+    def to_dict(self) -> dict:
+        return {
+            "types":           {n: {"states": t["states"], "transitions": t["transitions"], "required": t["required"]}
+                                for n, t in self.types.items()},
+            "fields":          [{"reference_name": r, **f} for r, f in sorted(self.fields.items())],
+            "area_paths":      self.area_paths,
+            "iteration_paths": self.iteration_paths,
+            "loaded_at":       self.loaded_at,
+            "expires_in":      max(0, round(self.loaded_at + META_TTL - time.time())),
+        }
+
+    def values(self, kind: str, q: str = "", limit: int = 50) -> list:
+        """Autocomplete values of one kind, filtered by a case-insensitive substring."""
+        if kind == "types":
+            values = list(self.types)
+        elif kind == "states":
+            values = sorted({s for t in self.types.values() for s in t["states"]})
+        elif kind == "fields":
+            values = sorted(self.fields)
+        elif kind == "area_paths":
+            values = self.area_paths
+        else:
+            values = [i["path"] for i in self.iteration_paths]
+        q = q.casefold()
+        return [v for v in values if q in v.casefold()][:limit]
+
+
+class MetadataCache:
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._entries = {}  # scope → ProcessMetadata
+        self._loading = {}  # scope → Lock (one loader per scope)
+        self._stats   = {"loads": 0, "load_failures": 0, "hits": 0}
+
+    def _load(self, client) -> ProcessMetadata | None:
+        try:
+            raw = client.fetch_process_metadata()
+        except Exception as e:
+            raw = None
+            console.print(f"  [dim]process metadata unavailable: {e}[/dim]")
+        return None if raw is None else ProcessMetadata(*raw)
+
+    def get(self, client, refresh: bool = False) -> ProcessMetadata | None:
+        """Metadata for the client's project; reloads when older than META_TTL.
+        Returns the previous copy if a reload fails, None if nothing could ever be loaded.
+        """
+        with self._lock:
+            entry = self._entries.get(client.scope)
+            fresh = entry is not None and not refresh and time.time() - entry.loaded_at < META_TTL
+            if fresh:
+                self._stats["hits"] += 1
+                return entry
+            loader = self._loading.setdefault(client.scope, threading.Lock())
+        with loader:
+            with self._lock:  # another thread may have reloaded while we waited
+                entry = self._entries.get(client.scope)
+                if entry is not None and (time.time() - entry.loaded_at < META_TTL) and not refresh:
+                    return entry
+            meta = self._load(client)
+            with self._lock:
+                if meta is None:
+                    self._stats["load_failures"] += 1
+                    return entry
+                self._stats["loads"] += 1
+                self._entries[client.scope] = meta
+                return meta
+
+    def clear(self, scope: str = None):
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(scope, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "scopes": len(self._entries)}
+
+
+cache = MetadataCache()
@@ -0,0 +1,399 @@
+"""
+Local mock of the ADO work item REST API and the Claude messages API.
+
+Used by the load-test harness and local tooling so the app can be exercised
+without a live ADO org or an Anthropic key. Only the endpoints claudeADO
+actually calls are implemented, backed by an in-memory, thread-safe store.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MOCK_PROJECT = "Mock"
+
+SAMPLE_HIERARCHY = {
+    "feature": {"title": "Load test feature", "description": "Generated by the mock Claude backend."},
+    "pbis": [
+        {
+            "title": f"Load test PBI {i}",
+            "description": "Mock PBI.",
+            "tasks": [{"title": f"Task {i}.{j}", "effort": j} for j in range(1, 4)],
+        }
+        for i in range(1, 4)
+    ],
+}
+
+# Process metadata served by /workitemtypes, /fields and /classificationnodes
+MOCK_STATES = ["New", "Active", "Resolved", "Closed", "Removed"]
+MOCK_FIELDS = [
+    ("System.Id", "ID", "integer", True), ("System.Rev", "Rev", "integer", True),
+    ("System.WorkItemType", "Work Item Type", "string", False), ("System.Title", "Title", "string", False),
+    ("System.State", "State", "string", False), ("System.Reason", "Reason", "string", False),
+    ("System.AssignedTo", "Assigned To", "identity", False), ("System.AreaPath", "Area Path", "treePath", False),
+    ("System.IterationPath", "Iteration Path", "treePath", False), ("System.Tags", "Tags", "plainText", False),
+    ("System.Parent", "Parent", "integer", False), ("System.Description", "Description", "html", False),
+    ("System.CreatedDate", "Created Date", "dateTime", True), ("System.ChangedDate", "Changed Date", "dateTime", True),
+    ("Microsoft.VSTS.Scheduling.Effort", "Effort", "double", False),
+]
+MOCK_TYPES = ["Epic", "Feature", "Product Backlog Item", "Task", "Bug"]
+
+# Directory behind /_apis/IdentityPicker/Identities: (display name, sign-in address)
+MOCK_USERS = [
+    ("Load Test", "loadtest@example.com"),
+    ("Ada Lovelace", "ada@example.com"),
+    ("Alan Turing", "alan@example.com"),
+    ("Sam Lee", "sam.lee@example.com"),
+    ("Sam Lee", "sam.lee2@example.com"),
+    ("A User", "a@x.com"),
+]
+
+
+def _mock_identities(query: str, limit: int) -> list[dict]:
+    q = query.strip().casefold()
+    return [
+        {"entityType": "User", "displayName": name, "mail": email, "signInAddress": email,
+         "subjectDescriptor": f"aad.{email.split('@')[0].replace('.', '')}", "localId": f"id-{i}"}
+        for i, (name, email) in enumerate(MOCK_USERS)
+        if q and (q in name.casefold() or email.casefold().startswith(q))
+    ][:limit]
+
+
+def _mock_process(base_url: str) -> dict:
+    def node(name: str, path: str, kind: str, children=(), attributes=None) -> dict:
+        n = {"name": name, "structureType": kind, "path": path, "hasChildren": bool(children),
+             "url": f"{base_url}/_apis/wit/classificationNodes/{kind}s{path}"}
+        if children:
+            n["children"] = list(children)
+        if attributes:
+            n["attributes"] = attributes
+        return n
+
+    p = f"\\{MOCK_PROJECT}"
+    transitions = {s: [{"to": t, "actions": None} for t in MOCK_STATES if t != s and (s != "Removed" or t == "New")]
+                   for s in MOCK_STATES}
+    transitions[""] = [{"to": "New", "actions": None}]
+    return {
+        "workitemtypes": [
+            {"name": t, "referenceName": f"Microsoft.VSTS.WorkItemTypes.{t.replace(' ', '')}", "isDisabled": False,
+             "states": [{"name": s, "category": "Proposed" if s == "New" else "InProgress"} for s in MOCK_STATES],
+             "transitions": transitions,
+             "fields": [{"referenceName": f[0], "name": f[1], "alwaysRequired": f[0] in ("System.Title", "System.State")}
+                        for f in MOCK_FIELDS]}
+            for t in MOCK_TYPES
+        ],
+        "fields": [{"referenceName": r, "name": n, "type": t, "readOnly": ro} for r, n, t, ro in MOCK_FIELDS],
+        "classificationnodes": [
+            node(MOCK_PROJECT, f"{p}\\Area", "area", [
+                node("Team A", f"{p}\\Area\\Team A", "area"),
+                node("Team B", f"{p}\\Area\\Team B", "area"),
+            ]),
+            node(MOCK_PROJECT, f"{p}\\Iteration", "iteration", [
+                node(f"Sprint {i}", f"{p}\\Iteration\\Sprint {i}", "iteration",
+                     attributes={"startDate": f"2026-0{i}-01T00:00:00Z", "finishDate": f"2026-0{i}-14T00:00:00Z"})
+                for i in (1, 2, 3)
+            ]),
+        ],
+    }
+
+
+class MockStore:
+    """In-memory work item store shared by all handler threads."""
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.items   = {}
+        self.next_id = 1000
+
+    def create(self, wit_type: str, ops: list, base_url: str) -> dict:
+        with self.lock:
+            item_id = self.next_id
+            self.next_id += 1
+            now  = datetime.now(timezone.utc).isoformat()
+            item = {
+                "id": item_id,
+                "rev": 1,
+                "fields": {
+                    "System.Id": item_id,
+                    "System.WorkItemType": wit_type,
+                    "System.State": "New",
+                    "System.CreatedDate": now,
+                    "System.ChangedDate": now,
+                },
+                "relations": [],
+                "url": f"{base_url}/_apis/wit/workItems/{item_id}",
+            }
+            self.items[item_id] = item
+            self._apply(item, ops)
+            return json.loads(json.dumps(item))
+
+    def update(self, item_id: int, ops: list) -> dict | None:
+        with self.lock:
+            item = self.items.get(item_id)
+            if not item:
+                return None
+            self._apply(item, ops)
+            item["rev"] += 1
+            item["fields"]["System.ChangedDate"] = datetime.now(timezone.utc).isoformat()
+            return json.loads(json.dumps(item))
+
+    def delete(self, item_id: int) -> bool:
+        with self.lock:
+            return self.items.pop(item_id, None) is not None
+
+    def get(self, item_id: int) -> dict | None:
+        with self.lock:
+            item = self.items.get(item_id)
+            return json.loads(json.dumps(item)) if item else None
+
+    def _apply(self, item: dict, ops: list):
+        for op in ops:
+            path = op.get("path", "")
+            if path.startswith("/fields/"):
+                name = path[len("/fields/"):]
+                if op["op"] == "remove":
+                    item["fields"].pop(name, None)
+                else:
+                    value = op.get("value")
+                    if name == "System.AssignedTo" and isinstance(value, str) and value:
+                        value = {"uniqueName": value, "displayName": value.split("@")[0]}
+                    item["fields"][name] = value
+            elif path == "/relations/-":
+                item["relations"].append(op["value"])
+                if op["value"].get("rel") == "System.LinkTypes.Hierarchy-Reverse":
+                    item["fields"]["System.Parent"] = _id_from_url(op["value"]["url"])
+            elif path.startswith("/relations/") and op["op"] == "remove":
+                idx = int(path.rsplit("/", 1)[-1])
+                if 0 <= idx < len(item["relations"]):
+                    rel = item["relations"].pop(idx)
+                    if rel.get("rel") == "System.LinkTypes.Hierarchy-Reverse":
+                        item["fields"].pop("System.Parent", None)
+
+    def query(self, wiql: str) -> list[int]:
+        """Evaluate the subset of WIQL the client emits: AND-joined clauses plus ORDER BY."""
+        where, _, order = re.split(r"\bWHERE\b", wiql, 1, flags=re.I)[-1].partition(" ORDER BY ")
+        clauses = _split_clauses(where)
+        with self.lock:
+            matches = [i for i in self.items.values() if all(_match(i["fields"], c) for c in clauses)]
+        for key in reversed([k.strip() for k in order.split(",") if k.strip()]):
+            desc = key.upper().endswith(" DESC")
+            field = re.sub(r"\s+(ASC|DESC)$", "", key, flags=re.I).strip("[] ")
+            matches.sort(key=lambda i: str(i["fields"].get(field, "")), reverse=desc)
+        return [i["id"] for i in matches]
+
+
+def _id_from_url(url: str) -> int | None:
+    tail = url.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _split_clauses(where: str) -> list[str]:
+    parts, depth, buf = [], 0, ""
+    tokens = re.split(r"(\s+AND\s+|\(|\))", where, flags=re.I)
+    for tok in tokens:
+        if tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth -= 1
+        if depth == 0 and re.fullmatch(r"\s+AND\s+", tok or "", flags=re.I):
+            parts.append(buf.strip())
+            buf = ""
+        else:
+            buf += tok or ""
+    if buf.strip():
+        parts.append(buf.strip())
+    return parts
+
+
+def _unquote(value: str):
+    value = value.strip()
+    if value.startswith("'") and value.endswith("'"):
+        return value[1:-1].replace("''", "'")
+    if value.lstrip("-").isdigit():
+        return int(value)
+    return value
+
+
+def _field_text(fields: dict, name: str):
+    value = fields.get(name, "")
+    if isinstance(value, dict):
+        return value.get("uniqueName", "")
+    return value
+
+
+def _match(fields: dict, clause: str) -> bool:
+    """Match one WIQL clause. Unknown shapes match everything so queries stay permissive."""
+    clause = clause.strip()
+    while clause.startswith("(") and clause.endswith(")"):
+        clause = clause[1:-1].strip()
+    ors = re.split(r"\s+OR\s+(?=(?:[^']*'[^']*')*[^']*$)", clause, flags=re.I)  # not inside quotes
+    if len(ors) > 1:
+        return any(_match(fields, c) for c in ors)
+    m = re.match(r"\[([\w.]+)\]\s*(<>|>=|<=|=|<|>|NOT CONTAINS|CONTAINS WORDS|CONTAINS|UNDER|IN)\s*(.+)$", clause, re.I)
+    if not m:
+        return True
+    name, op, raw = m.group(1), m.group(2).upper(), m.group(3)
+    actual = _field_text(fields, name)
+    if op == "IN":
+        values = [_unquote(v) for v in raw.strip("() ").split(",")]
+        return actual in values
+    value = _unquote(raw)
+    if isinstance(value, str) and re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        actual = str(actual)[:10]  # WIQL compares dates at day precision by default
+    if op == "=":
+        return str(actual).lower() == str(value).lower() if isinstance(value, str) else actual == value
+    if op == "<>":
+        return str(actual).lower() != str(value).lower()
+    if op in ("CONTAINS", "CONTAINS WORDS"):
+        return str(value).lower() in str(actual or "").lower()
+    if op == "NOT CONTAINS":
+        return str(value).lower() not in str(actual or "").lower()
+    if op == "UNDER":
+        return str(actual).lower() == str(value).lower() or str(actual).lower().startswith(str(value).lower() + "\\")
+    try:
+        return {"<": actual < value, ">": actual > value, "<=": actual <= value, ">=": actual >= value}[op]
+    except TypeError:
+        return False
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Routes ADO and Claude calls to the shared MockStore."""
+
+    protocol_version = "HTTP/1.1"
+    store: MockStore = None
+    ado_latency: float = 0.0
+    claude_latency: float = 0.0
+    ado_status: int = 0  # set to e.g. 503 to make every ADO call fail (outage drills)
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _send(self, status: int, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host')}/{MOCK_PROJECT}"
+
+    def _route(self, method: str):
+        parsed = urlparse(self.path)
+        path, query = parsed.path, parse_qs(parsed.query)
+
+        if path == "/v1/messages" and method == "POST":
+            time.sleep(self.claude_latency)
+            body = self._body() or {}
+            # Honour max_tokens (~4 chars per token) and continue after an assistant turn,
+            # so truncation handling can be exercised locally
+            full = json.dumps(SAMPLE_HIERARCHY, indent=2)
+            sent = "".join(m["content"] for m in body.get("messages", [])
+                           if m.get("role") == "assistant" and isinstance(m.get("content"), str))
+            text = full[len(sent):]
+            limit = int(body.get("max_tokens") or 4096) * 4
+            stop  = "max_tokens" if len(text) > limit else "end_turn"
+            return self._send(200, {
+                "id": "msg_mock",
+                "type": "message",
+                "role": "assistant",
+                "model": "mock",
+                "content": [{"type": "text", "text": text[:limit]}],
+                "stop_reason": stop,
+                "stop_sequence": None,
+                "usage": {"input_tokens": 1, "output_tokens": len(text[:limit]) // 4},
+            })
+
+        time.sleep(self.ado_latency)
+        if self.ado_status:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))  # keep the connection in sync
+            return self._send(self.ado_status, {"message": "mock outage"})
+
+        if path == "/_apis/IdentityPicker/Identities" and method == "POST":
+            body = self._body() or {}
+            found = _mock_identities(body.get("query", ""), (body.get("options") or {}).get("MaxResults", 10))
+            return self._send(200, {"results": [{"queryToken": body.get("query", ""), "identities": found}]})
+        prefix = f"/{MOCK_PROJECT}/_apis/wit"
+        if not path.startswith(prefix):
+            return self._send(404, {"message": "not found"})
+        rest = path[len(prefix):]
+
+        if rest.lstrip("/") in ("workitemtypes", "fields", "classificationnodes") and method == "GET":
+            return self._send(200, {"value": _mock_process(self._base_url())[rest.lstrip("/")]})
+
+        if rest == "/wiql" and method == "POST":
+            ids = self.store.query(self._body().get("query", ""))
+            if query.get("$top", [""])[0].isdigit():
+                ids = ids[:int(query["$top"][0])]
+            return self._send(200, {"workItems": [{"id": i} for i in ids]})
+
+        if rest == "/workitems" and method == "GET":
+            ids    = [int(i) for i in query.get("ids", [""])[0].split(",") if i.isdigit()]
+            wanted = [f for f in query.get("fields", [""])[0].split(",") if f]
+            values = []
+            for item_id in ids:
+                item = self.store.get(item_id)
+                if item:
+                    if wanted:
+                        item["fields"] = {k: v for k, v in item["fields"].items() if k in wanted}
+                    item.pop("relations", None)
+                    values.append(item)
+            return self._send(200, {"count": len(values), "value": values})
+
+        m = re.fullmatch(r"/workitems/\$(.+)", rest)
+        if m and method == "POST":
+            wit_type = m.group(1).replace("%20", " ")
+            return self._send(200, self.store.create(wit_type, self._body() or [], self._base_url()))
+
+        m = re.fullmatch(r"/workitems/(\d+)", rest)
+        if m:
+            item_id = int(m.group(1))
+            if method == "GET":
+                item = self.store.get(item_id)
+                return self._send(200, item) if item else self._send(404, {"message": "not found"})
+            if method == "PATCH":
+                item = self.store.update(item_id, self._body() or [])
+                return self._send(200, item) if item else self._send(404, {"message": "not found"})
+            if method == "DELETE":
+                return self._send(200, {}) if self.store.delete(item_id) else self._send(404, {"message": "not found"})
+
+        return self._send(404, {"message": "not found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+def serve(port: int = 0, ado_latency: float = 0.0, claude_latency: float = 0.0,
+          store: MockStore = None) -> ThreadingHTTPServer:
+    """Start the mock on a background thread. Returns the running server."""
+    handler = type("BoundMockHandler", (MockHandler,), {
+        "store": store or MockStore(),
+        "ado_latency": ado_latency,
+        "claude_latency": claude_latency,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def mock_org_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
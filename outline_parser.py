@@ -0,0 +1,190 @@
+"""
+Outline parser — a local fast path for plans that are already structured.
+
+Indented Markdown lists, heading levels (# / ## / ###) and numbered outlines
+(1. / 1.1 / 1.1.1) are turned into the same Feature → PBI → Task hierarchy the
+Claude parser returns, in milliseconds and without an API call. "(3d)", "[2 days]",
+"- 4h" style markers become task effort in days; a marker on a PBI is shared out
+among its tasks that have none of their own. Each parse gets a confidence
+score; below MIN_CONFIDENCE (ambiguous levels, missing efforts, stray prose) the
+caller falls back to Claude.
+"""
+import re
+import statistics
+import time
+
+from rich.console import Console
+
+from llm_parser import validate_hierarchy
+
+console = Console()
+
+MIN_CONFIDENCE = 0.8
+HOURS_PER_DAY  = 8
+
+_HEADING_RE  = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_ITEM_RE     = re.compile(r"^(\s*)(\d+(?:\.\d+)+\.?|\d+[.)]|[a-zA-Z][.)]|[-*+•])\s+(.*)$")
+_CHECKBOX_RE = re.compile(r"^\[[ xX]\]\s+")
+_LABEL_RE    = re.compile(r"^(feature|epic|pbi|product backlog item|user story|story|task)\s*[:\-–—]\s*", re.IGNORECASE)
+_EFFORT_RE   = re.compile(
+    r"(?:\s*[(\[]\s*|[\s,:\-–—]+)(?:effort\s*[:=]?\s*)?(\d+(?:\.\d+)?)\s*"
+    r"(d|days?|h|hrs?|hours?)\s*[)\]]?\s*$", re.IGNORECASE)
+_EMPHASIS_RE = re.compile(r"^(\*\*|__)(.*)\1$")
+
+_LEVELS = ("Feature", "PBI", "Task")
+_LABELS = {"feature": "Feature", "epic": "Feature", "pbi": "PBI", "product backlog item": "PBI",
+           "user story": "PBI", "story": "PBI", "task": "Task"}
+
+
+class _Node:
+    def __init__(self, key: tuple, text: str):
+        self.key      = key
+        self.label    = None
+        self.effort   = None
+        self.prose    = []
+        self.children = []
+        m = _LABEL_RE.match(text)
+        if m:
+            self.label = _LABELS[m.group(1).lower()]
+            text = text[m.end():]
+        m = _EFFORT_RE.search(text)
+        if m:
+            amount = float(m.group(1))
+            self.effort = amount if m.group(2).lower().startswith("d") else amount / HOURS_PER_DAY
+            text = text[:m.start()]
+        text = text.strip().rstrip(":").strip()
+        m = _EMPHASIS_RE.match(text)
+        self.title = (m.group(2) if m else text).strip()
+
+
+def _tree(text: str) -> tuple[list, list, int]:
+    """Build the outline tree. Returns (roots, leading title lines, unplaced prose lines).
+    Nesting comes from heading depth, then list indentation, then dotted numbering.
+    """
+    roots, stack, lead, unplaced = [], [], [], 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        expanded = line.expandtabs(4)
+        m = _HEADING_RE.match(expanded)
+        if m:
+            node = _Node((0, len(m.group(1)), 0), m.group(2))
+        else:
+            m = _ITEM_RE.match(expanded)
+            if m is None:
+                # Prose: a title before the outline starts, or a description of the item above
+                if not stack and not roots:
+                    lead.append(line.strip())
+                elif stack:
+                    stack[-1].prose.append(line.strip())
+                else:
+                    unplaced += 1
+                continue
+            marker = m.group(2).rstrip(".)")
+            depth  = marker.count(".") + 1 if marker[:1].isdigit() else 1
+            node   = _Node((1, len(m.group(1)), depth), _CHECKBOX_RE.sub("", m.group(3)))
+        if not node.title:
+            continue
+        while stack and stack[-1].key >= node.key:
+            stack.pop()
+        (stack[-1].children if stack else roots).append(node)
+        stack.append(node)
+    return roots, lead, unplaced
+
+
+def analyze(text: str) -> dict:
+    """Parse `text` as an outline. Returns {"hierarchy", "confidence", "reasons"};
+    hierarchy is None when the text has no usable Feature → PBI → Task shape.
+    """
+    roots, lead, unplaced = _tree(text)
+    reasons = []
+
+    def reject(reason: str) -> dict:
+        return {"hierarchy": None, "confidence": 0.0, "reasons": reasons + [reason]}
+
+    if not roots:
+        return reject("no outline structure")
+    if len(roots) == 1 and roots[0].children and all(p.children for p in roots[0].children):
+        # One top-level item with two levels below it; any text above it describes it
+        feature, pbis = roots[0], roots[0].children
+        feature.prose = lead + feature.prose
+    elif lead and len(lead) <= 3 and all(r.children for r in roots):
+        # A plain title line (optionally with a short description) above the outline
+        feature, pbis = _Node((-1,), lead[0]), roots
+        feature.prose = lead[1:]
+    else:
+        return reject("no single top-level Feature")
+
+    tasks = []
+    for node, level in [(feature, 0)] + [(p, 1) for p in pbis] + [(t, 2) for p in pbis for t in p.children]:
+        if node.label and node.label != _LEVELS[level]:
+            return reject(f"'{node.title}' is labelled {node.label} but sits at the {_LEVELS[level]} level")
+        if level == 1 and not node.children:
+            return reject(f"PBI '{node.title}' has no tasks")
+        if level == 2:
+            if node.children:
+                return reject(f"more than three levels under '{node.title}'")
+            tasks.append(node)
+            unplaced += len(node.prose)  # tasks carry no description
+
+    # A PBI estimate ("- Build importer (3d)") covers what its own task markers leave over
+    for p in pbis:
+        if p.effort is None:
+            continue
+        unmarked = [t for t in p.children if t.effort is None]
+        marked   = sum(t.effort for t in p.children if t.effort is not None)
+        if unmarked and p.effort > marked:
+            base, extra = divmod(round(p.effort - marked), len(unmarked))  # whole days, same total
+            if base == 0:
+                # Fewer days left than tasks: a 1-day minimum would break the total, so leave them unestimated
+                reasons.append(f"PBI '{p.title}' has {p.effort - marked:g}d left for {len(unmarked)} "
+                               f"unestimated task(s) — too little to share in whole days")
+                continue
+            for i, t in enumerate(unmarked):
+                t.effort = base + (i < extra)
+        elif abs(marked - p.effort) >= 0.5:
+            reasons.append(f"PBI '{p.title}' is estimated at {p.effort:g}d but its tasks add up to "
+                           f"{marked:g}d — task markers kept")
+
+    lines      = sum(1 for line in text.splitlines() if line.strip())
+    estimated  = [t for t in tasks if t.effort is not None]
+    coverage   = len(estimated) / len(tasks)
+    confidence = coverage * (1 - unplaced / lines)
+    if coverage < 1:
+        reasons.append(f"{len(tasks) - len(estimated)} of {len(tasks)} task(s) have no effort marker")
+    if unplaced:
+        reasons.append(f"{unplaced} line(s) of text not attached to a Feature or PBI")
+
+    # Tasks without a marker get the median of the marked ones rather than the schema minimum
+    fallback  = statistics.median(t.effort for t in estimated) if estimated else None
+    hierarchy = {
+        "feature": {"title": feature.title, "description": " ".join(feature.prose)},
+        "pbis": [{"title": p.title, "description": " ".join(p.prose),
+                  "tasks": [{"title": t.title, "effort": _days(t.effort if t.effort is not None else fallback)}
+                            for t in p.children]}
+                 for p in pbis],
+    }
+    hierarchy, problems = validate_hierarchy(hierarchy)
+    return {"hierarchy": hierarchy, "confidence": round(confidence, 2), "reasons": reasons + problems}
+
+
+def _days(effort: float | None) -> int | None:
+    return None if effort is None else max(1, round(effort))
+
+
+def parse(text: str, min_confidence: float = MIN_CONFIDENCE) -> dict | None:
+    """The outline's hierarchy if it parses with at least `min_confidence`, else None
+    (the caller then sends the text to Claude).
+    """
+    start  = time.perf_counter()
+    result = analyze(text)
+    ms     = (time.perf_counter() - start) * 1000
+    if result["hierarchy"] is None or result["confidence"] < min_confidence:
+        why = "; ".join(result["reasons"][:2]) or "low confidence"
+        console.print(f"  [dim]Not a clear outline ({why}) — using Claude[/dim]")
+        return None
+    console.print(f"\n[green]Parsed locally as an outline[/green] "
+                  f"[dim](confidence {result['confidence']:.2f}, {ms:.1f} ms — no Claude call)[/dim]")
+    for reason in result["reasons"]:
+        console.print(f"  [yellow]⚠ {reason}[/yellow]")
+    return result["hierarchy"]
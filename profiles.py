@@ -0,0 +1,113 @@
+"""
+Connection profiles — one pooled ADOClient, token and rate-limit budget per
+named ADO org/project, plus concurrent fan-out across profiles.
+
+Clients are cached per profile and rebuilt when the profile's settings or
+token change, so the HTTP connection pool and request budget survive across
+API requests instead of being recreated for every call.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config as cfg_module
+import auth as auth_module
+import shared_state
+from ado_client import ADOClient
+from ratelimit import RateLimiter
+from search_index import get_index
+
+POOL_SIZE = 20  # HTTP connections kept alive per profile
+
+_lock     = threading.Lock()
+_clients  = {}  # profile name → (settings fingerprint, ADOClient)
+_limiters = {}  # profile name → (rate, burst, RateLimiter)
+
+
+class ProfileError(Exception):
+    """Unknown or incomplete connection profile."""
+
+
+def _limiter(name: str, profile: dict) -> RateLimiter:
+    rate  = float(profile.get("rate_limit") or cfg_module.DEFAULT_RATE_LIMIT)
+    burst = int(profile.get("rate_burst") or rate * 2)
+    cached = _limiters.get(name)
+    if cached and cached[:2] == (rate, burst):
+        return cached[2]
+    store   = shared_state.get_store()
+    # Shared bucket across all worker processes when shared state is enabled
+    limiter = shared_state.SharedRateLimiter(store, name, rate, burst) if store else RateLimiter(rate, burst)
+    _limiters[name] = (rate, burst, limiter)
+    return limiter
+
+
+def resolve(name: str = None) -> dict:
+    """Settings for a profile, validated. Raises ProfileError."""
+    try:
+        profile = cfg_module.get_profile(name)
+    except KeyError:
+        raise ProfileError(f"Unknown profile '{name}'")
+    if not profile.get("ado_org_url") or not profile.get("ado_project"):
+        raise ProfileError(f"Profile '{profile['name']}' is not configured. Please save settings first.")
+    return profile
+
+
+def get_client(name: str = None) -> ADOClient:
+    """Pooled client for a profile (default: the active one)."""
+    profile = resolve(name)
+    name    = profile["name"]
+    token   = auth_module.get_token(profile.get("azureauth_path", ""), profile=name)
+    fingerprint = (profile["ado_org_url"], profile["ado_project"], token)
+    with _lock:
+        cached = _clients.get(name)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        client = ADOClient(
+            profile["ado_org_url"], profile["ado_project"], token,
+            index=get_index(), limiter=_limiter(name, profile), pool_size=POOL_SIZE,
+        )
+        # Health probes look the client up again each time, so they carry the current token
+        client.breaker.probe = lambda: get_client(name)._probe()
+        _clients[name] = (fingerprint, client)
+        return client
+
+
+def reset(name: str = None):
+    """Drop pooled clients and cached tokens for one profile (or all)."""
+    with _lock:
+        if name is None:
+            _clients.clear()
+        else:
+            _clients.pop(name, None)
+    auth_module.clear_cache(name)
+
+
+def fan_out(fn, names: list[str] = None, max_workers: int = 8) -> dict:
+    """Run fn(client, profile) concurrently for each profile.
+    Returns {name: {"result": ...}} or {name: {"error": "..."}} per profile.
+    """
+    names = names or [n for n in cfg_module.profile_names() if _configured(n)]
+
+    def run(name):
+        try:
+            profile = resolve(name)
+            return name, {"result": fn(get_client(name), profile)}
+        except Exception as e:
+            return name, {"error": str(e)}
+
+    if not names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        return dict(pool.map(run, names))
+
+
+def _configured(name: str) -> bool:
+    try:
+        resolve(name)
+        return True
+    except ProfileError:
+        return False
+
+
+def stats() -> dict:
+    with _lock:
+        return {name: lim.stats() for name, (_, _, lim) in _limiters.items()}
@@ -0,0 +1,50 @@
+"""
+Token-bucket rate limiter used to keep each ADO connection profile inside its
+request budget. Thread-safe; acquire() blocks until a token is available.
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = None):
+        """rate: sustained requests per second; burst: bucket size (defaults to 2× rate)."""
+        self.rate     = float(rate)
+        self.capacity = float(burst or max(1, int(rate * 2)))
+        self._tokens  = self.capacity
+        self._updated = time.monotonic()
+        self._lock    = threading.Lock()
+        self._stats   = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    def _refill(self, now: float):
+        self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._stats["acquired"] += 1
+                    if waited:
+                        self._stats["waited"] += 1
+                        self._stats["wait_seconds"] += waited
+                    return
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate":         self.rate,
+                "burst":        self.capacity,
+                "available":    round(self._tokens, 2),
+                "acquired":     self._stats["acquired"],
+                "waited":       self._stats["waited"],
+                "wait_seconds": round(self._stats["wait_seconds"], 3),
+            }
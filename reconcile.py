@@ -0,0 +1,242 @@
+"""
+Hierarchy reconciliation — apply an edited plan to an existing Feature as the
+smallest set of ADO changes.
+
+A re-parsed hierarchy (same shape as parse_text_to_hierarchy output) is matched
+against the live Feature → PBI → Task tree by title similarity and position.
+The result is a plan of create / update / reparent / remove operations that can
+be previewed and then applied through ADOClient.
+"""
+import re
+from difflib import SequenceMatcher
+
+from rich.console import Console
+
+import identities
+from ado_client import ADOClient
+from search_index import plain_text
+
+console = Console()
+
+PBI_TYPE  = "Product Backlog Item"
+TASK_TYPE = "Task"
+
+MATCH_THRESHOLD    = 0.6   # minimum title similarity to treat two nodes as the same item
+REPARENT_THRESHOLD = 0.8   # stricter bar for moving a task between PBIs
+POSITION_WEIGHT    = 0.15  # how much relative position breaks ties between similar titles
+
+
+def _norm(title: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", title.lower())).strip()
+
+
+def _similarity(a: str, b: str) -> float:
+    a, b = _norm(a), _norm(b)
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _match(new: list[dict], old: list[dict], threshold: float) -> dict[int, int]:
+    """Greedy best-first matching of new → old nodes. Returns {new_index: old_index}."""
+    pairs = []
+    for i, n in enumerate(new):
+        for j, o in enumerate(old):
+            sim = _similarity(n["title"], o["title"])
+            if sim < threshold:
+                continue
+            pos = 1 - abs(i / max(len(new), 1) - j / max(len(old), 1))
+            pairs.append((sim * (1 - POSITION_WEIGHT) + pos * POSITION_WEIGHT, i, j))
+    matched, used = {}, set()
+    for _, i, j in sorted(pairs, reverse=True):
+        if i not in matched and j not in used:
+            matched[i] = j
+            used.add(j)
+    return matched
+
+
+def _field_changes(new: dict, old: dict, with_effort: bool) -> dict:
+    changes = {}
+    if new.get("title", "").strip() and new["title"].strip() != old["title"].strip():
+        changes["System.Title"] = new["title"].strip()
+    desc = (new.get("description") or "").strip()
+    if desc and desc != plain_text(old.get("description")):
+        changes["System.Description"] = desc
+    if with_effort and new.get("effort") is not None and new["effort"] != old.get("effort"):
+        changes["Microsoft.VSTS.Scheduling.Effort"] = new["effort"]
+    return changes
+
+
+def plan(hierarchy: dict, tree: dict) -> dict:
+    """Diff a parsed hierarchy against an existing tree from ADOClient.get_feature_tree.
+
+    New items are referenced as "new:<n>" so tasks can point at PBIs that do not
+    exist yet. Returns {"feature_id", "ops": [...], "summary": {op: count}}.
+    """
+    ops, seq = [], 0
+    feature = tree["feature"]
+
+    changes = _field_changes(hierarchy.get("feature", {}), feature, with_effort=False)
+    if changes:
+        ops.append({"op": "update", "id": feature["id"], "type": "Feature", "title": feature["title"], "fields": changes})
+
+    new_pbis, old_pbis = hierarchy.get("pbis", []), tree["pbis"]
+    pbi_match = _match(new_pbis, old_pbis, MATCH_THRESHOLD)
+
+    # Resolve PBIs first so tasks can refer to their target parent
+    pbi_refs = {}
+    for i, n in enumerate(new_pbis):
+        if i in pbi_match:
+            old = old_pbis[pbi_match[i]]
+            pbi_refs[i] = old["id"]
+            changes = _field_changes(n, old, with_effort=False)
+            if changes:
+                ops.append({"op": "update", "id": old["id"], "type": PBI_TYPE, "title": old["title"], "fields": changes})
+        else:
+            seq += 1
+            pbi_refs[i] = f"new:{seq}"
+            ops.append({"op": "create", "ref": pbi_refs[i], "type": PBI_TYPE, "title": n["title"],
+                        "description": n.get("description", ""), "parent": feature["id"]})
+
+    # Tasks: match within the PBI pair first, then look for moves across PBIs
+    unmatched_new, unmatched_old = [], {t["id"]: t for p in old_pbis for t in p["tasks"]}
+    for i, n in enumerate(new_pbis):
+        new_tasks = n.get("tasks", [])
+        old_tasks = old_pbis[pbi_match[i]]["tasks"] if i in pbi_match else []
+        task_match = _match(new_tasks, old_tasks, MATCH_THRESHOLD)
+        for k, t in enumerate(new_tasks):
+            if k in task_match:
+                old = old_tasks[task_match[k]]
+                unmatched_old.pop(old["id"], None)
+                changes = _field_changes(t, old, with_effort=True)
+                if changes:
+                    ops.append({"op": "update", "id": old["id"], "type": TASK_TYPE, "title": old["title"], "fields": changes})
+            else:
+                unmatched_new.append((pbi_refs[i], t))
+
+    leftovers = list(unmatched_old.values())
+    moves = _match([t for _, t in unmatched_new], leftovers, REPARENT_THRESHOLD)
+    for k, (parent_ref, t) in enumerate(unmatched_new):
+        if k in moves:
+            old = leftovers[moves[k]]
+            unmatched_old.pop(old["id"], None)
+            ops.append({"op": "reparent", "id": old["id"], "type": TASK_TYPE, "title": old["title"],
+                        "from": old["parent_id"], "parent": parent_ref})
+            changes = _field_changes(t, old, with_effort=True)
+            if changes:
+                ops.append({"op": "update", "id": old["id"], "type": TASK_TYPE, "title": old["title"], "fields": changes})
+        else:
+            seq += 1
+            ops.append({"op": "create", "ref": f"new:{seq}", "type": TASK_TYPE, "title": t["title"],
+                        "effort": t.get("effort"), "parent": parent_ref})
+
+    matched_pbis = set(pbi_match.values())
+    for t in unmatched_old.values():
+        ops.append({"op": "remove", "id": t["id"], "type": TASK_TYPE, "title": t["title"]})
+    for j, p in enumerate(old_pbis):
+        if j not in matched_pbis:
+            ops.append({"op": "remove", "id": p["id"], "type": PBI_TYPE, "title": p["title"]})
+
+    summary = {k: sum(1 for o in ops if o["op"] == k) for k in ("create", "update", "reparent", "remove")}
+    return {"feature_id": feature["id"], "ops": ops, "summary": summary}
+
+
+def check(client: ADOClient, reconcile_plan: dict, shared: dict) -> list[str]:
+    """Problems with a plan's writes against the cached process metadata, as for a
+    new hierarchy: shared fields once, then each create and update (empty list = fine).
+    """
+    meta = client.meta
+    if meta is None:
+        return []
+    shared_problems = meta.check("Feature", shared)
+    problems = list(shared_problems)
+    for op in reconcile_plan["ops"]:
+        if op["op"] == "create":
+            fields = {**shared, "System.Title": op["title"], "System.Description": op.get("description", "")}
+            if op["type"] == TASK_TYPE:
+                fields["Microsoft.VSTS.Scheduling.Effort"] = op.get("effort")
+            own = meta.check(op["type"], fields, creating=True)
+        elif op["op"] == "update":
+            own = meta.check(op["type"], op["fields"])
+        else:
+            continue
+        problems += [f"{op['op']} {op['type']} '{op['title']}': {p}" for p in own if p not in shared_problems]
+    return problems
+
+
+def apply(
+    client: ADOClient,
+    reconcile_plan: dict,
+    assigned_to: str = "",
+    area_path: str = "",
+    iteration_path: str = "",
+    delete_removed: bool = False,
+    validate: bool = True,
+) -> dict:
+    """Execute a plan in dependency order: updates, creates (PBIs before tasks),
+    reparents, then removes (only with `delete_removed`).
+    With `validate`, the assignee is resolved to its identity and every write is
+    checked against the cached process metadata first, as for /api/create; any
+    problems are returned in "invalid" and nothing is written.
+    Returns {"applied": [...], "failed": [...], "created": {ref: id}, "invalid": [...]}.
+    """
+    applied, failed = [], []
+    ids, urls = {}, {}
+    result = {"applied": applied, "failed": failed, "created": ids, "invalid": []}
+    if validate:
+        try:
+            assigned_to = client.normalize_assignee(assigned_to) if assigned_to else assigned_to
+        except identities.IdentityError as e:
+            result["invalid"] = [str(e)]
+            return result
+        result["invalid"] = check(client, reconcile_plan, {
+            "System.AssignedTo": assigned_to, "System.AreaPath": area_path, "System.IterationPath": iteration_path})
+        if result["invalid"]:
+            return result
+
+    def target(ref) -> tuple[int, str] | tuple[None, None]:
+        if isinstance(ref, str):
+            return ids.get(ref), urls.get(ref)
+        return ref, f"{client.base_url}/workItems/{ref}"
+
+    ops   = reconcile_plan["ops"]
+    order = {"update": 0, "create": 1, "reparent": 2, "remove": 3}
+    for op in sorted(ops, key=lambda o: (order[o["op"]], o.get("type") != PBI_TYPE)):
+        kind = op["op"]
+        if kind == "update":
+            ok = client.update_work_item(op["id"], op["fields"])
+        elif kind == "create":
+            parent_id, parent_url = target(op["parent"])
+            if parent_id is None:
+                failed.append({**op, "error": "Parent was not created"})
+                continue
+            item = client.create_work_item(
+                wit_type=op["type"],
+                title=op["title"],
+                description=op.get("description", ""),
+                assigned_to=assigned_to,
+                area_path=area_path,
+                iteration_path=iteration_path,
+                effort=op.get("effort"),
+                parent_url=parent_url,
+            )
+            ok = item is not None
+            if ok:
+                ids[op["ref"]], urls[op["ref"]] = item["id"], item["url"]
+                op = {**op, "id": item["id"]}
+        elif kind == "reparent":
+            parent_id, parent_url = target(op["parent"])
+            if parent_id is None:
+                failed.append({**op, "error": "Parent was not created"})
+                continue
+            ok, err = client.set_parent(op["id"], parent_id, parent_url=parent_url)
+            if not ok:
+                failed.append({**op, "error": err})
+                continue
+        elif kind == "remove":
+            if not delete_removed:
+                continue
+            ok = client.delete_work_item(op["id"])
+        (applied if ok else failed).append(op if ok else {**op, "error": f"{kind} failed"})
+
+    return result
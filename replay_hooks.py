@@ -0,0 +1,100 @@
+"""
+Replay ADO service-hook payloads against a running API, for exercising
+/api/hooks/ado locally without an ADO subscription.
+
+Payload files may hold one payload or a JSON list of them; directories are
+replayed in file-name order. Record real payloads from the subscription's
+History tab in ADO, or generate minimal ones with --sample.
+
+Usage:
+    python replay_hooks.py recorded/                       # every *.json in the folder
+    python replay_hooks.py created.json updated.json --url http://localhost:8000
+    python replay_hooks.py --sample workitem.updated --id 1234 --title "New title"
+    python replay_hooks.py --sample workitem.deleted --id 1234 --save deleted.json
+
+The secret defaults to CLAUDEADO_HOOK_SECRET.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import requests
+from rich.console import Console
+
+import hooks
+
+console = Console()
+
+
+def load_payloads(paths: list[str]) -> list[tuple[str, dict]]:
+    out = []
+    for p in map(Path, paths):
+        files = sorted(p.glob("*.json")) if p.is_dir() else [p]
+        for f in files:
+            data = json.loads(f.read_text(encoding="utf-8"))
+            items = data if isinstance(data, list) else [data]
+            out.extend((f"{f.name}[{i}]" if len(items) > 1 else f.name, item) for i, item in enumerate(items))
+    return out
+
+
+def replay(payloads: list[tuple[str, dict]], url: str, secret: str) -> int:
+    """POST each payload in order. Returns the number of failures."""
+    failures = 0
+    session  = requests.Session()
+    for name, payload in payloads:
+        try:
+            r = session.post(url, json=payload, headers={"X-Hook-Secret": secret}, timeout=30)
+        except requests.RequestException as e:
+            console.print(f"  [red]✗ {name}: {e}[/red]")
+            failures += 1
+            continue
+        if r.ok:
+            body = r.json()
+            console.print(f"  [green]✓[/green] {name}: {body.get('status')} "
+                          f"{body.get('event') or ''} #{body.get('id', '-')} "
+                          f"[dim](invalidated {body.get('invalidated', 0)})[/dim]")
+        else:
+            console.print(f"  [red]✗ {name}: HTTP {r.status_code} — {r.text[:200]}[/red]")
+            failures += 1
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay ADO service-hook payloads to /api/hooks/ado")
+    ap.add_argument("paths", nargs="*", help="payload .json files or folders")
+    ap.add_argument("--url", default="http://localhost:8000/api/hooks/ado")
+    ap.add_argument("--secret", default=os.getenv("CLAUDEADO_HOOK_SECRET", ""))
+    ap.add_argument("--sample", choices=sorted(hooks.EVENTS), help="generate a payload instead of reading files")
+    ap.add_argument("--id", type=int, help="work item ID for --sample")
+    ap.add_argument("--rev", type=int, default=2)
+    ap.add_argument("--title", default="")
+    ap.add_argument("--type", default="Task", help="work item type for --sample")
+    ap.add_argument("--parent", type=int, help="parent ID for --sample")
+    ap.add_argument("--project", default="", help="System.TeamProject for --sample")
+    ap.add_argument("--save", help="write the --sample payload to this file instead of sending it")
+    args = ap.parse_args()
+
+    payloads = load_payloads(args.paths)
+    if args.sample:
+        if not args.id:
+            ap.error("--sample needs --id")
+        payload = hooks.sample(args.sample, args.id, rev=args.rev, title=args.title, wit_type=args.type,
+                               project=args.project, parent_id=args.parent)
+        if args.save:
+            Path(args.save).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            console.print(f"[green]Saved {args.sample} payload to {args.save}[/green]")
+            return
+        payloads.append((args.sample, payload))
+    if not payloads:
+        ap.error("nothing to replay — pass payload files/folders or --sample")
+    if not args.secret:
+        ap.error("no secret — set CLAUDEADO_HOOK_SECRET or pass --secret")
+
+    console.print(f"[bold]Replaying {len(payloads)} payload(s) → {args.url}[/bold]")
+    sys.exit(1 if replay(payloads, args.url, args.secret) else 0)
+
+
+if __name__ == "__main__":
+    main()
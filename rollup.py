@@ -0,0 +1,250 @@
+"""
+Effort rollups — Task effort totals per PBI, Feature, assignee and iteration.
+
+Feature trees are loaded once (batched, several Features per pass) and kept
+per connection scope. Every Task contributes its effort to counters for its
+PBI, its Feature, and the Feature's assignee and iteration buckets; the
+response for any Feature set is summed from those counters. Item changes
+(ADO service hooks and this app's own writes, via cache.subscribe) move only
+the affected Tasks' contributions instead of recomputing the trees.
+
+Like the listing cache, the loaded trees are only trusted while service hooks
+keep them current (cache.enabled()); otherwise every request reloads them. With
+shared state on, a change handled by any worker bumps the shared epoch and every
+worker drops its trees the next time it looks.
+"""
+import threading
+from collections import defaultdict
+
+import cache
+from workitem import FIELD_REFS, normalize
+
+TASK_TYPE    = "Task"
+FEATURE_TYPE = "Feature"
+DONE_STATES  = {"Done", "Closed", "Resolved", "Completed"}
+TRACKED_KEYS = ("type", "title", "state", "parent_id", "effort", "assigned_to", "iteration_path")
+UNASSIGNED   = "(unassigned)"
+NO_ITERATION = "(none)"
+
+
+def _bucket() -> list:
+    return [0.0, 0.0, 0, 0]  # effort, remaining, tasks, unestimated
+
+
+class _Scope:
+    """Loaded items and running counters for one org/project."""
+
+    def __init__(self):
+        self.items    = {}                    # id → {TRACKED_KEYS}
+        self.children = defaultdict(set)      # parent id → child ids
+        self.features = set()                 # Feature IDs whose trees are loaded
+        self.counters = defaultdict(_bucket)  # (kind, feature_id, key) → bucket
+
+    # ─── Contributions ────────────────────────────────────────
+
+    def _feature_of(self, item_id: int) -> int | None:
+        node = self.items.get(item_id)
+        for _ in range(4):  # Task → PBI → Feature, with slack for deeper trees
+            if node is None:
+                return None
+            if node["type"] == FEATURE_TYPE:
+                return item_id if item_id in self.features else None
+            item_id = node["parent_id"]
+            node    = self.items.get(item_id)
+        return None
+
+    def _keys(self, task_id: int) -> list[tuple]:
+        task = self.items[task_id]
+        if task["type"] != TASK_TYPE or task["state"] == "Removed":
+            return []
+        feature = self._feature_of(task_id)
+        if feature is None:
+            return []
+        keys = [("feature", feature, feature),
+                ("assignee", feature, task["assigned_to"] or UNASSIGNED),
+                ("iteration", feature, task["iteration_path"] or NO_ITERATION)]
+        if task["parent_id"] != feature:
+            keys.append(("pbi", feature, task["parent_id"]))
+        return keys
+
+    def _apply(self, task_id: int, sign: int):
+        task = self.items[task_id]
+        effort = task["effort"]
+        done   = task["state"] in DONE_STATES
+        for key in self._keys(task_id):
+            b = self.counters[key]
+            b[0] += sign * (effort or 0)
+            b[1] += sign * (0 if done else effort or 0)
+            b[2] += sign
+            b[3] += sign * (effort is None)
+            if not b[2]:
+                del self.counters[key]
+
+    def _tasks_under(self, item_id: int) -> list[int]:
+        out, stack = [], [item_id]
+        while stack:
+            i = stack.pop()
+            node = self.items.get(i)
+            if node is not None and node["type"] == TASK_TYPE:
+                out.append(i)
+            stack.extend(self.children.get(i, ()))
+        return out
+
+    # ─── Mutation ─────────────────────────────────────────────
+
+    def put(self, node: dict):
+        """Insert an item, or merge the keys `node` carries into the loaded one,
+        moving only the contributions it affects."""
+        item_id = node["id"]
+        old     = self.items.get(item_id)
+        if old is not None and all(old[k] == node.get(k, old[k]) for k in TRACKED_KEYS):
+            return
+        affected = self._tasks_under(item_id) if old is not None else []
+        for t in affected:
+            self._apply(t, -1)
+        if old is not None:
+            self.children[old["parent_id"]].discard(item_id)
+            node = {**old, **{k: v for k, v in node.items() if k in TRACKED_KEYS}}
+        self.items[item_id] = {k: node.get(k) for k in TRACKED_KEYS}
+        self.children[self.items[item_id]["parent_id"]].add(item_id)
+        for t in self._tasks_under(item_id):
+            self._apply(t, +1)
+
+    def remove(self, item_id: int):
+        old = self.items.get(item_id)
+        if old is None:
+            return
+        for t in self._tasks_under(item_id):
+            self._apply(t, -1)
+        self.children[old["parent_id"]].discard(item_id)
+        del self.items[item_id]
+        self.features.discard(item_id)
+        # Orphaned descendants stay loaded but no longer count toward any Feature
+
+    def drop_tree(self, feature_id: int):
+        """Forget a Feature and everything under it (before a full reload)."""
+        stack, ids = [feature_id], []
+        while stack:
+            i = stack.pop()
+            ids.append(i)
+            stack.extend(self.children.get(i, ()))
+        for i in reversed(ids):
+            self.remove(i)
+
+    def wants(self, item_id: int, parent_ids: list[int]) -> bool:
+        return item_id in self.items or any(p in self.items for p in parent_ids)
+
+
+class RollupStore:
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._scopes = defaultdict(_Scope)
+        self._epoch  = None
+        self._stats  = {"loads": 0, "features_loaded": 0, "patches": 0}
+
+    def ensure(self, client, feature_ids: list[int], refresh: bool = False) -> list[int] | None:
+        """Load any Feature trees not held yet (all of them with refresh, or when no
+        service hooks keep them current) in one batched pass.
+        Returns the Feature IDs that exist, or None if ADO failed.
+        """
+        refresh = refresh or not cache.enabled()
+        with self._lock:
+            epoch = cache.shared_epoch()
+            if epoch != self._epoch:
+                self._scopes.clear()  # another worker saw a change these trees may miss
+                self._epoch = epoch
+            scope   = self._scopes[client.scope]
+            missing = [f for f in feature_ids if refresh or f not in scope.features]
+        if missing:
+            trees = client.get_feature_trees(missing)
+            if trees is None:
+                return None
+            with self._lock:
+                scope = self._scopes[client.scope]
+                for fid, tree in trees.items():
+                    if refresh:
+                        scope.drop_tree(fid)
+                    scope.features.add(fid)
+                    nodes = [tree["feature"]]
+                    for p in tree["pbis"]:
+                        nodes.append(p)
+                        nodes.extend(p.get("tasks", []))
+                    for n in nodes:
+                        scope.put(n)
+                for fid in missing:
+                    if fid not in trees:
+                        scope.drop_tree(fid)  # deleted in ADO since it was loaded
+                self._stats["loads"] += 1
+                self._stats["features_loaded"] += len(trees)
+        with self._lock:
+            return [f for f in feature_ids if f in self._scopes[client.scope].features]
+
+    def on_change(self, change: dict):
+        """cache.subscribe listener — patch loaded trees from a pushed or local change."""
+        with self._lock:
+            scopes = [self._scopes[change["scope"]]] if change.get("scope") in self._scopes else list(self._scopes.values())
+            for scope in scopes:
+                if not scope.wants(change["id"], change.get("parent_ids", [])):
+                    continue
+                if change["event"] == "deleted":
+                    scope.remove(change["id"])
+                elif change.get("item"):
+                    # An update payload may carry only the fields that changed: merge just those
+                    item    = change["item"]
+                    fields  = item.get("fields") or {}
+                    w       = normalize([item], "", "")[0]
+                    present = [k for k in TRACKED_KEYS if FIELD_REFS[k] in fields
+                               or (k == "parent_id" and item.get("relations") is not None)]
+                    scope.put({"id": w.id, **{k: getattr(w, k) for k in present}})
+                else:
+                    continue
+                self._stats["patches"] += 1
+
+    def report(self, client, feature_ids: list[int]) -> dict:
+        """Aggregates over the given (already loaded) Features."""
+        with self._lock:
+            scope  = self._scopes[client.scope]
+            wanted = set(feature_ids)
+            sums   = defaultdict(lambda: defaultdict(_bucket))
+            for (kind, fid, key), b in scope.counters.items():
+                if fid in wanted:
+                    target = sums[kind][key]
+                    for i in range(4):
+                        target[i] += b[i]
+
+            def fmt(b: list) -> dict:
+                return {"effort": round(b[0], 2), "remaining": round(b[1], 2), "tasks": b[2], "unestimated": b[3]}
+
+            features = []
+            for fid in feature_ids:
+                node = scope.items.get(fid)
+                if node is None:
+                    continue
+                pbis = [
+                    {"id": pid, "title": scope.items[pid]["title"], "state": scope.items[pid]["state"],
+                     **fmt(sums["pbi"].get(pid, _bucket()))}
+                    for pid in sorted(scope.children.get(fid, ()))
+                    if pid in scope.items and scope.items[pid]["type"] != TASK_TYPE
+                ]
+                features.append({"id": fid, "title": node["title"], "state": node["state"],
+                                 **fmt(sums["feature"].get(fid, _bucket())), "pbis": pbis})
+            total = _bucket()
+            for b in sums["feature"].values():
+                for i in range(4):
+                    total[i] += b[i]
+        return {
+            "features":     features,
+            "by_assignee":  {k: fmt(v) for k, v in sorted(sums["assignee"].items())},
+            "by_iteration": {k: fmt(v) for k, v in sorted(sums["iteration"].items())},
+            "totals":       {**fmt(total), "features": len(features),
+                             "pbis": sum(len(f["pbis"]) for f in features)},
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "scopes": len(self._scopes),
+                    "items": sum(len(s.items) for s in self._scopes.values())}
+
+
+rollups = RollupStore()
+cache.subscribe(rollups.on_change)
@@ -0,0 +1,223 @@
+"""
+Local full-text search index over work items (SQLite FTS5).
+
+Filled incrementally as a side effect of ADOClient creates, updates and reads,
+so searching titles, descriptions, tags and paths never needs a WIQL CONTAINS
+round trip. Rows are merged per item — a partial read (e.g. a `fields=`
+projection) only overwrites the columns it actually carries.
+"""
+import html
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import cache
+
+INDEX_FILE = Path(__file__).parent / "search_index.db"
+
+COLUMNS = ["scope", "type", "state", "rev", "title", "description", "tags", "area_path", "iteration_path"]
+
+# ADO field reference → index column
+FIELD_COLUMNS = {
+    "System.WorkItemType":  "type",
+    "System.State":         "state",
+    "System.Rev":           "rev",
+    "System.Title":         "title",
+    "System.Description":   "description",
+    "System.Tags":          "tags",
+    "System.AreaPath":      "area_path",
+    "System.IterationPath": "iteration_path",
+}
+
+# Work item IDs are only unique within an organisation, so rows are keyed by
+# (scope, id). `key` is a stable surrogate rowid for the FTS table to point at.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key            INTEGER PRIMARY KEY,
+    id             INTEGER NOT NULL,
+    scope          TEXT NOT NULL,
+    type           TEXT DEFAULT '',
+    state          TEXT DEFAULT '',
+    rev            INTEGER DEFAULT 0,
+    title          TEXT DEFAULT '',
+    description    TEXT DEFAULT '',
+    tags           TEXT DEFAULT '',
+    area_path      TEXT DEFAULT '',
+    iteration_path TEXT DEFAULT '',
+    indexed_at     REAL NOT NULL,
+    UNIQUE (scope, id)
+);
+CREATE INDEX IF NOT EXISTS items_id ON items (id);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, description, tags, area_path, iteration_path,
+    content='items', content_rowid='key', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, title, description, tags, area_path, iteration_path)
+    VALUES (new.key, new.title, new.description, new.tags, new.area_path, new.iteration_path);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, tags, area_path, iteration_path)
+    VALUES ('delete', old.key, old.title, old.description, old.tags, old.area_path, old.iteration_path);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, tags, area_path, iteration_path)
+    VALUES ('delete', old.key, old.title, old.description, old.tags, old.area_path, old.iteration_path);
+    INSERT INTO items_fts(rowid, title, description, tags, area_path, iteration_path)
+    VALUES (new.key, new.title, new.description, new.tags, new.area_path, new.iteration_path);
+END;
+"""
+
+# Index files written before items were keyed by scope; they are dropped and refilled
+_OLD_OBJECTS = [("TRIGGER", "items_ai"), ("TRIGGER", "items_ad"), ("TRIGGER", "items_au"),
+                ("TABLE", "items_fts"), ("TABLE", "items")]
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def plain_text(value) -> str:
+    """Flatten ADO HTML descriptions to text for indexing."""
+    return html.unescape(_TAG_RE.sub(" ", str(value or ""))).strip()
+
+
+def doc_from_item(item: dict) -> dict:
+    """Raw ADO work item JSON → partial index document (only fields present)."""
+    f   = item.get("fields", {})
+    doc = {"id": item["id"]}
+    for ref, col in FIELD_COLUMNS.items():
+        if ref in f:
+            doc[col] = plain_text(f[ref]) if col == "description" else f[ref]
+    if "rev" in item:
+        doc["rev"] = item["rev"]
+    return doc
+
+
+def _match_expr(query: str) -> str:
+    """User text → FTS5 MATCH expression: every word must match, last one as a prefix."""
+    words = re.findall(r"\w+", query, flags=re.UNICODE)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+class SearchIndex:
+    def __init__(self, path: str | Path = INDEX_FILE):
+        self.path  = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(items)")}
+            if columns and "key" not in columns:
+                for kind, name in _OLD_OBJECTS:
+                    self._conn.execute(f"DROP {kind} IF EXISTS {name}")
+            self._conn.executescript(_SCHEMA)
+
+    def upsert(self, scope: str | None, docs: list[dict]):
+        """Merge partial documents into the index. Unchanged rows are not rewritten,
+        so repeated reads of the same items cost one indexed lookup each.
+        With scope=None only rows already in the index are patched, and only when
+        the ID is not indexed under more than one scope.
+        """
+        if not docs:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            for doc in docs:
+                if scope is None:
+                    rows = self._conn.execute("SELECT * FROM items WHERE id = ? LIMIT 2", (doc["id"],)).fetchall()
+                    row  = rows[0] if len(rows) == 1 else None
+                else:
+                    row = self._conn.execute("SELECT * FROM items WHERE scope = ? AND id = ?",
+                                             (scope, doc["id"])).fetchone()
+                if row is None:
+                    merged = {c: "" for c in COLUMNS} | {"rev": 0}
+                else:
+                    merged = {c: row[c] for c in COLUMNS}
+                    if doc.get("rev") and row["rev"] and doc["rev"] < row["rev"]:
+                        continue  # stale read racing a newer write
+                if row is None and scope is None:
+                    continue  # patch-only: unknown items need a scope to be indexed
+                updates = {k: v for k, v in doc.items() if k in COLUMNS and v is not None}
+                if scope is not None:
+                    updates["scope"] = scope
+                if row is not None and all(merged.get(k) == v for k, v in updates.items()):
+                    continue
+                merged.update(updates)
+                if row is None:
+                    self._conn.execute(
+                        f"INSERT INTO items (id, {', '.join(COLUMNS)}, indexed_at) "
+                        f"VALUES (?, {', '.join('?' for _ in COLUMNS)}, ?)",
+                        (doc["id"], *[merged[c] for c in COLUMNS], now),
+                    )
+                else:
+                    self._conn.execute(
+                        f"UPDATE items SET {', '.join(f'{c} = ?' for c in COLUMNS)}, indexed_at = ? WHERE key = ?",
+                        (*[merged[c] for c in COLUMNS], now, row["key"]),
+                    )
+
+    def remove(self, ids: list[int], scope: str | None = None):
+        """Drop items from the index; with scope=None, from every scope."""
+        with self._lock, self._conn:
+            if scope is None:
+                self._conn.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in ids])
+            else:
+                self._conn.executemany("DELETE FROM items WHERE scope = ? AND id = ?", [(scope, i) for i in ids])
+
+    def search(self, scope: str, query: str, wit_type: str = None, limit: int = 20, offset: int = 0) -> dict:
+        """BM25-ranked search (title weighted highest). Returns {"results", "total"}."""
+        expr = _match_expr(query)
+        if not expr:
+            return {"results": [], "total": 0}
+        where  = "items_fts MATCH ? AND i.scope = ?"
+        params = [expr, scope]
+        if wit_type:
+            where += " AND i.type = ?"
+            params.append(wit_type)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM items_fts JOIN items i ON i.key = items_fts.rowid WHERE {where}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT i.id, i.type, i.state, i.title, i.tags, i.area_path, i.iteration_path, "
+                "bm25(items_fts, 10.0, 2.0, 4.0, 1.0, 1.0) AS score, "
+                "snippet(items_fts, -1, '[', ']', '…', 12) AS snippet "
+                f"FROM items_fts JOIN items i ON i.key = items_fts.rowid WHERE {where} "
+                "ORDER BY score LIMIT ? OFFSET ?",
+                [*params, limit, offset],
+            ).fetchall()
+        results = [{**dict(r), "score": round(-r["score"], 4)} for r in rows]
+        return {"results": results, "total": total}
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        return {"items": count, "path": self.path}
+
+
+_default: SearchIndex | None = None
+_default_lock = threading.Lock()
+
+
+def get_index() -> SearchIndex:
+    """Process-wide index shared by all ADOClient instances."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SearchIndex(INDEX_FILE)
+        return _default
+
+
+def _on_change(change: dict):
+    """Keep the index in step with changes pushed by ADO service hooks."""
+    if change["event"] == "deleted":
+        get_index().remove([change["id"]], change.get("scope"))
+    elif change.get("item"):
+        get_index().upsert(change.get("scope"), [doc_from_item(change["item"])])
+
+
+cache.subscribe(_on_change)
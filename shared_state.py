@@ -0,0 +1,237 @@
+"""
+Cross-process shared state for multi-worker API deployments.
+
+When the API runs under several uvicorn/gunicorn workers, each process would
+otherwise keep its own token cache, run its own AzureAuth subprocess and
+throttle against its own private budget. With CLAUDEADO_SHARED_STATE set,
+workers on the same host share, through a local SQLite file:
+
+  - ADO tokens per profile (acquired once, under a cross-process file lock)
+  - the per-profile ADO request budget (one token bucket for all workers)
+  - counters, e.g. the listing-cache epoch bumped when an ADO hook arrives
+
+Set CLAUDEADO_SHARED_STATE=1 to use shared_state.db next to this file, or to a
+path to put the database elsewhere.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+STATE_FILE = Path(__file__).parent / "shared_state.db"
+TOKEN_TTL  = 50 * 60  # AzureAuth tokens live ~60 min; refresh a little early
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    profile    TEXT PRIMARY KEY,
+    token      TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    name    TEXT PRIMARY KEY,
+    tokens  REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("CLAUDEADO_SHARED_STATE", "").strip().lower() not in ("", "0", "false", "no")
+
+
+def _path() -> Path:
+    value = os.getenv("CLAUDEADO_SHARED_STATE", "").strip()
+    return STATE_FILE if value.lower() in ("1", "true", "yes") else Path(value)
+
+
+class FileLock:
+    """Exclusive inter-process lock on a sidecar file (fcntl on POSIX, msvcrt on Windows)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fh  = None
+
+    def __enter__(self):
+        self._fh = open(self.path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if os.name == "nt":
+            import msvcrt
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        self._fh.close()
+        self._fh = None
+
+
+class SharedStore:
+    def __init__(self, path: Path):
+        self.path  = Path(path)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Immediate write transaction — serialises read-modify-write across processes."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ─── Tokens ───────────────────────────────────────────────
+
+    def get_token(self, profile: str) -> str | None:
+        row = self._conn().execute(
+            "SELECT token FROM tokens WHERE profile = ? AND expires_at > ?", (profile, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_token(self, profile: str, token: str, ttl: float = TOKEN_TTL):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO tokens (profile, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(profile) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at",
+                (profile, token, time.time() + ttl),
+            )
+
+    def clear_tokens(self, profile: str = None):
+        with self._write() as conn:
+            if profile is None:
+                conn.execute("DELETE FROM tokens")
+            else:
+                conn.execute("DELETE FROM tokens WHERE profile = ?", (profile,))
+
+    def token_lock(self, profile: str) -> FileLock:
+        """Held while acquiring a token so only one worker runs AzureAuth per profile."""
+        safe = "".join(c if c.isalnum() else "_" for c in profile)
+        return FileLock(self.path.with_name(f"{self.path.name}.{safe}.lock"))
+
+    # ─── Request budget ───────────────────────────────────────
+
+    def take(self, name: str, rate: float, capacity: float, tokens: float = 1.0) -> float:
+        """Try to take from the shared bucket. Returns 0 on success, else seconds to wait."""
+        with self._write() as conn:
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM budgets WHERE name = ?", (name,)).fetchone()
+            level = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            if level >= tokens:
+                level -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - level) / rate
+            conn.execute(
+                "INSERT INTO budgets (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (name, level, now),
+            )
+            return wait
+
+    def level(self, name: str, rate: float, capacity: float) -> float:
+        row = self._conn().execute("SELECT tokens, updated FROM budgets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (time.time() - row[1]) * rate)
+
+    # ─── Counters ─────────────────────────────────────────────
+
+    def get_counter(self, name: str) -> int:
+        row = self._conn().execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_counter(self, name: str) -> int:
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            return conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+
+
+class SharedRateLimiter:
+    """RateLimiter-compatible token bucket whose level lives in the shared store,
+    so the budget is global across every worker process on the host.
+    """
+
+    def __init__(self, store: SharedStore, name: str, rate: float, burst: int = None):
+        self.store    = store
+        self.name     = name
+        self.rate     = float(rate)
+        self.capacity = float(burst or max(1, int(rate * 2)))
+        self._lock    = threading.Lock()
+        self._stats   = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+
+    def acquire(self, tokens: float = 1.0):
+        waited = 0.0
+        while True:
+            delay = self.store.take(self.name, self.rate, self.capacity, tokens)
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+        with self._lock:
+            self._stats["acquired"] += 1
+            if waited:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += waited
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate":         self.rate,
+                "burst":        self.capacity,
+                "available":    round(self.store.level(self.name, self.rate, self.capacity), 2),
+                "acquired":     self._stats["acquired"],
+                "waited":       self._stats["waited"],
+                "wait_seconds": round(self._stats["wait_seconds"], 3),
+                "shared":       True,
+            }
+
+
+_store: SharedStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SharedStore | None:
+    """The process's handle on the shared store, or None when shared state is off."""
+    global _store
+    if not enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore(_path())
+        return _store
@@ -0,0 +1,69 @@
+"""
+Single-flight request coalescing — concurrent identical calls share one execution.
+
+The first caller for a key runs the function; callers arriving while it is in
+flight block and receive the same result (or exception). Nothing is cached
+once the call completes, so this never serves stale data.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event   = threading.Event()
+        self.result  = None
+        self.error   = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._calls  = {}
+        self._stats  = {"executed": 0, "shared": 0}
+
+    def do(self, key, fn):
+        """Run fn() once per concurrent key; followers get the leader's result."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["shared"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            executed, shared = self._stats["executed"], self._stats["shared"]
+            return {
+                "executed":   executed,
+                "shared":     shared,
+                "in_flight":  len(self._calls),
+                "saved_ratio": round(shared / (executed + shared), 4) if executed + shared else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"executed": 0, "shared": 0}
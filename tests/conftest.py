@@ -0,0 +1,67 @@
+"""
+Shared fixtures: the repo's flat modules on sys.path, every on-disk store in a
+per-test temp directory, and an in-process ADO mock (mock_ado) for client paths.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import breaker as breaker_module  # noqa: E402
+import config as cfg_module  # noqa: E402
+import identities  # noqa: E402
+import mock_ado  # noqa: E402
+import search_index  # noqa: E402
+import shared_state  # noqa: E402
+import write_queue  # noqa: E402
+from ado_client import ADOClient  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Keep config, indexes, queues and breakers out of the checkout and apart per test."""
+    monkeypatch.setattr(cfg_module, "CONFIG_FILE", tmp_path / "config.json")
+    monkeypatch.setattr(search_index, "INDEX_FILE", tmp_path / "search_index.db")
+    monkeypatch.setattr(search_index, "_default", None)
+    monkeypatch.setattr(identities, "IDENTITY_FILE", tmp_path / "identities.db")
+    monkeypatch.setattr(write_queue, "QUEUE_FILE", tmp_path / "write_queue.db")
+    monkeypatch.setattr(shared_state, "STATE_FILE", tmp_path / "shared_state.db")
+    monkeypatch.setattr(breaker_module, "_breakers", {})
+    for var in ("CLAUDEADO_HOOK_SECRET", "CLAUDEADO_SHARED_STATE", "CLAUDEADO_WRITE_BEHIND"):
+        monkeypatch.delenv(var, raising=False)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def ado_server():
+    server = mock_ado.serve()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def mock_store(ado_server, monkeypatch) -> mock_ado.MockStore:
+    """Empty mock ADO store for this test (no simulated outage)."""
+    store = mock_ado.MockStore()
+    monkeypatch.setattr(ado_server.RequestHandlerClass, "store", store)
+    monkeypatch.setattr(ado_server.RequestHandlerClass, "ado_status", 0)
+    return store
+
+
+@pytest.fixture
+def client(ado_server, mock_store, tmp_path) -> ADOClient:
+    org = mock_ado.mock_org_url(ado_server)
+    return ADOClient(org, mock_ado.MOCK_PROJECT, "test-token", index=search_index.SearchIndex(tmp_path / "index.db"))
+
+
+def add_item(store: mock_ado.MockStore, client: ADOClient, wit_type: str, title: str,
+             parent: dict = None, **fields) -> dict:
+    """Create an item directly in the mock store (as if made in the ADO web UI)."""
+    ops = [{"op": "add", "path": "/fields/System.Title", "value": title}]
+    ops += [{"op": "add", "path": f"/fields/{k}", "value": v} for k, v in fields.items()]
+    if parent is not None:
+        ops.append({"op": "add", "path": "/relations/-",
+                    "value": {"rel": "System.LinkTypes.Hierarchy-Reverse", "url": parent["url"]}})
+    return store.create(wit_type, ops, client.scope)
@@ -0,0 +1,195 @@
+"""Admission control: fair queuing in AdmissionController, user keys, and the ASGI middleware."""
+import asyncio
+import json
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmissionRejected
+
+LIMITS = {"global_limit": 2, "per_user_limit": 1, "queue_limit": 8, "per_user_queue": 3,
+          "max_wait": 2.0, "trusted_proxies": ["10.0.0.9"]}
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def _controller(**overrides):
+    return AdmissionController({**LIMITS, **overrides})
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_admits_up_to_the_limits_at_once():
+    async def scenario():
+        c = _controller()
+        await c.acquire("a")
+        await c.acquire("b")
+        assert c.stats()["running"] == 2 and c.stats()["waiting"] == 0
+    run(scenario())
+
+
+def test_freed_slots_go_round_robin_across_users():
+    async def scenario():
+        c, order = _controller(global_limit=1, per_user_limit=1), []
+        await c.acquire("holder")
+
+        async def request(user, tag):
+            await c.acquire(user)
+            order.append(tag)
+            await asyncio.sleep(0.01)
+            c.release(user, 0.01)
+
+        # "a" queues three requests before "b" and "c" queue one each
+        tasks = [asyncio.create_task(request(u, f"{u}{n}")) for u, n in
+                 [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("c", 1)]]
+        await _settle()
+        assert c.stats()["waiting"] == 5
+        c.release("holder", 0.01)
+        await asyncio.gather(*tasks)
+        return order
+    assert run(scenario()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_full_user_queue_is_rejected_with_position_and_retry_hint():
+    async def scenario():
+        c = _controller(global_limit=1, per_user_queue=1)
+        await c.acquire("holder")
+        waiter = asyncio.create_task(c.acquire("a"))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as e:
+            await c.acquire("a")
+        assert "queue full" in str(e.value)
+        assert e.value.position == 1 and e.value.retry_after >= 1
+        assert c.stats()["rejected"] == 1
+        waiter.cancel()
+    run(scenario())
+
+
+def test_waiting_past_max_wait_is_rejected():
+    async def scenario():
+        c = _controller(global_limit=1, max_wait=0.05)
+        await c.acquire("holder")
+        with pytest.raises(AdmissionRejected, match="still queued"):
+            await c.acquire("a")
+        stats = c.stats()
+        assert stats["timed_out"] == 1 and stats["waiting"] == 0
+    run(scenario())
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        c = _controller(global_limit=1)
+        await c.acquire("holder")
+        waiter = asyncio.create_task(c.acquire("a"))
+        await _settle()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert c.stats()["waiting"] == 0
+        c.release("holder")
+        assert c.stats()["running"] == 0  # the slot was not handed to the cancelled waiter
+    run(scenario())
+
+
+def test_user_key_ignores_x_user_from_untrusted_clients():
+    assert admission.user_key("10.0.0.1", "alice", limits=LIMITS) == "addr:10.0.0.1"
+    assert admission.user_key("10.0.0.9", "alice", limits=LIMITS) == "user:alice"
+    assert admission.user_key("10.0.0.1", "", "no-such-profile", limits=LIMITS) == "addr:10.0.0.1"
+
+
+def test_user_key_uses_a_configured_profile():
+    assert admission.user_key("10.0.0.1", "", "default", limits=LIMITS) == "profile:default"
+
+
+# ─── Middleware ───────────────────────────────────────────────
+
+def _scope(path="/api/parse", client="10.0.0.1", headers=()):
+    return {"type": "http", "method": "POST", "path": path, "client": (client, 5000),
+            "headers": [(k.encode(), v.encode()) for k, v in headers], "query_string": b""}
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    c = _controller(global_limit=1)
+    monkeypatch.setattr(admission, "controller", c)
+    return c
+
+
+def test_middleware_frees_a_queued_slot_when_the_client_disconnects(controller):
+    import api
+
+    async def scenario():
+        await controller.acquire("holder")
+        gone, sent, ran = asyncio.Event(), [], []
+
+        async def receive():
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        async def app(scope, receive, send):
+            ran.append(True)
+
+        middleware = api.AdmissionMiddleware(app)
+        request    = asyncio.create_task(middleware(_scope(), receive, send))
+        await _settle()
+        assert controller.stats()["waiting"] == 1
+        gone.set()
+        await asyncio.wait_for(request, 1)
+        assert controller.stats()["waiting"] == 0
+        assert ran == [] and sent == []
+    run(scenario())
+
+
+def test_middleware_replays_the_body_read_while_queued(controller):
+    import api
+
+    async def scenario():
+        await controller.acquire("holder")
+        messages = [{"type": "http.request", "body": b'{"text": "x"}', "more_body": False}]
+        bodies   = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Event().wait()  # no disconnect
+
+        async def app(scope, receive, send):
+            bodies.append((await receive())["body"])
+
+        request = asyncio.create_task(api.AdmissionMiddleware(app)(_scope(), receive, None))
+        await _settle()
+        controller.release("holder")
+        await asyncio.wait_for(request, 1)
+        assert bodies == [b'{"text": "x"}']
+        assert controller.stats()["running"] == 0
+    run(scenario())
+
+
+def test_middleware_answers_429_when_over_capacity(controller):
+    import api
+    controller._limits = {**controller._limits, "per_user_queue": 0}
+
+    async def scenario():
+        await controller.acquire("holder")
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        await api.AdmissionMiddleware(None)(_scope(), receive, send)
+        start, body = sent[0], json.loads(sent[1]["body"])
+        assert start["status"] == 429
+        assert int(dict(start["headers"])[b"retry-after"]) == body["retry_after"] >= 1
+        assert body["queue_position"] == 0  # nobody queued ahead, the user queue just holds none
+    run(scenario())
@@ -0,0 +1,104 @@
+"""Circuit breaker state machine and health probe, and how ADO writes behave when it opens."""
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import breaker
+import mock_ado
+from breaker import FAILURE_THRESHOLD, SLOW_SECONDS, CircuitBreaker, CircuitOpenError
+
+
+def _fail(b, n):
+    for _ in range(n):
+        b.record(0.1, "HTTP 503")
+
+
+def test_opens_after_consecutive_failures():
+    b = CircuitBreaker("org")
+    _fail(b, FAILURE_THRESHOLD - 1)
+    b.before()  # still closed
+    _fail(b, 1)
+    assert b.state == "open"
+    with pytest.raises(CircuitOpenError) as e:
+        b.before()
+    assert e.value.retry_after >= 0
+    assert b.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    b = CircuitBreaker("org")
+    _fail(b, FAILURE_THRESHOLD - 1)
+    b.record(0.1)
+    _fail(b, FAILURE_THRESHOLD - 1)
+    assert b.state == "closed"
+
+
+def test_slow_answers_count_as_failures():
+    b = CircuitBreaker("org")
+    for _ in range(FAILURE_THRESHOLD):
+        b.record(SLOW_SECONDS + 1)
+    assert b.state == "open"
+    assert b.last_error.startswith("slow response")
+
+
+def test_circuit_open_is_a_connection_error():
+    # Callers that already handle requests.ConnectionError need no new except clause
+    assert issubclass(CircuitOpenError, requests.ConnectionError)
+
+
+@pytest.mark.parametrize("status, ok", [(200, True), (404, True), (401, False), (403, False),
+                                        (429, False), (500, False), (503, False)])
+def test_ping_judges_probe_status(status, ok):
+    b = CircuitBreaker("org", probe=lambda: SimpleNamespace(status_code=status))
+    assert b.ping()["ok"] is ok
+    assert b.last_probe["status"] == status
+
+
+def test_ping_survives_probe_exceptions():
+    def probe():
+        raise RuntimeError("token refresh failed")
+    b = CircuitBreaker("org", probe=probe)
+    result = b.ping()
+    assert result["ok"] is False and result["status"] == "RuntimeError"
+
+
+def test_get_replaces_the_probe():
+    first, second = (lambda: None), (lambda: None)
+    b = breaker.get("https://dev.azure.com/org", probe=first)
+    assert breaker.get("https://dev.azure.com/org", probe=second) is b
+    assert b.probe is second
+
+
+# ─── ADO client (mock) ────────────────────────────────────────
+
+def test_outage_opens_the_breaker_and_fails_fast(client, ado_server, monkeypatch):
+    client.breaker.probe = None  # no background prober in tests
+    monkeypatch.setattr(ado_server.RequestHandlerClass, "ado_status", 503)
+    for _ in range(FAILURE_THRESHOLD):
+        client.get_work_item(1)
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get_work_item(1)
+
+
+def test_create_hierarchy_returns_partial_results_when_the_breaker_opens(client, mock_store, monkeypatch):
+    client.breaker.probe = None
+    real, calls = client.create_work_item, []
+
+    def flaky(**kwargs):
+        calls.append(kwargs["title"])
+        if len(calls) >= 4:
+            client.breaker.state = "open"
+            raise CircuitOpenError("org", 5)
+        return real(**kwargs)
+
+    monkeypatch.setattr(client, "create_work_item", flaky)
+    results = client.create_hierarchy(mock_ado.SAMPLE_HIERARCHY, validate=False, delay=0,
+                                      on_progress=lambda *a: None)
+    assert results["feature"] is not None
+    assert results["cancelled"] and "ADO unavailable" in results["error"]
+    created = [results["feature"]["id"]] + [p["pbi"]["id"] for p in results["pbis"]] + \
+              [t["id"] for p in results["pbis"] for t in p["tasks"]]
+    assert len(created) == 3 and all(i in mock_store.items for i in created)
+    assert len(calls) == 4  # nothing attempted after the breaker opened
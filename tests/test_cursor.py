@@ -0,0 +1,58 @@
+"""Cursor paging for Feature listings (ado_client._encode_cursor / _decode_cursor)."""
+import pytest
+
+from ado_client import _decode_cursor, _encode_cursor
+from conftest import add_item
+
+
+def test_cursor_resumes_after_last_item_seen():
+    cursor = _encode_cursor(last_id=30, offset=3, digest="q1")
+    assert _decode_cursor(cursor, "q1", [10, 20, 30, 40, 50]) == 3
+
+
+def test_cursor_anchors_on_item_when_earlier_items_move():
+    cursor = _encode_cursor(last_id=30, offset=3, digest="q1")
+    # Two items inserted ahead of the anchor: no repeats on the next page
+    assert _decode_cursor(cursor, "q1", [5, 6, 10, 20, 30, 40]) == 5
+    # One removed ahead of it: nothing skipped
+    assert _decode_cursor(cursor, "q1", [20, 30, 40]) == 2
+
+
+def test_cursor_falls_back_to_offset_when_anchor_is_gone():
+    cursor = _encode_cursor(last_id=30, offset=3, digest="q1")
+    assert _decode_cursor(cursor, "q1", [10, 20, 40, 50]) == 3
+    assert _decode_cursor(cursor, "q1", [10]) == 1
+
+
+def test_cursor_is_bound_to_its_query():
+    cursor = _encode_cursor(last_id=30, offset=3, digest="q1")
+    with pytest.raises(ValueError, match="does not match"):
+        _decode_cursor(cursor, "q2", [10, 20, 30])
+
+
+@pytest.mark.parametrize("bad", ["", "not-base64!", "eyJ4IjoxfQ", "bnVsbA"])
+def test_malformed_cursor_is_rejected(bad):
+    with pytest.raises(ValueError):
+        _decode_cursor(bad, "q1", [10, 20, 30])
+
+
+def test_paging_walks_every_feature_once(client, mock_store):
+    ids = [add_item(mock_store, client, "Feature", f"Feature {n}", **{"System.Tags": "claudeADO"})["id"]
+           for n in range(7)]
+    seen, cursor = [], None
+    while True:
+        page = client.list_features(fields=["id", "title"], sort="id", descending=False, limit=3, cursor=cursor)
+        assert page["total"] == 7
+        seen += [f["id"] for f in page["features"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids
+
+
+def test_cursor_from_other_filters_is_refused(client, mock_store):
+    for n in range(4):
+        add_item(mock_store, client, "Feature", f"Feature {n}", **{"System.Tags": "claudeADO"})
+    page = client.list_features(sort="id", limit=2)
+    with pytest.raises(ValueError):
+        client.list_features(sort="title", limit=2, cursor=page["next_cursor"])
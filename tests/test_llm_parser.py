@@ -0,0 +1,98 @@
+"""Local recovery of Claude replies: repair_json, continuations and the repair warning."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_parser
+from llm_parser import _merge_continuation, repair_json, validate_hierarchy
+
+PLAN = {"feature": {"title": "Importer", "description": "Bring data in"},
+        "pbis": [{"title": "Parse CSV", "description": "",
+                  "tasks": [{"title": "Tokenizer", "effort": 2}, {"title": "Quoting", "effort": 1}]},
+                 {"title": "Map columns", "description": "",
+                  "tasks": [{"title": "Mapping UI", "effort": 3}]}]}
+TEXT = json.dumps(PLAN, indent=2)
+
+
+def test_valid_json_is_returned_as_is():
+    assert repair_json(TEXT) == PLAN
+
+
+@pytest.mark.parametrize("wrapped", [
+    f"```json\n{TEXT}\n```",
+    f"Here is the plan:\n{TEXT}\nLet me know if you need changes.",
+])
+def test_fences_and_prose_are_stripped(wrapped):
+    assert repair_json(wrapped) == PLAN
+
+
+def test_trailing_commas_are_dropped():
+    assert repair_json(TEXT.replace('"effort": 1}', '"effort": 1},')) == PLAN
+
+
+def test_truncated_reply_keeps_every_complete_value():
+    cut  = TEXT[:TEXT.index('"Map columns"') + 5]  # stops inside the second PBI's title
+    data = repair_json(cut)
+    assert data["feature"] == PLAN["feature"]
+    assert data["pbis"][0] == PLAN["pbis"][0]
+
+
+def test_nothing_usable_returns_none():
+    assert repair_json("I could not produce a plan.") is None
+    assert repair_json('{"feature": {"title": "Imp') is None
+
+
+def test_continuation_overlap_is_not_duplicated():
+    head = TEXT[:120]
+    tail = TEXT[100:]  # the model repeated 20 characters
+    assert json.loads(_merge_continuation(head, tail)) == PLAN
+    assert json.loads(_merge_continuation(head, "```json\n" + TEXT[120:])) == PLAN
+
+
+def test_validate_clamps_and_reports_efforts():
+    data = json.loads(TEXT)
+    data["pbis"][0]["tasks"][0]["effort"] = "40"
+    data["pbis"][0]["tasks"][1]["effort"] = None
+    out, problems = validate_hierarchy(data)
+    assert [t["effort"] for t in out["pbis"][0]["tasks"]] == [10, 1]
+    assert len(problems) == 2
+
+
+# ─── Warnings in parse_text_to_hierarchy ──────────────────────
+
+def _fake_anthropic(replies):
+    class Client:
+        def __init__(self, **kwargs):
+            self.messages = self
+
+        def create(self, **kwargs):
+            text, stop = replies.pop(0)
+            return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)], stop_reason=stop)
+    return Client
+
+
+def _parse(monkeypatch, capsys, replies):
+    monkeypatch.setattr(llm_parser.anthropic, "Anthropic", _fake_anthropic(replies))
+    result = llm_parser.parse_text_to_hierarchy("some plan", "key")
+    return result, " ".join(capsys.readouterr().out.split())  # undo console line wrapping
+
+
+def test_fenced_reply_is_not_reported_as_repaired(monkeypatch, capsys):
+    result, out = _parse(monkeypatch, capsys, [(f"```json\n{TEXT}\n```", "end_turn")])
+    assert result == PLAN
+    assert "repaired" not in out and "cut off" not in out
+
+
+def test_malformed_reply_is_reported_as_repaired(monkeypatch, capsys):
+    malformed = json.dumps(PLAN).replace('"effort": 3}', '"effort": 3},')
+    result, out = _parse(monkeypatch, capsys, [(malformed, "end_turn")])
+    assert result == PLAN
+    assert "repaired locally" in out
+
+
+def test_continued_reply_is_reported(monkeypatch, capsys):
+    result, out = _parse(monkeypatch, capsys, [(TEXT[:150], "max_tokens"), (TEXT[150:], "end_turn")])
+    assert result == PLAN
+    assert "continued over 1 extra call" in out
+    assert "repaired" not in out
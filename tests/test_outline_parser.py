@@ -0,0 +1,93 @@
+"""Local outline fast path: outline_parser.analyze / parse."""
+import pytest
+
+import outline_parser
+from outline_parser import MIN_CONFIDENCE, analyze
+
+HEADINGS = """# CSV importer
+Bring customer data in from spreadsheets.
+
+## Parse files
+Read CSV and TSV.
+- Tokenizer (2d)
+- Quoting rules [1 day]
+
+## Map columns
+- Mapping UI - 3d
+- Validation (4h)
+"""
+
+
+def _efforts(result):
+    return [[t["effort"] for t in p["tasks"]] for p in result["hierarchy"]["pbis"]]
+
+
+def test_heading_outline_parses_with_full_confidence():
+    result = analyze(HEADINGS)
+    assert result["confidence"] == 1.0
+    h = result["hierarchy"]
+    assert h["feature"] == {"title": "CSV importer", "description": "Bring customer data in from spreadsheets."}
+    assert [p["title"] for p in h["pbis"]] == ["Parse files", "Map columns"]
+    assert h["pbis"][0]["description"] == "Read CSV and TSV."
+    assert _efforts(result) == [[2, 1], [3, 1]]
+
+
+@pytest.mark.parametrize("text", [
+    "Importer\n- Parse files\n  - Tokenizer (2d)\n  - Quoting (1d)\n- Map columns\n  - Mapping UI (3d)\n",
+    "1. Importer\n1.1 Parse files\n1.1.1 Tokenizer (2d)\n1.1.2 Quoting (1d)\n1.2 Map columns\n1.2.1 Mapping UI (3d)\n",
+    "- Feature: Importer\n  - PBI: Parse files\n    - Task: Tokenizer (2d)\n    - Task: Quoting (1d)\n"
+    "  - PBI: Map columns\n    - Task: Mapping UI (3d)\n",
+])
+def test_list_and_numbered_outlines_give_the_same_plan(text):
+    result = analyze(text)
+    assert result["confidence"] == 1.0
+    assert result["hierarchy"]["feature"]["title"] == "Importer"
+    assert [p["title"] for p in result["hierarchy"]["pbis"]] == ["Parse files", "Map columns"]
+    assert _efforts(result) == [[2, 1], [3]]
+
+
+def test_missing_efforts_lower_confidence_and_use_the_median():
+    result = analyze("# F\n## P\n- a (2d)\n- b (4d)\n- c\n- d\n")
+    assert result["confidence"] == 0.5
+    assert _efforts(result) == [[2, 4, 3, 3]]
+
+
+def test_pbi_effort_is_shared_among_unmarked_tasks():
+    result = analyze("# F\n- Build importer (3d)\n  - Parse\n  - Map\n- Docs\n  - Guide (1d)\n")
+    assert result["confidence"] == 1.0
+    assert _efforts(result) == [[2, 1], [1]]
+
+
+def test_pbi_effort_covers_only_what_marked_tasks_leave():
+    result = analyze("# F\n- Build importer (5d)\n  - Parse (3d)\n  - Map\n")
+    assert _efforts(result) == [[3, 2]]
+
+
+def test_pbi_effort_too_small_to_share_is_not_invented():
+    result = analyze("# F\n- Build importer (2d)\n  - a\n  - b\n  - c\n")
+    assert result["confidence"] < MIN_CONFIDENCE
+    assert any("too little to share" in r for r in result["reasons"])
+
+
+def test_pbi_effort_disagreeing_with_tasks_is_reported():
+    result = analyze("# F\n- Docs (1d)\n  - Guide (2d)\n")
+    assert _efforts(result) == [[2]]
+    assert any("add up to 2d" in r for r in result["reasons"])
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("Just a paragraph of prose about the project.", "no outline structure"),
+    ("# A\n## P\n- t (1d)\n# B\n## Q\n- u (1d)\n", "no single top-level Feature"),
+    ("# F\n## P\n## Q\n- t (1d)\n", "no single top-level Feature"),  # a PBI without tasks
+    ("# F\n## P\n- t (1d)\n  - too deep (1d)\n", "more than three levels"),
+    ("# F\n- Task: Misplaced\n  - t (1d)\n", "labelled Task"),
+])
+def test_unclear_outlines_are_rejected(text, reason):
+    result = analyze(text)
+    assert result["hierarchy"] is None
+    assert any(reason in r for r in result["reasons"])
+
+
+def test_parse_returns_none_below_min_confidence():
+    assert outline_parser.parse("# F\n## P\n- a\n- b\n") is None
+    assert outline_parser.parse(HEADINGS)["feature"]["title"] == "CSV importer"
@@ -0,0 +1,142 @@
+"""reconcile.plan (pure diffing) and reconcile.apply against the ADO mock."""
+import copy
+
+import reconcile
+from conftest import add_item
+
+
+def _tree():
+    def task(i, title, parent, effort=1):
+        return {"id": i, "title": title, "description": "", "effort": effort, "parent_id": parent}
+    return {
+        "feature": {"id": 1, "title": "Importer", "description": ""},
+        "pbis": [
+            {"id": 10, "title": "Parse CSV files", "description": "", "parent_id": 1,
+             "tasks": [task(11, "Write tokenizer", 10, 2), task(12, "Handle quoting", 10, 1)]},
+            {"id": 20, "title": "Map columns to fields", "description": "", "parent_id": 1,
+             "tasks": [task(21, "Mapping UI", 20, 3), task(22, "Validate mappings against schema", 20, 2)]},
+        ],
+    }
+
+
+def _hierarchy(tree):
+    return {"feature": {"title": tree["feature"]["title"], "description": ""},
+            "pbis": [{"title": p["title"], "description": "",
+                      "tasks": [{"title": t["title"], "effort": t["effort"]} for t in p["tasks"]]}
+                     for p in tree["pbis"]]}
+
+
+def _ops(result, kind):
+    return [o for o in result["ops"] if o["op"] == kind]
+
+
+def test_unchanged_plan_has_no_ops():
+    tree   = _tree()
+    result = reconcile.plan(_hierarchy(tree), tree)
+    assert result["ops"] == []
+    assert result["summary"] == {"create": 0, "update": 0, "reparent": 0, "remove": 0}
+
+
+def test_small_title_edit_and_effort_change_are_updates():
+    tree = _tree()
+    h    = _hierarchy(tree)
+    h["pbis"][0]["title"] = "Parse CSV file"
+    h["pbis"][0]["tasks"][0]["effort"] = 5
+    result = reconcile.plan(h, tree)
+    assert result["summary"] == {"create": 0, "update": 2, "reparent": 0, "remove": 0}
+    updates = {o["id"]: o["fields"] for o in _ops(result, "update")}
+    assert updates[10] == {"System.Title": "Parse CSV file"}
+    assert updates[11] == {"Microsoft.VSTS.Scheduling.Effort": 5}
+
+
+def test_new_pbi_and_its_tasks_are_created_under_a_reference():
+    tree = _tree()
+    h    = _hierarchy(tree)
+    h["pbis"].append({"title": "Schedule nightly imports", "description": "",
+                      "tasks": [{"title": "Cron job", "effort": 1}]})
+    result = reconcile.plan(h, tree)
+    pbi, task = _ops(result, "create")
+    assert pbi["type"] == reconcile.PBI_TYPE and pbi["parent"] == 1
+    assert task["type"] == reconcile.TASK_TYPE and task["parent"] == pbi["ref"]
+
+
+def test_task_moved_between_pbis_is_reparented_not_recreated():
+    tree = _tree()
+    h    = _hierarchy(tree)
+    moved = h["pbis"][1]["tasks"].pop(1)
+    h["pbis"][0]["tasks"].append(moved)
+    result = reconcile.plan(h, tree)
+    assert result["summary"] == {"create": 0, "update": 0, "reparent": 1, "remove": 0}
+    op = _ops(result, "reparent")[0]
+    assert (op["id"], op["from"], op["parent"]) == (22, 20, 10)
+
+
+def test_dropped_items_are_planned_as_removes():
+    tree = _tree()
+    h    = _hierarchy(tree)
+    del h["pbis"][1]
+    result = reconcile.plan(h, tree)
+    assert sorted(o["id"] for o in _ops(result, "remove")) == [20, 21, 22]
+
+
+def test_plan_does_not_modify_its_inputs():
+    tree = _tree()
+    h    = _hierarchy(tree)
+    h["pbis"][0]["title"] = "Parse TSV files"
+    before = copy.deepcopy((h, tree))
+    reconcile.plan(h, tree)
+    assert (h, tree) == before
+
+
+# ─── apply (mock ADO) ─────────────────────────────────────────
+
+def _live_feature(client, store):
+    feature = add_item(store, client, "Feature", "Importer", **{"System.Tags": "claudeADO"})
+    pbi     = add_item(store, client, "Product Backlog Item", "Parse CSV files", feature)
+    add_item(store, client, "Task", "Write tokenizer", pbi, **{"Microsoft.VSTS.Scheduling.Effort": 2})
+    old     = add_item(store, client, "Product Backlog Item", "Legacy export", feature)
+    add_item(store, client, "Task", "Old task", old, **{"Microsoft.VSTS.Scheduling.Effort": 1})
+    return feature["id"]
+
+
+def _edited():
+    return {"feature": {"title": "Importer", "description": ""},
+            "pbis": [{"title": "Parse CSV files", "description": "",
+                      "tasks": [{"title": "Write tokenizer", "effort": 3},
+                                {"title": "Detect encoding", "effort": 1}]}]}
+
+
+def test_apply_keeps_removed_items_unless_asked(client, mock_store):
+    fid    = _live_feature(client, mock_store)
+    plan   = reconcile.plan(_edited(), client.get_feature_tree(fid))
+    result = reconcile.apply(client, plan)
+    assert result["invalid"] == [] and result["failed"] == []
+    tree = client.get_feature_tree(fid)
+    assert [p["title"] for p in tree["pbis"]] == ["Parse CSV files", "Legacy export"]
+    tasks = {t["title"]: t["effort"] for t in tree["pbis"][0]["tasks"]}
+    assert tasks == {"Write tokenizer": 3, "Detect encoding": 1}
+
+
+def test_apply_deletes_when_asked(client, mock_store):
+    fid  = _live_feature(client, mock_store)
+    plan = reconcile.plan(_edited(), client.get_feature_tree(fid))
+    reconcile.apply(client, plan, delete_removed=True)
+    assert [p["title"] for p in client.get_feature_tree(fid)["pbis"]] == ["Parse CSV files"]
+
+
+def test_apply_rejects_unknown_assignee_before_any_write(client, mock_store):
+    fid    = _live_feature(client, mock_store)
+    plan   = reconcile.plan(_edited(), client.get_feature_tree(fid))
+    before = len(mock_store.items)
+    result = reconcile.apply(client, plan, assigned_to="nobody-by-this-name")
+    assert result["invalid"] and result["applied"] == []
+    assert len(mock_store.items) == before
+
+
+def test_apply_rejects_unknown_area_path_before_any_write(client, mock_store):
+    fid    = _live_feature(client, mock_store)
+    plan   = reconcile.plan(_edited(), client.get_feature_tree(fid))
+    before = len(mock_store.items)
+    result = reconcile.apply(client, plan, area_path="Nope\\Missing")
+    assert any("area path" in p for p in result["invalid"])
+    assert len(mock_store.items) == before
@@ -0,0 +1,100 @@
+"""Write-behind queue: folding queued ops per item (_merge) and flushing them to the ADO mock."""
+import pytest
+
+import write_queue
+from conftest import add_item
+from write_queue import WriteQueue
+
+
+def _op(kind, fields=None, parent_id=None, n=0):
+    return {"op_id": f"op{n}", "kind": kind, "fields": fields or {}, "parent_id": parent_id}
+
+
+def test_merge_folds_updates_last_writer_wins():
+    ops = [_op("update", {"System.Title": "A", "System.State": "Active"}, n=1),
+           _op("update", {"System.Title": "B"}, parent_id=7, n=2),
+           _op("update", {"System.Tags": "x"}, n=3)]
+    kind, fields, parent_id, superseded, orphaned = WriteQueue._merge(ops)
+    assert kind == "update"
+    assert fields == {"System.Title": "B", "System.State": "Active", "System.Tags": "x"}
+    assert parent_id == 7
+    assert superseded == [] and orphaned == []
+
+
+def test_merge_delete_supersedes_only_earlier_ops():
+    before, delete, after = _op("update", {"System.Title": "A"}, n=1), _op("delete", n=2), _op("update", n=3)
+    kind, fields, _, superseded, orphaned = WriteQueue._merge([before, delete, after])
+    assert (kind, fields) == ("delete", {})
+    assert superseded == [before]
+    assert orphaned == [after]
+
+
+def test_merge_repeated_delete_is_superseded():
+    first, second = _op("delete", n=1), _op("delete", n=2)
+    _, _, _, superseded, orphaned = WriteQueue._merge([first, second])
+    assert superseded == [second] and orphaned == []
+
+
+# ─── Flushing (mock ADO) ──────────────────────────────────────
+
+@pytest.fixture
+def queue(tmp_path, client, monkeypatch):
+    q = WriteQueue(tmp_path / "queue.db", get_client=lambda profile: client)
+    monkeypatch.setattr(q, "start", lambda: None)  # flush by hand, no background thread
+    return q
+
+
+def _status(q, op_ids):
+    return [(q.get(o)["status"], q.get(o)["error"]) for o in op_ids]
+
+
+def test_flush_applies_merged_updates(queue, client, mock_store):
+    item = add_item(mock_store, client, "Task", "Original")
+    a = queue.enqueue("default", "update", [item["id"]], {"System.Title": "First"})[item["id"]]
+    b = queue.enqueue("default", "update", [item["id"]], {"System.Title": "Second"})[item["id"]]
+    assert queue.flush_once() == 2
+    assert [s for s, _ in _status(queue, [a, b])] == ["applied", "applied"]
+    assert mock_store.items[item["id"]]["fields"]["System.Title"] == "Second"
+
+
+def test_flush_reports_updates_queued_after_a_delete_as_failed(queue, client, mock_store):
+    item = add_item(mock_store, client, "Task", "Doomed")
+    i    = item["id"]
+    ops  = [queue.enqueue("default", "update", [i], {"System.Title": "A"})[i],
+            queue.enqueue("default", "delete", [i])[i],
+            queue.enqueue("default", "update", [i], {"System.Title": "C"})[i]]
+    queue.flush_once()
+    statuses = _status(queue, ops)
+    assert statuses[0][0] == "superseded"
+    assert statuses[1] == ("applied", None)
+    assert statuses[2] == ("failed", "Item deleted by an earlier queued delete")
+    assert i not in mock_store.items
+
+
+def test_permanent_error_fails_without_retry(queue, client, mock_store):
+    op = queue.enqueue("default", "update", [999999], {"System.Title": "Ghost"})[999999]
+    queue.flush_once()
+    row = queue.get(op)
+    assert row["status"] == "failed" and row["attempts"] == 1
+
+
+def test_outage_is_retried_with_backoff(queue, client, mock_store, ado_server, monkeypatch):
+    item = add_item(mock_store, client, "Task", "Original")
+    op   = queue.enqueue("default", "update", [item["id"]], {"System.Title": "Later"})[item["id"]]
+    monkeypatch.setattr(ado_server.RequestHandlerClass, "ado_status", 503)
+    queue.flush_once()
+    row = queue.get(op)
+    assert row["status"] == "pending" and row["attempts"] == 1
+    assert row["next_attempt"] > row["updated"]
+    assert queue.flush_once() == 0  # not due yet
+
+
+def test_missing_client_is_retried(tmp_path, monkeypatch):
+    def no_client(profile):
+        raise KeyError(profile)
+    q = WriteQueue(tmp_path / "queue.db", get_client=no_client)
+    monkeypatch.setattr(q, "start", lambda: None)
+    op = q.enqueue("gone", "update", [1], {"System.Title": "x"})[1]
+    q.flush_once()
+    assert q.get(op)["status"] == "pending"
+    assert write_queue.MAX_ATTEMPTS > 1
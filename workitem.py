@@ -0,0 +1,109 @@
+"""
+WorkItem — the one normalised shape of an ADO work item used by every listing.
+
+Raw ADO JSON (nested `fields`, identity objects, relations) is converted once,
+per fetched chunk, into a compact __slots__ object and then projected to the
+response keys a caller asked for. All listings therefore agree on things like
+which AssignedTo attribute is returned, and the raw payloads can be dropped as
+soon as each chunk is converted.
+"""
+
+# Response keys → ADO field reference names. Drives `fields=` projection so only
+# the requested columns are fetched from ADO and returned to the UI.
+FIELD_REFS = {
+    "id":               "System.Id",
+    "rev":              "System.Rev",
+    "type":             "System.WorkItemType",
+    "title":            "System.Title",
+    "state":            "System.State",
+    "assigned_to":      "System.AssignedTo",  # uniqueName (what writes accept)
+    "assigned_to_name": "System.AssignedTo",  # displayName
+    "area_path":        "System.AreaPath",
+    "iteration_path":   "System.IterationPath",
+    "tags":             "System.Tags",
+    "parent_id":        "System.Parent",
+    "created_date":     "System.CreatedDate",
+    "description":      "System.Description",
+    "effort":           "Microsoft.VSTS.Scheduling.Effort",
+    "url":              None,  # derived: REST URL, used for relation links
+    "ado_url":          None,  # derived: web UI link
+}
+
+PARENT_REL = "System.LinkTypes.Hierarchy-Reverse"
+
+
+def assignee(value) -> tuple[str, str]:
+    """AssignedTo (identity object or plain string) → (uniqueName, displayName)."""
+    if isinstance(value, dict):
+        return value.get("uniqueName", "") or "", value.get("displayName", "") or ""
+    value = value or ""
+    return value, value
+
+
+def _parent_from_relations(relations) -> int | None:
+    for rel in relations or ():
+        if rel.get("rel") == PARENT_REL:
+            try:
+                return int(rel["url"].rstrip("/").rsplit("/", 1)[-1])
+            except (KeyError, ValueError):
+                return None
+    return None
+
+
+class WorkItem:
+    __slots__ = tuple(FIELD_REFS)
+
+    def __init__(self, **values):
+        for k in self.__slots__:
+            setattr(self, k, values.get(k))
+
+    @classmethod
+    def from_ado(cls, item: dict, org_url: str, project: str) -> "WorkItem":
+        return normalize([item], org_url, project)[0]
+
+    def to_dict(self, keys=None) -> dict:
+        """Project to response keys (all keys when None)."""
+        return {k: getattr(self, k) for k in (keys or self.__slots__)}
+
+    def __repr__(self):
+        return f"WorkItem({self.id}, {self.type!r}, {self.title!r})"
+
+
+def normalize(items: list[dict], org_url: str, project: str) -> list[WorkItem]:
+    """Convert a batch of raw ADO work items in one pass. Missing fields become
+    "" (text) or None (numbers/IDs), matching what the API has always returned.
+    """
+    base    = f"{org_url}/{project}"
+    rest    = f"{base}/_apis/wit/workItems/"
+    web     = f"{base}/_workitems/edit/"
+    new     = WorkItem.__new__
+    out     = []
+    append  = out.append
+    for item in items:
+        f      = item.get("fields") or {}
+        get    = f.get
+        wid    = item["id"]
+        w      = new(WorkItem)
+        unique, display = assignee(get("System.AssignedTo"))
+        parent = get("System.Parent")
+        if parent is None:
+            parent = _parent_from_relations(item.get("relations"))
+        created = get("System.CreatedDate") or ""
+        w.id               = wid
+        w.rev              = item.get("rev", get("System.Rev"))
+        w.type             = get("System.WorkItemType", "")
+        w.title            = get("System.Title", "")
+        w.state            = get("System.State", "")
+        w.assigned_to      = unique
+        w.assigned_to_name = display
+        w.area_path        = get("System.AreaPath", "")
+        w.iteration_path   = get("System.IterationPath", "")
+        w.tags             = get("System.Tags", "")
+        w.parent_id        = parent
+        w.created_date     = created[:10]
+        w.description      = get("System.Description") or ""
+        w.effort           = get("Microsoft.VSTS.Scheduling.Effort")
+        w.url              = f"{rest}{wid}"
+        w.ado_url          = f"{web}{wid}"
+        append(w)
+    return out
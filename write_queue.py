@@ -0,0 +1,340 @@
+"""
+Write-behind queue for work item mutations.
+
+With write-behind on, update / bulk-update / delete requests are recorded in a
+durable local SQLite queue and acknowledged at once with an operation ID,
+instead of waiting for ADO. A background flusher then:
+
+  - merges pending operations per item (last writer wins, per field; a delete
+    supersedes earlier edits),
+  - groups items whose merged changes are identical into one bulk_update
+    (one batch fetch + only the PATCHes that change something),
+  - retries transient failures (no answer, 408 / 429, 5xx) with exponential
+    backoff and gives up after MAX_ATTEMPTS; permanent ones (validation errors,
+    unknown fields, a missing item) are marked failed at once.
+
+Enable for every request with CLAUDEADO_WRITE_BEHIND=1, or per request with the
+`Prefer: respond-async` header. Safe with several API workers: operations are
+claimed under a write transaction with a lease, so exactly one worker flushes
+each of them and a crashed worker's claims are picked up again.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from rich.console import Console
+
+from ado_client import is_transient
+
+console = Console()
+
+QUEUE_FILE     = Path(__file__).parent / "write_queue.db"
+MAX_ATTEMPTS   = 6
+BACKOFF_BASE   = 2.0    # seconds; retry n waits BACKOFF_BASE ** n (capped)
+BACKOFF_MAX    = 300.0
+LEASE_SECONDS  = 120.0  # a claim older than this is assumed dead and re-queued
+BATCH_ITEMS    = 200    # items per flush round
+COALESCE_DELAY = 0.2    # wait this long after a wake-up so bursts share a flush
+
+STATUSES = ("pending", "flushing", "applied", "failed", "superseded")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ops (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    op_id        TEXT UNIQUE NOT NULL,
+    profile      TEXT NOT NULL,
+    kind         TEXT NOT NULL,          -- update | delete
+    item_id      INTEGER NOT NULL,
+    fields       TEXT NOT NULL DEFAULT '{}',
+    parent_id    INTEGER,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    error        TEXT,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    lease_until  REAL,
+    created      REAL NOT NULL,
+    updated      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ops_due  ON ops (status, next_attempt);
+CREATE INDEX IF NOT EXISTS ops_item ON ops (profile, item_id, status);
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("CLAUDEADO_WRITE_BEHIND", "").strip().lower() in ("1", "true", "yes")
+
+
+def _row(r: sqlite3.Row) -> dict:
+    d = dict(r)
+    d["fields"] = json.loads(d["fields"])
+    d.pop("lease_until", None)
+    return d
+
+
+class WriteQueue:
+    def __init__(self, path: str | Path = QUEUE_FILE, get_client=None):
+        self.path        = Path(path)
+        self._get_client = get_client  # profile name → ADOClient
+        self._local      = threading.local()
+        self._wake       = threading.Event()
+        self._stop       = threading.Event()
+        self._thread     = None
+        self._start_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ─── Enqueue ──────────────────────────────────────────────
+
+    def enqueue(self, profile: str, kind: str, item_ids: list[int], fields: dict = None,
+                parent_id: int = None) -> dict[int, str]:
+        """Record one operation per item and wake the flusher. Returns {item_id: op_id}."""
+        now, ops = time.time(), {}
+        with self._write() as conn:
+            for item_id in item_ids:
+                op_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO ops (op_id, profile, kind, item_id, fields, parent_id, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (op_id, profile, kind, item_id, json.dumps(fields or {}), parent_id, now, now),
+                )
+                ops[item_id] = op_id
+        self.start()
+        self._wake.set()
+        return ops
+
+    # ─── Status ───────────────────────────────────────────────
+
+    def get(self, op_id: str) -> dict | None:
+        r = self._conn().execute("SELECT * FROM ops WHERE op_id = ?", (op_id,)).fetchone()
+        return _row(r) if r else None
+
+    def status(self, status: str = None, limit: int = 50) -> dict:
+        conn   = self._conn()
+        counts = {s: 0 for s in STATUSES}
+        counts.update({r[0]: r[1] for r in conn.execute("SELECT status, COUNT(*) FROM ops GROUP BY status")})
+        if status:
+            rows = conn.execute("SELECT * FROM ops WHERE status = ? ORDER BY seq DESC LIMIT ?", (status, limit))
+        else:
+            rows = conn.execute("SELECT * FROM ops ORDER BY seq DESC LIMIT ?", (limit,))
+        return {"counts": counts, "ops": [_row(r) for r in rows], "flusher_running": self.running}
+
+    def purge(self, older_than: float = 7 * 86400) -> int:
+        """Drop finished operations older than `older_than` seconds."""
+        with self._write() as conn:
+            cur = conn.execute(
+                "DELETE FROM ops WHERE status IN ('applied', 'failed', 'superseded') AND updated < ?",
+                (time.time() - older_than,),
+            )
+            return cur.rowcount
+
+    # ─── Flushing ─────────────────────────────────────────────
+
+    def _claim(self) -> list[dict]:
+        """Claim every pending op of up to BATCH_ITEMS due items (and stale claims)."""
+        now = time.time()
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE ops SET status = 'pending', lease_until = NULL "
+                "WHERE status = 'flushing' AND lease_until < ?", (now,),
+            )
+            keys = conn.execute(
+                "SELECT DISTINCT profile, item_id FROM ops WHERE status = 'pending' AND next_attempt <= ? "
+                "ORDER BY seq LIMIT ?", (now, BATCH_ITEMS),
+            ).fetchall()
+            claimed = []
+            for profile, item_id in keys:
+                rows = conn.execute(
+                    "SELECT * FROM ops WHERE status = 'pending' AND profile = ? AND item_id = ? ORDER BY seq",
+                    (profile, item_id),
+                ).fetchall()
+                conn.execute(
+                    "UPDATE ops SET status = 'flushing', lease_until = ?, updated = ? "
+                    "WHERE status = 'pending' AND profile = ? AND item_id = ?",
+                    (now + LEASE_SECONDS, now, profile, item_id),
+                )
+                claimed.extend(_row(r) for r in rows)
+            return claimed
+
+    def _finish(self, ops: list[dict], status: str, error: str = None):
+        now   = time.time()
+        tried = 1 if status in ("applied", "failed") else 0
+        with self._write() as conn:
+            conn.executemany(
+                "UPDATE ops SET status = ?, error = ?, attempts = attempts + ?, lease_until = NULL, updated = ? "
+                "WHERE op_id = ?",
+                [(status, error, tried, now, o["op_id"]) for o in ops],
+            )
+
+    def _retry(self, ops: list[dict], error: str):
+        """Back off and re-queue, or fail ops that have used up their attempts."""
+        now = time.time()
+        with self._write() as conn:
+            for o in ops:
+                attempts = o["attempts"] + 1
+                if attempts >= MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE ops SET status = 'failed', attempts = ?, error = ?, lease_until = NULL, updated = ? "
+                        "WHERE op_id = ?", (attempts, error, now, o["op_id"]),
+                    )
+                else:
+                    delay = min(BACKOFF_MAX, BACKOFF_BASE ** attempts)
+                    conn.execute(
+                        "UPDATE ops SET status = 'pending', attempts = ?, error = ?, next_attempt = ?, "
+                        "lease_until = NULL, updated = ? WHERE op_id = ?",
+                        (attempts, error, now + delay, now, o["op_id"]),
+                    )
+
+    @staticmethod
+    def _merge(ops: list[dict]) -> tuple[str, dict, int | None, list[dict], list[dict]]:
+        """Fold one item's ops (in order) into a single change.
+        Returns (kind, fields, parent_id, superseded ops, ops queued after a delete).
+        Ops before a delete are superseded by it; later updates target a deleted item
+        and fail, and later deletes are superseded like the rest.
+        """
+        fields, parent_id = {}, None
+        for i, o in enumerate(ops):
+            if o["kind"] == "delete":
+                later = ops[i + 1:]
+                return ("delete", {}, None, ops[:i] + [x for x in later if x["kind"] == "delete"],
+                        [x for x in later if x["kind"] != "delete"])
+            fields.update(o["fields"])  # last writer wins, per field
+            if o["parent_id"]:
+                parent_id = o["parent_id"]
+        return "update", fields, parent_id, [], []
+
+    def flush_once(self) -> int:
+        """Claim due ops and apply them. Returns the number of ops processed."""
+        ops = self._claim()
+        if not ops:
+            return 0
+        by_item = {}
+        for o in ops:
+            by_item.setdefault((o["profile"], o["item_id"]), []).append(o)
+
+        # Items with identical merged changes share one bulk_update
+        groups = {}
+        for (profile, item_id), item_ops in by_item.items():
+            kind, fields, parent_id, superseded, orphaned = self._merge(item_ops)
+            if superseded:
+                self._finish(superseded, "superseded", "Superseded by a delete of the same item")
+            if orphaned:
+                self._finish(orphaned, "failed", "Item deleted by an earlier queued delete")
+            if superseded or orphaned:
+                item_ops = [o for o in item_ops if o not in superseded and o not in orphaned]
+            key = (profile, kind, json.dumps(fields, sort_keys=True), parent_id)
+            groups.setdefault(key, {})[item_id] = item_ops
+
+        for (profile, kind, fields_json, parent_id), items in groups.items():
+            all_ops = [o for item_ops in items.values() for o in item_ops]
+            try:
+                client = self._get_client(profile)
+            except Exception as e:
+                self._retry(all_ops, f"No client for profile '{profile}': {e}")
+                continue
+            try:
+                if kind == "delete":
+                    for item_id, item_ops in items.items():
+                        status = client._delete(item_id)
+                        if status in (200, 204):
+                            self._finish(item_ops, "applied")
+                        elif is_transient(status):
+                            self._retry(item_ops, f"Delete failed (HTTP {status})")
+                        else:
+                            self._finish(item_ops, "failed", f"Delete failed (HTTP {status})")
+                    continue
+                summary = client.bulk_update(list(items), json.loads(fields_json), parent_id)
+            except Exception as e:  # connection errors, timeouts, an open circuit: try again later
+                self._retry(all_ops, str(e))
+                continue
+            for item_id, item_ops in items.items():
+                if item_id not in summary["failed"]:
+                    self._finish(item_ops, "applied")
+                elif item_id in summary["transient"]:
+                    self._retry(item_ops, summary["failed"][item_id])
+                else:
+                    self._finish(item_ops, "failed", summary["failed"][item_id])
+        return len(ops)
+
+    def _next_due(self) -> float | None:
+        r = self._conn().execute(
+            "SELECT MIN(next_attempt) FROM ops WHERE status = 'pending'"
+        ).fetchone()
+        return r[0]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.flush_once():
+                    continue
+                due  = self._next_due()
+                wait = 5.0 if due is None else max(0.05, min(5.0, due - time.time()))
+            except Exception as e:
+                console.print(f"  [red]write-behind flush error: {e}[/red]")
+                wait = 5.0
+            if self._wake.wait(wait):
+                self._wake.clear()
+                time.sleep(COALESCE_DELAY)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._start_lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_queue: WriteQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> WriteQueue:
+    """Process-wide queue, flushing through the pooled per-profile clients."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            import profiles
+            _queue = WriteQueue(QUEUE_FILE, get_client=profiles.get_client)
+        return _queue
+
+
+def resume():
+    """At startup: keep flushing operations left over from a previous run."""
+    if enabled() or QUEUE_FILE.exists():
+        q = get_queue()
+        if enabled() or any(q.status()["counts"][s] for s in ("pending", "flushing")):
+            q.start()